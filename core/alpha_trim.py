@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+
+import numpy as np
+
+from core.image_loader import load_rgba
+from core.image_metadata import SUPPORTED_EXTENSIONS, get_image_info
+from core.texture_hash import file_hash, cached_file_hash
+
+# 不透明区域的包围盒，坐标为源贴图像素，x1/y1不包含
+TrimBounds = namedtuple("TrimBounds", ["x0", "y0", "x1", "y1", "width", "height"])
+
+def alpha_bounds(rgba, threshold=0):
+    """
+    计算alpha大于阈值的像素的包围盒
+    按行和列分别做一次归约，完全透明时返回空包围盒(0, 0, 0, 0)
+    """
+    height, width = rgba.shape[:2]
+    opaque = rgba[..., 3] > threshold
+    rows = np.flatnonzero(opaque.any(axis=1))
+    if not len(rows):
+        return TrimBounds(0, 0, 0, 0, width, height)
+    cols = np.flatnonzero(opaque.any(axis=0))
+    return TrimBounds(int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1,
+                      width, height)
+
+def is_trimmed(bounds):
+    """
+    包围盒是否比贴图本身小
+    """
+    return (bounds.x0, bounds.y0, bounds.x1, bounds.y1) != (0, 0, bounds.width, bounds.height)
+
+class TrimCache(object):
+    """
+    透明边界分析结果缓存，
+    按文件内容哈希保存，内容相同的贴图（复制、改名）共享结果。
+    """
+
+    def __init__(self, threshold=0):
+        self.threshold = threshold
+        self._bounds = {}  # 内容哈希 -> TrimBounds
+        self._lock = threading.Lock()
+
+    def analyze(self, filepath):
+        """
+        分析贴图的不透明区域，没有alpha通道的贴图只读取文件头
+        """
+        digest = file_hash(filepath)
+        with self._lock:
+            bounds = self._bounds.get(digest)
+        if bounds is not None:
+            return bounds
+
+        info = None
+        try:
+            info = get_image_info(filepath)
+        except (OSError, ValueError):
+            pass
+        if info is not None and not info.has_alpha:
+            bounds = TrimBounds(0, 0, info.width, info.height, info.width, info.height)
+        else:
+            bounds = alpha_bounds(load_rgba(filepath), self.threshold)
+
+        with self._lock:
+            self._bounds[digest] = bounds
+        return bounds
+
+    def lookup(self, filepath):
+        """
+        只查询缓存，未分析过或文件已修改时返回None
+        """
+        if not self._bounds:
+            return None
+        digest = cached_file_hash(filepath)
+        if digest is None:
+            return None
+        with self._lock:
+            return self._bounds.get(digest)
+
+    def analyze_paths(self, filepaths, max_workers=8):
+        """
+        并行分析一批贴图，返回{路径: TrimBounds}，读取失败的贴图不包含在结果中
+        """
+        def run(path):
+            try:
+                return path, self.analyze(path)
+            except (OSError, ValueError):
+                return path, None
+
+        filepaths = list(dict.fromkeys(filepaths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run, filepaths))
+        return {path: bounds for path, bounds in results if bounds is not None}
+
+    def analyze_folder(self, folder, max_workers=8):
+        """
+        并行分析文件夹（含子文件夹）中的所有贴图
+        """
+        paths = []
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    paths.append(os.path.join(root, name))
+        return self.analyze_paths(paths, max_workers)
+
+    def clear(self):
+        with self._lock:
+            self._bounds.clear()
+
+def trim_record(bounds):
+    """
+    由不透明区域生成导出用的裁剪偏移（源贴图像素），bounds为None或无需裁剪时返回None
+    """
+    if bounds is None or not is_trimmed(bounds):
+        return None
+    return {
+        "left": bounds.x0,
+        "top": bounds.y0,
+        "right": bounds.width - bounds.x1,
+        "bottom": bounds.height - bounds.y1,
+        "source_width": bounds.width,
+        "source_height": bounds.height,
+    }
+
+# 全局共享的透明边界缓存
+trim_cache = TrimCache()
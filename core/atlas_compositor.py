@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from core.image_loader import load_rgba
+
+# 缩放采样方式
+RESAMPLE_MODES = {
+    "nearest": Image.NEAREST,
+    "bilinear": Image.BILINEAR,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+
+TILE_SIZE = 256  # 增量重绘的图块大小（像素）
+
+def visible_records(records):
+    """
+    过滤出可见的贴图记录，并按层级从低到高排序，源文件已不存在的贴图不参与合成
+    """
+    visible = [record for record in records
+               if record.get("visible", True) and record.get("filepath") and not record.get("missing")]
+    return sorted(visible, key=lambda record: record.get("zIndex", 0))
+
+def slot_rects(records, width, height):
+    """
+    将贴图记录的归一化位置和缩放转换为贴图尺寸下的像素矩形
+    返回N x 4的整数数组，每行为(x0, y0, x1, y1)，边界对齐到像素
+    """
+    if not records:
+        return np.zeros((0, 4), dtype=np.int64)
+    values = np.array([[record.get("position", {}).get("x", 0.0),
+                        record.get("position", {}).get("y", 0.0),
+                        record.get("scale", {}).get("x", 0.0),
+                        record.get("scale", {}).get("y", 0.0)] for record in records],
+                      dtype=np.float64)
+    size = np.array([width, height], dtype=np.float64)
+    start = np.rint(values[:, :2] * size)
+    end = np.rint((values[:, :2] + values[:, 2:]) * size)
+    return np.concatenate([start, end], axis=1).astype(np.int64)
+
+def resize_rgba(rgba, width, height, resample="bilinear"):
+    """
+    将RGBA数组缩放到指定尺寸
+    """
+    if rgba.shape[1] == width and rgba.shape[0] == height:
+        return rgba
+    image = Image.fromarray(rgba, "RGBA")
+    return np.asarray(image.resize((width, height), RESAMPLE_MODES[resample]))
+
+def paste_slot(atlas, rgba, rect, region=None, resample="bilinear"):
+    """
+    把贴图缩放到rect大小后写入图集，只写入与region（默认整张图集）相交的部分
+    """
+    x0, y0, x1, y1 = [int(value) for value in rect]
+    if x1 <= x0 or y1 <= y0:
+        return
+    height, width = atlas.shape[:2]
+    rx0, ry0, rx1, ry1 = region if region is not None else (0, 0, width, height)
+    cx0, cy0 = max(x0, rx0, 0), max(y0, ry0, 0)
+    cx1, cy1 = min(x1, rx1, width), min(y1, ry1, height)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return
+    scaled = resize_rgba(rgba, x1 - x0, y1 - y0, resample)
+    atlas[cy0:cy1, cx0:cx1] = scaled[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+
+def slot_signature(record, rect):
+    """
+    贴图在图集中的绘制签名，签名相同说明该贴图在图集中的像素没有变化
+    """
+    return (record["filepath"], record.get("zIndex", 0), tuple(int(value) for value in rect))
+
+def slot_signatures(records, width, height):
+    """
+    返回布局中所有可见贴图的绘制签名计数
+    """
+    records = visible_records(records)
+    return Counter(slot_signature(record, rect)
+                   for record, rect in zip(records, slot_rects(records, width, height)))
+
+def rect_tiles(rect, width, height, tile_size=TILE_SIZE):
+    """
+    返回像素矩形覆盖的图块(列, 行)列表，矩形先裁剪到图集范围内
+    """
+    x0, y0, x1, y1 = [int(value) for value in rect]
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1, width), min(y1, height)
+    if x1 <= x0 or y1 <= y0:
+        return []
+    return [(tx, ty) for ty in range(y0 // tile_size, (y1 - 1) // tile_size + 1)
+            for tx in range(x0 // tile_size, (x1 - 1) // tile_size + 1)]
+
+def dirty_tiles(old_records, new_records, width, height, invalidated=(), tile_size=TILE_SIZE):
+    """
+    比较两次布局，返回需要重绘的图块集合
+    移动、缩放、显隐或替换贴图时，旧矩形和新矩形覆盖的图块都会被标记；
+    invalidated中的源贴图内容变化时，引用它们的贴图矩形也会被标记
+    """
+    old = slot_signatures(old_records, width, height)
+    new = slot_signatures(new_records, width, height)
+    changed = set(old - new) | set(new - old)
+    invalidated = set(invalidated)
+    if invalidated:
+        changed.update(signature for signature in new if signature[0] in invalidated)
+    tiles = set()
+    for signature in changed:
+        tiles.update(rect_tiles(signature[2], width, height, tile_size))
+    return tiles
+
+def tile_regions(tiles, width, height, tile_size=TILE_SIZE):
+    """
+    把图块合并为像素矩形列表，同一行中相邻的图块合并为一个矩形
+    """
+    rows = {}
+    for tx, ty in tiles:
+        rows.setdefault(ty, []).append(tx)
+    regions = []
+    for ty in sorted(rows):
+        columns = sorted(rows[ty])
+        start = previous = columns[0]
+        for tx in columns[1:] + [None]:
+            if tx is not None and tx == previous + 1:
+                previous = tx
+                continue
+            regions.append((start * tile_size, ty * tile_size,
+                            min((previous + 1) * tile_size, width), min((ty + 1) * tile_size, height)))
+            if tx is not None:
+                start = previous = tx
+    return regions
+
+def dirty_regions(old_records, new_records, width, height, invalidated=(), tile_size=TILE_SIZE):
+    """
+    比较两次布局，返回需要重绘的像素矩形列表（按图块对齐并合并）
+    """
+    return tile_regions(dirty_tiles(old_records, new_records, width, height, invalidated, tile_size),
+                        width, height, tile_size)
+
+class SourceCache(object):
+    """
+    合成用的源贴图像素缓存，同一文件只读取一次，可被多个线程共享
+    """
+
+    def __init__(self, loader=load_rgba):
+        self.loader = loader
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def get(self, filepath):
+        with self._lock:
+            rgba = self._images.get(filepath)
+        if rgba is None:
+            rgba = self.loader(filepath)
+            with self._lock:
+                self._images[filepath] = rgba
+        return rgba
+
+    def preload(self, filepaths, max_workers=8):
+        """
+        并行读取一批源贴图，读取失败的文件不缓存，之后调用get时会重新读取并抛出异常
+        """
+        missing = [path for path in set(filepaths) if path not in self._images]
+        if missing:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(self._try_get, missing))
+
+    def _try_get(self, filepath):
+        try:
+            return self.get(filepath)
+        except (OSError, ValueError):
+            return None
+
+    def invalidate(self, filepath):
+        with self._lock:
+            self._images.pop(filepath, None)
+
+class AtlasCompositor(object):
+    """
+    图集合成器，
+    按布局记录把各贴图缩放后写入指定尺寸的图集。
+    """
+
+    def __init__(self, width, height, resample="bilinear", background=(0, 0, 0, 0), sources=None):
+        self.width = int(width)
+        self.height = int(height)
+        self.resample = resample
+        self.background = background
+        self.sources = sources if sources is not None else SourceCache()
+        self._scaled = {}  # (路径, 宽, 高) -> 缩放后的像素，增量重绘时复用
+        self.max_scaled_entries = 256
+        self.tile_size = TILE_SIZE
+        self._composed_records = None  # 上次合成的布局记录，用于计算脏图块
+        self.failed = set()  # 上次合成时无法读取的源贴图，对应的贴图槽保持背景色，下次合成时重试
+
+    def new_atlas(self):
+        """
+        创建填充背景色的空图集
+        """
+        atlas = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        atlas[...] = self.background
+        return atlas
+
+    def compose(self, records, atlas=None, region=None):
+        """
+        合成图集
+        region为(x0, y0, x1, y1)时只重绘该区域，其余像素保持不变
+        """
+        records = visible_records(records)
+        if atlas is None:
+            atlas = self.new_atlas()
+        rects = slot_rects(records, self.width, self.height)
+        if region is not None:
+            rx0, ry0, rx1, ry1 = region
+            atlas[ry0:ry1, rx0:rx1] = self.background
+            hit = ((rects[:, 0] < rx1) & (rects[:, 2] > rx0) &
+                   (rects[:, 1] < ry1) & (rects[:, 3] > ry0))
+        else:
+            hit = np.ones(len(records), dtype=bool)
+        used = [record["filepath"] for record, flag in zip(records, hit) if flag]
+        self.sources.preload(used)
+        for record, rect, flag in zip(records, rects, hit):
+            if not flag:
+                continue
+            try:
+                scaled = self.scaled_source(record["filepath"], rect[2] - rect[0], rect[3] - rect[1])
+            except (OSError, ValueError):
+                # 源贴图缺失或正在写入，跳过该贴图槽
+                self.failed.add(record["filepath"])
+                continue
+            paste_slot(atlas, scaled, rect, region, self.resample)
+        return atlas
+
+    def update(self, records, atlas=None, invalidated=()):
+        """
+        增量合成：与上次合成的布局比较，只重绘变化贴图新旧矩形覆盖的图块
+        invalidated为内容变化的源贴图路径，其缓存会被丢弃，引用它们的图块也会重绘。
+        atlas为None或没有上次的布局时整图合成。
+        上次无法读取的源贴图也视为变化，引用它们的图块会重新尝试读取。
+        返回(图集, 重绘的图块列表)，整图合成时图块列表为None，无法读取的源贴图记录在failed中
+        """
+        invalidated = set(invalidated) | self.failed
+        self.failed = set()
+        for filepath in invalidated:
+            self.invalidate(filepath)
+        records = list(records)
+        if atlas is None or self._composed_records is None:
+            atlas = self.compose(records)
+            self._composed_records = records
+            return atlas, None
+        tiles = dirty_tiles(self._composed_records, records, self.width, self.height,
+                            invalidated, self.tile_size)
+        for region in tile_regions(tiles, self.width, self.height, self.tile_size):
+            self.compose(records, atlas, region)
+        self._composed_records = records
+        return atlas, sorted(tiles)
+
+    def scaled_source(self, filepath, width, height):
+        """
+        获取缩放到指定尺寸的源贴图，结果会被缓存
+        """
+        width, height = int(width), int(height)
+        if width <= 0 or height <= 0:
+            return self.sources.get(filepath)
+        key = (filepath, width, height)
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            scaled = resize_rgba(self.sources.get(filepath), width, height, self.resample)
+            if len(self._scaled) >= self.max_scaled_entries:
+                self._scaled.clear()
+            self._scaled[key] = scaled
+        return scaled
+
+    def invalidate(self, filepath):
+        """
+        源贴图变化时丢弃其像素和缩放缓存
+        """
+        self.sources.invalidate(filepath)
+        for key in [key for key in self._scaled if key[0] == filepath]:
+            del self._scaled[key]
+
+def save_rgba(rgba, filepath):
+    """
+    保存RGBA数组为图片文件，格式由扩展名决定
+    """
+    Image.fromarray(rgba, "RGBA").save(filepath)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+import numpy as np
+
+def raster_rects(records, width, height):
+    """
+    将贴图记录转换为占用栅格中的单元矩形(x0, y0, x1, y1)，裁剪到栅格范围内
+    """
+    rects = []
+    for record in records:
+        if not record or not record.get("visible", True):
+            continue
+        position = record.get("position", {})
+        scale = record.get("scale", {})
+        x = position.get("x", 0.0)
+        y = position.get("y", 0.0)
+        x0 = max(0, int(round(x * width)))
+        y0 = max(0, int(round(y * height)))
+        x1 = min(width, int(round((x + scale.get("x", 0.0)) * width)))
+        y1 = min(height, int(round((y + scale.get("y", 0.0)) * height)))
+        if x1 > x0 and y1 > y0:
+            rects.append((x0, y0, x1, y1))
+    return rects
+
+class UtilizationRaster(object):
+    """
+    图集占用栅格，
+    每个单元记录覆盖它的贴图数量。布局变化时只增减变化了的矩形，
+    占用和重叠的单元数随之增量更新，不需要重新扫描整张栅格。
+    """
+
+    def __init__(self, width, height):
+        self.width = int(width)
+        self.height = int(height)
+        self.coverage = np.zeros((self.height, self.width), dtype=np.uint16)
+        self.occupied = 0   # 被至少一个贴图覆盖的单元数
+        self.overlap = 0    # 被两个及以上贴图覆盖的单元数
+        self._rects = Counter()
+        self.version = 0    # 栅格内容变化时递增，用于判断显示缓存是否失效
+
+    def add_rect(self, rect):
+        x0, y0, x1, y1 = rect
+        block = self.coverage[y0:y1, x0:x1]
+        self.occupied += int(np.count_nonzero(block == 0))
+        self.overlap += int(np.count_nonzero(block == 1))
+        block += 1
+
+    def remove_rect(self, rect):
+        x0, y0, x1, y1 = rect
+        block = self.coverage[y0:y1, x0:x1]
+        self.occupied -= int(np.count_nonzero(block == 1))
+        self.overlap -= int(np.count_nonzero(block == 2))
+        block -= 1
+
+    def update(self, records):
+        """
+        按新的布局记录更新栅格，只处理增加和移除的矩形
+        返回是否有变化
+        """
+        rects = Counter(raster_rects(records, self.width, self.height))
+        removed = self._rects - rects
+        added = rects - self._rects
+        for rect, count in removed.items():
+            for _ in range(count):
+                self.remove_rect(rect)
+        for rect, count in added.items():
+            for _ in range(count):
+                self.add_rect(rect)
+        self._rects = rects
+        if removed or added:
+            self.version += 1
+            return True
+        return False
+
+    def stats(self):
+        """
+        返回占用统计，比例均相对于整张图集
+        """
+        total = float(self.width * self.height) or 1.0
+        return {
+            "occupied": self.occupied / total,
+            "wasted": 1.0 - self.occupied / total,
+            "overlap": self.overlap / total,
+            "slots": sum(self._rects.values()),
+        }
+
+def raster_size(width, height, max_cells=1024):
+    """
+    计算栅格尺寸，最长边不超过max_cells
+    """
+    factor = min(1.0, float(max_cells) / max(width, height, 1))
+    return max(1, int(round(width * factor))), max(1, int(round(height * factor)))
+
+def utilization_stats(records, width, height, max_cells=1024):
+    """
+    一次性计算布局的占用统计
+    """
+    raster = UtilizationRaster(*raster_size(width, height, max_cells))
+    raster.update(records)
+    return raster.stats()
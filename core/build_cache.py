@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from core.atlas_compositor import visible_records, slot_rects
+from core.texture_hash import file_hash
+
+CACHE_VERSION = 2  # 合成算法或缓存键变化时递增，使旧的缓存全部失效
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+def default_cache_dir():
+    """
+    返回生成结果缓存的默认目录
+    """
+    from PyQt5.QtCore import QStandardPaths
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    return os.path.join(base or os.path.expanduser("~/.cache"), "VisualizationTexLayout", "build_cache")
+
+def atlas_key(records, width, height, lod, settings=None, hashes=None, texture_size=None):
+    """
+    计算图集的缓存键
+    由可见贴图的源文件内容哈希、层级和像素矩形，以及Lod0导出贴图尺寸、该级贴图尺寸、Lod和合成设置得出，
+    与源贴图所在的路径无关，同样内容的布局在其他目录或分支中也能命中。
+    texture_size为Lod0导出贴图尺寸(宽, 高)，为None时视为与该级尺寸相同。
+    hashes为{路径: 内容哈希}，缺少的哈希会读取文件计算
+    """
+    records = visible_records(records)
+    hashes = hashes if hashes is not None else {}
+    slots = []
+    for record, rect in zip(records, slot_rects(records, width, height)):
+        path = record["filepath"]
+        if path not in hashes:
+            hashes[path] = file_hash(path)
+        slots.append([hashes[path], record.get("zIndex", 0), [int(value) for value in rect]])
+    payload = {
+        "version": CACHE_VERSION,
+        "texture_size": [int(value) for value in (texture_size or (width, height))],
+        "size": [int(width), int(height)],
+        "lod": int(lod),
+        "settings": settings or {},
+        "slots": slots,
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+class BuildCache(object):
+    """
+    按内容寻址的生成结果缓存，
+    每个条目是一个以缓存键命名的目录，命中时只需复制文件。
+    总大小超过上限时按最近使用时间淘汰最旧的条目。
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def fetch(self, key, destinations):
+        """
+        把缓存条目中的文件复制到目标路径，destinations为{条目中的文件名: 目标路径}
+        未命中时返回False
+        """
+        entry = self.entry_dir(key)
+        sources = {name: os.path.join(entry, name) for name in destinations}
+        if not all(os.path.isfile(path) for path in sources.values()):
+            return False
+        try:
+            for name, destination in destinations.items():
+                shutil.copyfile(sources[name], destination)
+            # 记录最近使用时间，用于淘汰
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key, files):
+        """
+        把文件存入缓存，files为{条目中的文件名: 源路径}
+        先写入临时目录再整体改名，其他进程不会读到不完整的条目；写入后由调用方执行evict
+        """
+        entry = self.entry_dir(key)
+        if os.path.isdir(entry):
+            os.utime(entry)
+            return
+        parent = os.path.dirname(entry)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+        try:
+            for name, source in files.items():
+                shutil.copyfile(source, os.path.join(staging, name))
+            os.rename(staging, entry)
+        except OSError:
+            # 其他进程已写入同一条目，或复制失败
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self):
+        """
+        返回所有条目的(最近使用时间, 大小, 目录)
+        """
+        result = []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                # 其他进程可能同时在淘汰条目
+                try:
+                    size = sum(item.stat().st_size for item in os.scandir(entry.path))
+                    result.append((entry.stat().st_mtime_ns, size, entry.path))
+                except OSError:
+                    continue
+        return result
+
+    def total_size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """
+        淘汰最久未使用的条目，直到总大小不超过上限，返回删除的条目数
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total <= limit:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def clear(self):
+        return self.evict(0)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QFileSystemWatcher, QTimer, pyqtSignal
+
+from core.atlas_compositor import SourceCache, visible_records
+from core.lod_generator import generate_lod_atlases, atlas_file_name
+from core.texture_hash import file_signature
+from core.texture_watcher import TextureWatcher
+from core.texture_maps import layout_channels, record_maps
+
+def read_layout(layout_path):
+    """
+    读取布局文件，不是布局数据（没有images列表）或读取失败时返回None
+    """
+    try:
+        with open(layout_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("images"), list):
+        return None
+    return data
+
+def resolve_texture_path(filepath, layout_path):
+    """
+    相对路径按布局文件所在目录解析
+    """
+    if not os.path.isabs(filepath):
+        filepath = os.path.join(os.path.dirname(layout_path), filepath)
+    return os.path.abspath(filepath)
+
+def resolve_layout(layout_data, layout_path):
+    """
+    返回贴图路径全部解析为绝对路径的布局副本
+    """
+    data = copy.deepcopy(layout_data)
+    for record in data.get("images", []):
+        if record.get("filepath"):
+            record["filepath"] = resolve_texture_path(record["filepath"], layout_path)
+        if record.get("maps"):
+            record["maps"] = {channel: resolve_texture_path(path, layout_path)
+                              for channel, path in record["maps"].items() if path}
+    return data
+
+def layout_textures(layout_data, layout_path):
+    """
+    返回布局中参与合成的贴图（包括各通道贴图）的绝对路径集合
+    """
+    return set(resolve_texture_path(path, layout_path)
+               for record in visible_records(layout_data.get("images", []))
+               for path in record_maps(record).values())
+
+def output_paths(layout_path, output_dir, lods, layout_data=None):
+    """
+    返回布局各级Lod的(图集路径, 导出记录路径, 其他通道图集路径...)
+    """
+    basename = os.path.splitext(os.path.basename(layout_path))[0]
+    channels = layout_channels(visible_records((layout_data or {}).get("images", [])))
+    outputs = []
+    for lod in lods:
+        atlases = [os.path.join(output_dir, atlas_file_name(basename, lod, channel)) for channel in channels]
+        outputs.append((atlases[0], os.path.join(output_dir, f"{basename}_Lod{lod}.json")) + tuple(atlases[1:]))
+    return outputs
+
+def is_up_to_date(layout_path, textures, outputs):
+    """
+    所有输出文件都存在且不早于布局和贴图时返回True
+    """
+    output_times = []
+    for path in (path for pair in outputs for path in pair):
+        signature = file_signature(path)
+        if signature is None:
+            return False
+        output_times.append(signature[0])
+    input_times = [signature[0] for signature in map(file_signature, [layout_path] + sorted(textures))
+                   if signature is not None]
+    return not input_times or min(output_times) >= max(input_times)
+
+def build_layout(layout_path, output_dir, lods, sources=None, cache=None, changed=None):
+    """
+    生成一个布局的各级Lod图集和导出记录，已有上次的结果时只重绘变化的图块，
+    changed中的贴图总是视为已修改
+    返回生成的文件路径列表
+    """
+    layout_data = read_layout(layout_path)
+    if layout_data is None:
+        raise ValueError(f"无效的布局文件: {layout_path}")
+    basename = os.path.splitext(os.path.basename(layout_path))[0]
+    outputs = generate_lod_atlases(resolve_layout(layout_data, layout_path), output_dir, basename,
+                                   lods=lods, max_workers=1, sources=sources, incremental=True,
+                                   cache=cache, changed=changed)
+    return [path for pair in outputs for path in pair]
+
+class DependencyGraph(object):
+    """
+    布局与贴图的依赖关系，
+    记录每个布局引用的贴图以及每个贴图被哪些布局引用。
+    """
+
+    def __init__(self):
+        self.textures = {}  # 布局 -> 贴图集合
+        self.layouts = {}   # 贴图 -> 布局集合
+
+    def set_layout(self, layout, textures):
+        self.remove_layout(layout)
+        self.textures[layout] = set(textures)
+        for texture in textures:
+            self.layouts.setdefault(texture, set()).add(layout)
+
+    def remove_layout(self, layout):
+        for texture in self.textures.pop(layout, ()):
+            users = self.layouts.get(texture)
+            if users is not None:
+                users.discard(layout)
+                if not users:
+                    del self.layouts[texture]
+
+    def dependents(self, texture):
+        return set(self.layouts.get(texture, ()))
+
+    def affected(self, textures):
+        """
+        返回引用了任一贴图的布局
+        """
+        layouts = set()
+        for texture in textures:
+            layouts.update(self.layouts.get(texture, ()))
+        return layouts
+
+    def all_textures(self):
+        return set(self.layouts)
+
+class _BuildTask(QRunnable):
+    """
+    生成任务，在线程池中生成一个布局的输出
+    """
+
+    def __init__(self, daemon, layout_path, changed):
+        super(_BuildTask, self).__init__()
+        self.daemon = daemon
+        self.layout_path = layout_path
+        self.changed = changed
+
+    def run(self):
+        try:
+            outputs = build_layout(self.layout_path, self.daemon.output_dir,
+                                   self.daemon.lods, self.daemon.sources, self.daemon.cache,
+                                   self.changed)
+            error = ""
+        except Exception as e:
+            outputs = []
+            error = str(e)
+        self.daemon.build_finished.emit(self.layout_path, outputs, error)
+
+class BuildDaemon(QObject):
+    """
+    监视文件夹的增量生成服务，
+    监视布局文件夹中的布局JSON及其引用的源贴图，变化经过防抖合并后，
+    只重新生成受影响的布局的图集和导出记录。同一布局不会同时生成两次，
+    生成过程中再次变化的布局在完成后重新生成。
+    """
+
+    # 自定义信号
+    build_started = pyqtSignal(str)  # 开始生成信号，参数为布局路径
+    build_finished = pyqtSignal(str, list, str)  # 生成完成信号，参数为布局路径、生成的文件、错误信息（成功时为空）
+    idle = pyqtSignal()  # 队列中的任务全部完成信号
+
+    def __init__(self, layout_dir, output_dir=None, lods=(0,), max_workers=2, debounce_ms=500,
+                 cache=None, parent=None):
+        super(BuildDaemon, self).__init__(parent)
+        self.layout_dir = os.path.abspath(layout_dir)
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.layout_dir, "build"))
+        self.lods = sorted(set(lods))
+        self.graph = DependencyGraph()
+        self.sources = SourceCache()  # 各次生成共享，贴图变化时失效
+        self.cache = cache  # 按内容寻址的图集缓存，可为None
+
+        self._layout_signatures = {}  # 布局 -> (修改时间, 大小)
+        self._pending = set()
+        self._running = set()
+        self._rerun = set()
+        self._changed = {}  # 布局 -> 监视器上报的已变化贴图，下次生成时总是重绘
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, int(max_workers)))
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self.dispatch)
+
+        # 布局文件和目录的变化只触发重新扫描，贴图变化由贴图监视器按签名过滤后上报
+        self._layout_watcher = QFileSystemWatcher(self)
+        self._layout_watcher.fileChanged.connect(self._on_layout_path_changed)
+        self._layout_watcher.directoryChanged.connect(self._on_layout_path_changed)
+        self._scan_timer = QTimer(self)
+        self._scan_timer.setSingleShot(True)
+        self._scan_timer.setInterval(debounce_ms)
+        self._scan_timer.timeout.connect(self.scan_layouts)
+        self.texture_watcher = TextureWatcher(debounce_ms, self)
+        self.texture_watcher.textures_changed.connect(self.on_textures_changed)
+
+        self.build_finished.connect(self._on_build_finished)
+
+    def start(self):
+        """
+        扫描布局文件夹，生成所有过期的布局，然后开始监视
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.scan_layouts(initial=True)
+        if not self._pending:
+            # 在事件循环开始后再通知，便于调用方在收到通知时退出
+            QTimer.singleShot(0, self.idle.emit)
+
+    def layout_files(self):
+        """
+        列出布局文件夹（含子文件夹，不含输出文件夹）中的JSON文件和所有子文件夹
+        """
+        files = []
+        directories = []
+        for root, dirs, names in os.walk(self.layout_dir):
+            if os.path.abspath(root) == self.output_dir:
+                continue
+            dirs[:] = sorted(d for d in dirs
+                             if os.path.abspath(os.path.join(root, d)) != self.output_dir)
+            directories.append(root)
+            files.extend(os.path.abspath(os.path.join(root, name)) for name in sorted(names)
+                         if name.lower().endswith(".json"))
+        return files, directories
+
+    def scan_layouts(self, initial=False):
+        """
+        比较布局文件签名，新增和修改的布局加入队列，删除的布局移出依赖图
+        initial为True时只生成输出缺失或过期的布局
+        """
+        files, directories = self.layout_files()
+        signatures = {path: file_signature(path) for path in files}
+        for path in set(self._layout_signatures) - set(signatures):
+            self.graph.remove_layout(path)
+            self._changed.pop(path, None)
+            del self._layout_signatures[path]
+        for path, signature in signatures.items():
+            if signature is None or self._layout_signatures.get(path) == signature:
+                continue
+            self._layout_signatures[path] = signature
+            layout_data = read_layout(path)
+            if layout_data is None:
+                self.graph.remove_layout(path)
+                continue
+            textures = layout_textures(layout_data, path)
+            self.graph.set_layout(path, textures)
+            outputs = output_paths(path, self.output_dir, self.lods, layout_data)
+            if initial and is_up_to_date(path, textures, outputs):
+                continue
+            self._pending.add(path)
+
+        # 更新监视列表
+        watched = set(self._layout_watcher.files()) | set(self._layout_watcher.directories())
+        wanted = set(directories) | set(signatures)
+        if watched - wanted:
+            self._layout_watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self._layout_watcher.addPaths(list(wanted - watched))
+        self.texture_watcher.set_paths(self.graph.all_textures())
+        if self._pending:
+            self._debounce_timer.start()
+
+    def _on_layout_path_changed(self, path):
+        self._scan_timer.start()
+
+    def on_textures_changed(self, filepaths):
+        """
+        贴图变化时丢弃其像素缓存，引用它的布局加入队列
+        """
+        for path in filepaths:
+            self.sources.invalidate(path)
+        affected = self.graph.affected(filepaths)
+        for layout in affected:
+            self._changed.setdefault(layout, set()).update(
+                path for path in filepaths if path in self.graph.textures.get(layout, ()))
+        if affected:
+            self._pending.update(affected)
+            self._debounce_timer.start()
+
+    def dispatch(self):
+        """
+        把队列中的布局交给线程池，正在生成的布局等完成后再重新生成
+        """
+        pending, self._pending = self._pending, set()
+        for path in sorted(pending):
+            if path in self._running:
+                self._rerun.add(path)
+                continue
+            self._running.add(path)
+            self.build_started.emit(path)
+            self._pool.start(_BuildTask(self, path, self._changed.pop(path, set())))
+
+    def _on_build_finished(self, layout_path, outputs, error):
+        self._running.discard(layout_path)
+        if layout_path in self._rerun:
+            self._rerun.discard(layout_path)
+            self._pending.add(layout_path)
+            self._debounce_timer.start()
+        if not self._running and not self._pending:
+            self.idle.emit()
+
+    def pending_count(self):
+        return len(self._pending) + len(self._running)
+
+    def stop(self):
+        """
+        停止监视并等待正在生成的任务完成
+        """
+        self._debounce_timer.stop()
+        self._scan_timer.stop()
+        self._pending.clear()
+        self._changed.clear()
+        self._pool.clear()
+        self._pool.waitForDone()
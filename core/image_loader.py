@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from core.tga_reader import read_tga
+
+def load_qimage(filepath, max_size=None):
+    """
+    加载贴图为QImage
+    TGA走内存映射的快速解码路径，其余格式使用Qt图片插件
+    返回的QImage持有自己的像素，可以跨线程传递
+    max_size给定时TGA快速路径直接缩放到不超过该尺寸，其余格式保持原尺寸
+    """
+    if os.path.splitext(filepath)[1].lower() == ".tga":
+        try:
+            return read_tga(filepath).to_qimage(max_size)
+        except (OSError, ValueError):
+            # 快速路径不支持的文件交给Qt处理
+            pass
+    return QImage(filepath)
+
+def load_pixmap(filepath):
+    """
+    加载贴图为QPixmap
+    """
+    image = load_qimage(filepath)
+    if image.isNull():
+        return QPixmap()
+    return QPixmap.fromImage(image)
+
+
+def load_rgba(filepath):
+    """
+    加载贴图为RGBA像素数组（高 x 宽 x 4，uint8），可在工作线程中调用
+    """
+    if os.path.splitext(filepath)[1].lower() == ".tga":
+        try:
+            return read_tga(filepath).to_rgba()
+        except (OSError, ValueError):
+            pass
+    with Image.open(filepath) as image:
+        return np.asarray(image.convert("RGBA")).copy()
+
+class _DecodeTask(QRunnable):
+    """
+    解码任务，在线程池中把贴图读取为QImage
+    """
+
+    def __init__(self, decoder, filepath):
+        super(_DecodeTask, self).__init__()
+        self.decoder = decoder
+        self.filepath = filepath
+
+    def run(self):
+        try:
+            image = load_qimage(self.filepath)
+        except Exception:
+            image = QImage()
+        # 排队信号会在界面线程中使用贴图，load_qimage保证返回持有像素的QImage
+        self.decoder.finish(self.filepath)
+        self.decoder.decoded.emit(self.filepath, image)
+
+class ImageDecoder(QObject):
+    """
+    后台贴图解码器，同一贴图正在解码时不重复提交
+    QPixmap只能在界面线程中创建，工作线程只生成QImage
+    """
+
+    # 自定义信号
+    decoded = pyqtSignal(str, QImage)  # 解码完成信号，参数为文件路径和贴图（读取失败时为空图）
+
+    def __init__(self, max_threads=2, parent=None):
+        super(ImageDecoder, self).__init__(parent)
+        self._running = set()
+        self._lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(max_threads, QThreadPool.globalInstance().maxThreadCount())))
+
+    def request(self, filepath):
+        with self._lock:
+            if filepath in self._running:
+                return
+            self._running.add(filepath)
+        self._pool.start(_DecodeTask(self, filepath))
+
+    def finish(self, filepath):
+        with self._lock:
+            self._running.discard(filepath)
+
+    def shutdown(self):
+        self._pool.clear()
+        self._pool.waitForDone()
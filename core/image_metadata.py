@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# 贴图元数据：宽、高、通道数、是否带透明通道、格式名
+ImageInfo = namedtuple("ImageInfo", ["width", "height", "channels", "has_alpha", "format"])
+
+HEADER_BYTES = 128  # 大多数格式只需读取文件开头的少量字节
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 支持只读文件头的贴图扩展名
+SUPPORTED_EXTENSIONS = (".tga", ".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+# 元数据缓存，键为(路径, 修改时间)，文件被修改后自动失效
+_info_cache = {}
+_cache_lock = threading.Lock()
+MAX_CACHE_ENTRIES = 100000
+
+def _read_png(f, head):
+    """
+    解析PNG的IHDR块
+    """
+    if len(head) < 26 or head[12:16] != b"IHDR":
+        raise ValueError("无效的PNG文件头")
+    width, height = struct.unpack(">II", head[16:24])
+    color_type = head[25]
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 3)
+    has_alpha = color_type in (4, 6)
+    if color_type in (0, 2, 3):
+        # 调色板/灰度/RGB图可能通过tRNS块带透明，该块位于IDAT之前
+        f.seek(8)
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            length, chunk_type = struct.unpack(">I4s", chunk)
+            if chunk_type == b"tRNS":
+                has_alpha = True
+                channels += 1
+                break
+            if chunk_type in (b"IDAT", b"IEND"):
+                break
+            f.seek(length + 4, os.SEEK_CUR)
+    return ImageInfo(width, height, channels, has_alpha, "png")
+
+def _read_tga(f, head):
+    """
+    解析TGA的18字节文件头
+    """
+    if len(head) < 18:
+        raise ValueError("无效的TGA文件头")
+    cmap_type, image_type = head[1], head[2]
+    cmap_depth = head[7]
+    width, height = struct.unpack("<HH", head[12:16])
+    depth = head[16]
+    alpha_bits = head[17] & 0x0F
+    if image_type not in (1, 2, 3, 9, 10, 11) or (image_type in (1, 9) and cmap_type != 1):
+        raise ValueError("不支持的TGA类型")
+    if image_type in (3, 11):
+        channels = 1
+    elif image_type in (1, 9):
+        channels = 4 if cmap_depth == 32 else 3
+    else:
+        channels = 4 if depth == 32 or (depth == 16 and alpha_bits) else 3
+    has_alpha = channels == 4 and (alpha_bits > 0 or depth == 32 or cmap_depth == 32)
+    return ImageInfo(width, height, channels, has_alpha, "tga")
+
+def _read_bmp(f, head):
+    """
+    解析BMP的信息头
+    """
+    if len(head) < 26:
+        raise ValueError("无效的BMP文件头")
+    header_size = struct.unpack("<I", head[14:18])[0]
+    if header_size == 12:
+        width, height, _, bpp = struct.unpack("<HHHH", head[18:26])
+        compression = 0
+    else:
+        width, height, _, bpp, compression = struct.unpack("<iiHHI", head[18:34])
+    has_alpha = False
+    if bpp == 32 and header_size >= 56:
+        # V3及以上的信息头带有alpha掩码
+        alpha_mask = struct.unpack("<I", head[66:70])[0] if len(head) >= 70 else 0
+        has_alpha = alpha_mask != 0 and compression in (0, 3, 6)
+    channels = 4 if has_alpha else (1 if bpp <= 8 and header_size == 12 else 3)
+    return ImageInfo(abs(width), abs(height), channels, has_alpha, "bmp")
+
+def _read_jpeg(f, head):
+    """
+    按段跳读JPEG，直到找到SOF段
+    """
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("无效的JPEG文件")
+        code = marker[1]
+        # 填充字节
+        while code == 0xFF:
+            code = f.read(1)[0]
+        # 无长度的独立标记
+        if code in (0x01,) or 0xD0 <= code <= 0xD8:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            segment = f.read(6)
+            height, width, components = struct.unpack(">HHB", segment[1:6])
+            return ImageInfo(width, height, components, False, "jpeg")
+        f.seek(length - 2, os.SEEK_CUR)
+
+def _read_gif(f, head):
+    """
+    解析GIF逻辑屏幕描述符，并查找首帧前的图形控制扩展判断透明
+    """
+    if len(head) < 13:
+        raise ValueError("无效的GIF文件头")
+    width, height, flags = struct.unpack("<HHB", head[6:11])
+    has_alpha = False
+    offset = 13
+    if flags & 0x80:
+        offset += 3 * (2 << (flags & 0x07))
+    f.seek(offset)
+    while True:
+        block = f.read(1)
+        if not block or block[0] != 0x21:
+            # 到达图像描述符或文件结束
+            break
+        label = f.read(1)[0]
+        if label == 0xF9:
+            size, packed = struct.unpack("<BB", f.read(2))
+            has_alpha = bool(packed & 0x01)
+            f.seek(size - 1, os.SEEK_CUR)
+        # 跳过剩余子块
+        while True:
+            size = f.read(1)
+            if not size or size[0] == 0:
+                break
+            f.seek(size[0], os.SEEK_CUR)
+        if has_alpha:
+            break
+    return ImageInfo(width, height, 4 if has_alpha else 3, has_alpha, "gif")
+
+def read_image_info(filepath):
+    """
+    读取单个贴图的元数据（尺寸、通道、透明通道），只读取文件头，不解码像素
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(HEADER_BYTES)
+        try:
+            if head.startswith(PNG_SIGNATURE):
+                return _read_png(f, head)
+            if head[:2] == b"\xff\xd8":
+                return _read_jpeg(f, head)
+            if head[:2] == b"BM":
+                return _read_bmp(f, head)
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return _read_gif(f, head)
+            # TGA没有魔数，按扩展名识别
+            if os.path.splitext(filepath)[1].lower() == ".tga":
+                return _read_tga(f, head)
+        except (struct.error, IndexError):
+            raise ValueError(f"文件头已损坏: {filepath}")
+    raise ValueError(f"不支持的图片格式: {filepath}")
+
+def get_image_info(filepath):
+    """
+    读取贴图元数据，结果按(路径, 修改时间)缓存
+    """
+    mtime = os.stat(filepath).st_mtime_ns
+    key = (filepath, mtime)
+    with _cache_lock:
+        info = _info_cache.get(key)
+    if info is None:
+        info = read_image_info(filepath)
+        _store(key, info)
+    return info
+
+def _store(key, info):
+    """
+    写入缓存，超过上限时清空
+    """
+    with _cache_lock:
+        if len(_info_cache) >= MAX_CACHE_ENTRIES:
+            _info_cache.clear()
+        _info_cache[key] = info
+
+def clear_cache():
+    """
+    清空元数据缓存
+    """
+    with _cache_lock:
+        _info_cache.clear()
+
+def probe_images(filepaths, max_workers=8):
+    """
+    批量读取多个贴图的元数据
+    先按修改时间命中缓存，只有未命中的文件才并行读取文件头。
+    返回与输入顺序一致的列表，读取失败的项为None
+    """
+    results = [None] * len(filepaths)
+    pending = []
+    for index, path in enumerate(filepaths):
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            continue
+        with _cache_lock:
+            info = _info_cache.get(key)
+        if info is None:
+            pending.append((index, key))
+        else:
+            results[index] = info
+
+    def probe(entry):
+        index, key = entry
+        try:
+            info = read_image_info(key[0])
+        except (OSError, ValueError):
+            return index, None
+        _store(key, info)
+        return index, info
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, info in executor.map(probe, pending):
+                results[index] = info
+    return results
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# 布局检查命令行工具，并行检查大量布局文件和导出记录，用于持续集成：
+#     python -m core.layout_lint layouts/ build/ --jobs 8 --format json
+# 有错误时退出码为1（--strict时警告也算错误），参数错误时为2
+
+import argparse
+import codecs
+import fnmatch
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.mip_alignment import ISSUE_MISALIGNED, analyze_alignment, record_edges
+from core.texture_maps import MAP_CHANNELS, BASE_MAP
+
+SUPPORTED_VERSIONS = ("1.0",)
+EPSILON = 1e-6
+
+ERROR = "error"
+WARNING = "warning"
+
+def issue(severity, code, message, **details):
+    data = {"severity": severity, "code": code, "message": message}
+    data.update(details)
+    return data
+
+NUMBER_TYPES = (int, float)
+
+def is_number(value):
+    return type(value) in NUMBER_TYPES and math.isfinite(value)
+
+def is_vector(value):
+    return isinstance(value, dict) and is_number(value.get("x", 0)) and is_number(value.get("y", 0))
+
+# 源贴图是否存在的缓存，同一进程检查的布局大多引用相同的贴图
+_exists_cache = {}
+
+def texture_exists(filepath):
+    """
+    相对路径需先按布局文件所在目录拼接
+    """
+    exists = _exists_cache.get(filepath)
+    if exists is None:
+        exists = _exists_cache[filepath] = os.path.isfile(filepath)
+    return exists
+
+def check_schema(data):
+    """
+    检查顶层结构、版本和画布，返回(问题列表, 画布宽, 画布高)，结构无法继续检查时宽高为None
+    """
+    issues = []
+    if not isinstance(data, dict) or not isinstance(data.get("images"), list):
+        return [issue(ERROR, "schema", "缺少images列表，不是布局或导出记录")], None, None
+
+    version = data.get("version")
+    if version is None:
+        issues.append(issue(WARNING, "version", "缺少version字段"))
+    elif str(version) not in SUPPORTED_VERSIONS:
+        issues.append(issue(ERROR, "version", f"不支持的版本: {version}"))
+
+    canvas = data.get("canvas")
+    if not isinstance(canvas, dict) or not is_number(canvas.get("width")) or not is_number(canvas.get("height")) \
+            or canvas["width"] <= 0 or canvas["height"] <= 0:
+        issues.append(issue(ERROR, "schema", "canvas缺少有效的width和height"))
+        return issues, None, None
+    return issues, float(canvas["width"]), float(canvas["height"])
+
+def check_maps(maps, index, layout_dir, check_files):
+    """
+    检查贴图记录中其他通道的贴图
+    """
+    if maps is None:
+        return []
+    if not isinstance(maps, dict) or not all(isinstance(path, str) and path for path in maps.values()):
+        return [issue(ERROR, "schema", "maps应为{通道: 贴图路径}", slot=index)]
+    issues = []
+    for channel, path in maps.items():
+        if channel not in MAP_CHANNELS or channel == BASE_MAP:
+            issues.append(issue(WARNING, "unknown_map", f"未知的贴图通道: {channel}", slot=index))
+        elif check_files and not texture_exists(os.path.join(layout_dir, path)):
+            issues.append(issue(ERROR, "file_not_found", f"{channel}通道贴图不存在: {path}", slot=index))
+    return issues
+
+def check_records(records, layout_path, check_files):
+    """
+    检查每个贴图记录的字段类型和源文件，返回(问题列表, 可继续做几何检查的记录索引)
+    """
+    issues = []
+    valid = []
+    layout_dir = os.path.dirname(layout_path)
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            issues.append(issue(ERROR, "schema", "贴图记录不是对象", slot=index))
+            continue
+        filepath = record.get("filepath")
+        if not filepath or not isinstance(filepath, str):
+            issues.append(issue(ERROR, "missing_filepath", "贴图记录缺少filepath", slot=index))
+        elif check_files and not texture_exists(os.path.join(layout_dir, filepath)):
+            issues.append(issue(ERROR, "file_not_found", f"源贴图不存在: {filepath}", slot=index))
+        issues += check_maps(record.get("maps"), index, layout_dir, check_files)
+
+        bad = [key for key in ("position", "scale") if not is_vector(record.get(key, {}))]
+        bad += [key for key in ("rotation", "zIndex", "mesh_index")
+                if key in record and not is_number(record[key])]
+        if "visible" in record and not isinstance(record["visible"], bool):
+            bad.append("visible")
+        if bad:
+            issues.append(issue(ERROR, "schema", f"字段类型错误: {', '.join(bad)}", slot=index))
+            continue
+        valid.append(index)
+    return issues, valid
+
+def check_texture_size(data, width, height):
+    """
+    检查导出贴图尺寸与画布宽高比是否一致，返回(问题列表, 用于几何检查的贴图宽, 高)
+    Lod图集的贴图尺寸由Lod0导出贴图尺寸逐级减半，同样只要求宽高比一致
+    """
+    size = data.get("texture_size")
+    if size is None:
+        return [], width, height
+    if not isinstance(size, dict) or not is_number(size.get("width")) or not is_number(size.get("height")) \
+            or size["width"] <= 0 or size["height"] <= 0:
+        return [issue(ERROR, "schema", "texture_size缺少有效的width和height")], width, height
+
+    texture_width, texture_height = float(size["width"]), float(size["height"])
+    issues = []
+    # 逐级减半时奇数边向下取整，允许一个像素的误差
+    tolerance = max(width, height) * (1 + EPSILON)
+    if abs(texture_width * height - texture_height * width) > tolerance:
+        issues.append(issue(ERROR, "texture_size_mismatch",
+                            f"贴图尺寸{int(texture_width)}x{int(texture_height)}与画布"
+                            f"{int(width)}x{int(height)}的宽高比不一致"))
+    return issues, texture_width, texture_height
+
+def check_duplicates(records, indices):
+    """
+    检查重复的材质球名称和Mesh索引组合
+    """
+    keys = Counter()
+    first = {}
+    issues = []
+    for index in indices:
+        name = records[index].get("material_name")
+        if not name:
+            continue
+        key = (name, int(records[index].get("mesh_index", 0)))
+        keys[key] += 1
+        if keys[key] == 1:
+            first[key] = index
+        else:
+            issues.append(issue(ERROR, "duplicate_slot",
+                                f"材质球{key[0]}和Mesh索引{key[1]}重复", slot=index, other=first[key]))
+    return issues
+
+def overlapping_pairs(edges, block=512):
+    """
+    返回相交面积大于零的贴图对(i, j)列表，i < j
+    """
+    pairs = []
+    for start in range(0, len(edges), block):
+        a = edges[start:start + block, None, :]
+        b = edges[None, :, :]
+        hit = ((np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]) > EPSILON) &
+               (np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]) > EPSILON))
+        rows, cols = np.nonzero(hit)
+        rows = rows + start
+        keep = rows < cols
+        pairs.extend(zip(rows[keep].tolist(), cols[keep].tolist()))
+    return pairs
+
+def check_geometry(records, indices, texture_width, texture_height, max_mip, gutter):
+    """
+    检查可见贴图的越界、重叠和mip对齐
+    """
+    visible = [index for index in indices if records[index].get("visible", True)]
+    if not visible:
+        return []
+    slots = [records[index] for index in visible]
+    size = np.array([texture_width, texture_height])
+    edges = record_edges(slots, size)
+    issues = []
+
+    outside = ((edges[:, 0] < -EPSILON) | (edges[:, 1] < -EPSILON) |
+               (edges[:, 2] > texture_width + EPSILON) | (edges[:, 3] > texture_height + EPSILON))
+    for row in np.nonzero(outside)[0]:
+        issues.append(issue(ERROR, "out_of_bounds", "贴图超出画布范围", slot=visible[row]))
+    empty = (edges[:, 2] - edges[:, 0] <= EPSILON) | (edges[:, 3] - edges[:, 1] <= EPSILON)
+    for row in np.nonzero(empty)[0]:
+        issues.append(issue(WARNING, "empty_slot", "贴图的宽或高为0", slot=visible[row]))
+
+    for i, j in overlapping_pairs(edges):
+        issues.append(issue(ERROR, "overlap", "贴图相互重叠", slot=visible[i], other=visible[j]))
+
+    if max_mip >= 0:
+        for found in analyze_alignment(slots, size, max_mip, gutter)["issues"]:
+            details = {"slot": visible[found["index"]], "mip": found["mip"]}
+            if found["kind"] == ISSUE_MISALIGNED:
+                issues.append(issue(WARNING, "mip_misaligned",
+                                    f"边界在mip{found['mip']}未对齐到整像素: {', '.join(found['edges'])}",
+                                    edges=found["edges"], **details))
+            else:
+                issues.append(issue(WARNING, "mip_gutter",
+                                    f"与相邻贴图的间隙在mip{found['mip']}不足（Lod0间隙{found['gap']:.2f}像素）",
+                                    other=visible[found["other"]], **details))
+    return issues
+
+def read_json(path):
+    """
+    读取JSON文件，按BOM识别UTF-8、UTF-16编码（引擎导出的文件为带BOM的UTF-16），没有BOM时按UTF-8读取
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw.startswith(codecs.BOM_UTF8):
+        text = raw[len(codecs.BOM_UTF8):].decode("utf-8")
+    elif raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        text = raw.decode("utf-16")
+    else:
+        text = raw.decode("utf-8")
+    return json.loads(text)
+
+def is_engine_export(data):
+    """
+    是否为引擎导出的合并配置：每行带有MergeRules列表（可为单个对象或对象列表）
+    """
+    rows = data if isinstance(data, list) else [data]
+    return bool(rows) and all(isinstance(row, dict) and isinstance(row.get("MergeRules"), list) for row in rows)
+
+def is_engine_vector(value):
+    return isinstance(value, dict) and is_number(value.get("X")) and is_number(value.get("Y"))
+
+def engine_records(arrange):
+    """
+    把TextureArrange转换为布局贴图记录（SlotName对应材质球，MeshIndex对应Mesh索引），
+    返回(问题列表, 记录列表, 可继续检查的记录索引)
+    """
+    issues = []
+    records = []
+    valid = []
+    for index, entry in enumerate(arrange):
+        if not isinstance(entry, dict):
+            issues.append(issue(ERROR, "schema", "TextureArrange中的记录不是对象", slot=index))
+            records.append({})
+            continue
+        bad = [key for key in ("LeftTop", "ScaleXY") if not is_engine_vector(entry.get(key))]
+        if not is_number(entry.get("MeshIndex")):
+            bad.append("MeshIndex")
+        if not entry.get("SlotName") or not isinstance(entry.get("SlotName"), str):
+            bad.append("SlotName")
+        records.append({
+            "material_name": entry.get("SlotName"),
+            "mesh_index": entry.get("MeshIndex", 0),
+            "position": {"x": (entry.get("LeftTop") or {}).get("X", 0), "y": (entry.get("LeftTop") or {}).get("Y", 0)},
+            "scale": {"x": (entry.get("ScaleXY") or {}).get("X", 0), "y": (entry.get("ScaleXY") or {}).get("Y", 0)},
+        })
+        if bad:
+            issues.append(issue(ERROR, "schema", f"字段缺失或类型错误: {', '.join(bad)}", slot=index))
+            continue
+        valid.append(index)
+    return issues, records, valid
+
+def check_engine_group(group, max_mip, gutter):
+    """
+    检查一个MergedSlotGroup：TextureSize、SlotName和MeshIndex重复、越界、重叠和mip对齐
+    """
+    if not isinstance(group, dict) or not isinstance(group.get("TextureArrange"), list):
+        return [issue(ERROR, "schema", "MergedSlotGroup缺少TextureArrange列表")]
+    size = group.get("TextureSize")
+    if not is_number(size) or size <= 0 or int(size) != size:
+        return [issue(ERROR, "schema", "TextureSize应为正整数")]
+    issues = []
+    size = int(size)
+    if size & (size - 1):
+        issues.append(issue(WARNING, "texture_size_npot", f"贴图尺寸{size}不是2的幂"))
+    record_issues, records, indices = engine_records(group["TextureArrange"])
+    issues += record_issues
+    issues += check_duplicates(records, indices)
+    issues += check_geometry(records, indices, size, size, max_mip, gutter)
+    return issues
+
+def lint_engine_export(data, max_mip=4, gutter=0):
+    """
+    检查引擎导出的合并配置中的每个MergedSlotGroup，问题带有group字段指明所在位置
+    """
+    issues = []
+    rows = data if isinstance(data, list) else [data]
+    for row_index, row in enumerate(rows):
+        for rule_index, rule in enumerate(row["MergeRules"]):
+            groups = rule.get("MergedSlotGroup") if isinstance(rule, dict) else None
+            location = f"[{row_index}].MergeRules[{rule_index}]"
+            if not isinstance(groups, list):
+                issues.append(issue(ERROR, "schema", "MergeRules中的规则缺少MergedSlotGroup列表", group=location))
+                continue
+            for group_index, group in enumerate(groups):
+                group_location = f"{location}.MergedSlotGroup[{group_index}]"
+                for found in check_engine_group(group, max_mip, gutter):
+                    found["group"] = group_location
+                    issues.append(found)
+    return issues
+
+def lint_file(path, check_files=True, max_mip=4, gutter=0):
+    """
+    检查一个布局文件、导出记录或引擎导出的合并配置，返回{"path": 路径, "issues": 问题列表}
+    """
+    try:
+        data = read_json(path)
+    except (OSError, ValueError) as e:
+        return {"path": path, "issues": [issue(ERROR, "invalid_json", f"无法读取JSON: {e}")]}
+
+    if is_engine_export(data):
+        return {"path": path, "issues": lint_engine_export(data, max_mip, gutter)}
+    issues, width, height = check_schema(data)
+    if width is None:
+        return {"path": path, "issues": issues}
+    records = data["images"]
+    record_issues, indices = check_records(records, path, check_files)
+    size_issues, texture_width, texture_height = check_texture_size(data, width, height)
+    issues += record_issues + size_issues
+    issues += check_duplicates(records, indices)
+    issues += check_geometry(records, indices, texture_width, texture_height, max_mip, gutter)
+    return {"path": path, "issues": issues}
+
+def _lint_task(args):
+    return lint_file(*args)
+
+def find_files(paths, pattern="*.json"):
+    """
+    展开命令行中的文件和文件夹，文件夹递归查找匹配pattern的文件
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if fnmatch.fnmatch(name, pattern))
+        else:
+            files.append(path)
+    return files
+
+def lint_files(paths, jobs=None, check_files=True, max_mip=4, gutter=0):
+    """
+    并行检查一批文件，结果顺序与paths一致
+    """
+    tasks = [(path, check_files, max_mip, gutter) for path in paths]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(tasks) < 2:
+        return [_lint_task(task) for task in tasks]
+    chunksize = max(1, min(64, len(tasks) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_lint_task, tasks, chunksize=chunksize))
+
+def summarize(results):
+    counts = Counter(found["severity"] for result in results for found in result["issues"])
+    return {"files": len(results), "errors": counts[ERROR], "warnings": counts[WARNING]}
+
+def format_text(results):
+    lines = []
+    for result in results:
+        for found in result["issues"]:
+            location = result["path"]
+            if "group" in found:
+                location += found["group"]
+            if "slot" in found:
+                location += f":{found['slot']}"
+            lines.append(f"{location}: {found['severity']} [{found['code']}] {found['message']}")
+    return "\n".join(lines)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m core.layout_lint",
+                                     description="检查布局文件和导出记录")
+    parser.add_argument("paths", nargs="+", help="要检查的文件或文件夹")
+    parser.add_argument("--pattern", default="*.json", help="在文件夹中查找的文件名模式")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="并行进程数，默认为CPU核数")
+    parser.add_argument("--format", choices=("json", "text"), default="json", help="输出格式")
+    parser.add_argument("--max-mip", type=int, default=4, help="检查mip对齐的最高级别，-1表示不检查")
+    parser.add_argument("--gutter", type=float, default=0, help="各级mip下要求的最小间隙（像素）")
+    parser.add_argument("--no-check-files", action="store_true", help="不检查源贴图是否存在")
+    parser.add_argument("--strict", action="store_true", help="警告也视为错误")
+    parser.add_argument("--all", action="store_true", help="输出中包含没有问题的文件")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    paths = find_files(args.paths, args.pattern)
+    results = lint_files(paths, args.jobs, not args.no_check_files, args.max_mip, args.gutter)
+    summary = summarize(results)
+    shown = results if args.all else [result for result in results if result["issues"]]
+    if args.format == "json":
+        json.dump({"summary": summary, "results": shown}, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        text = format_text(shown)
+        if text:
+            print(text)
+        print(f"检查了 {summary['files']} 个文件：{summary['errors']} 个错误，{summary['warnings']} 个警告")
+    failed = summary["errors"] or (args.strict and summary["warnings"])
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
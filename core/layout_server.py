@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+SERVER_NAME = "VisualizationTexLayout"
+
+# JSON-RPC 2.0错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+class RpcError(Exception):
+    """
+    处理函数抛出此异常时，按指定错误码返回给客户端
+    """
+
+    def __init__(self, code, message, data=None):
+        super(RpcError, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+def error_response(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+class LayoutServer(QObject):
+    """
+    本地JSON-RPC 2.0服务，
+    通过本地套接字（Windows上为命名管道）与引擎脚本通信，每行一条JSON消息。
+    支持批量请求（JSON数组）和通知（不带id的请求不返回结果），
+    服务端可向所有客户端推送通知。处理函数在主线程中执行。
+    """
+
+    # 自定义信号
+    client_count_changed = pyqtSignal(int)  # 连接的客户端数量变化信号
+
+    def __init__(self, name=SERVER_NAME, parent=None):
+        super(LayoutServer, self).__init__(parent)
+        self.name = name
+        self.methods = {}
+        self.clients = []
+        self._buffers = {}
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def register(self, method, handler):
+        """
+        注册方法，handler接收params（对象形式时为关键字参数，数组形式时为位置参数）
+        """
+        self.methods[method] = handler
+
+    def start(self):
+        """
+        开始监听，返回是否成功
+        """
+        if self.server.isListening():
+            return True
+        # 清理上次异常退出残留的套接字文件
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def stop(self):
+        for socket in list(self.clients):
+            socket.disconnectFromServer()
+        self.server.close()
+
+    def is_running(self):
+        return self.server.isListening()
+
+    def full_server_name(self):
+        return self.server.fullServerName()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.clients.append(socket)
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self.on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.on_disconnected(socket))
+        self.client_count_changed.emit(len(self.clients))
+
+    def on_disconnected(self, socket):
+        if socket in self.clients:
+            self.clients.remove(socket)
+            self._buffers.pop(socket, None)
+            socket.deleteLater()
+            self.client_count_changed.emit(len(self.clients))
+
+    def on_ready_read(self, socket):
+        """
+        读取完整的行并逐条处理，一次读到的所有回复合并写出
+        """
+        data = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        lines = data.split(b"\n")
+        self._buffers[socket] = lines.pop()
+        replies = []
+        for line in lines:
+            if not line.strip():
+                continue
+            reply = self.handle_message(line)
+            if reply is not None:
+                replies.append(reply)
+        if replies:
+            self.write(socket, replies)
+
+    def write(self, socket, messages):
+        if socket.state() != QLocalSocket.ConnectedState:
+            return
+        socket.write(b"".join(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+                              for message in messages))
+        socket.flush()
+
+    def handle_message(self, line):
+        """
+        处理一行消息，返回要回复的对象（通知或全是通知的批量请求返回None）
+        """
+        try:
+            message = json.loads(line.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError) as e:
+            return error_response(None, PARSE_ERROR, "Parse error", str(e))
+        if isinstance(message, list):
+            if not message:
+                return error_response(None, INVALID_REQUEST, "Invalid Request")
+            replies = [self.handle_request(request) for request in message]
+            replies = [reply for reply in replies if reply is not None]
+            return replies or None
+        return self.handle_request(message)
+
+    def handle_request(self, request):
+        """
+        执行一条请求，返回回复对象，通知返回None
+        """
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" \
+                or not isinstance(request.get("method"), str):
+            return error_response(request.get("id") if isinstance(request, dict) else None,
+                                  INVALID_REQUEST, "Invalid Request")
+        is_notification = "id" not in request
+        request_id = request.get("id")
+        handler = self.methods.get(request["method"])
+        if handler is None:
+            if is_notification:
+                return None
+            return error_response(request_id, METHOD_NOT_FOUND, "Method not found", request["method"])
+
+        params = request.get("params", {})
+        try:
+            if isinstance(params, dict):
+                result = handler(**params)
+            elif isinstance(params, list):
+                result = handler(*params)
+            else:
+                raise RpcError(INVALID_PARAMS, "Invalid params")
+        except RpcError as e:
+            return None if is_notification else error_response(request_id, e.code, e.message, e.data)
+        except TypeError as e:
+            return None if is_notification else error_response(request_id, INVALID_PARAMS, "Invalid params", str(e))
+        except Exception as e:
+            return None if is_notification else error_response(request_id, INTERNAL_ERROR, "Internal error", str(e))
+        if is_notification:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def notify(self, method, params=None):
+        """
+        向所有客户端推送通知
+        """
+        if not self.clients:
+            return
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        for socket in self.clients:
+            self.write(socket, [message])
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from core.atlas_compositor import (visible_records, slot_rects, paste_slot, resize_rgba,
+                                   dirty_regions, save_rgba, SourceCache)
+from core.texture_hash import file_signature
+from core.build_cache import atlas_key
+from core.texture_maps import (BASE_MAP, MAP_LABELS, MAP_BACKGROUNDS, layout_channels,
+                               channel_records, record_maps)
+
+MAX_LOD = 5
+
+def downsample(rgba):
+    """
+    2x2盒式滤波把贴图缩小一半，奇数边复制最后一行/列
+    """
+    height, width = rgba.shape[:2]
+    if height <= 1 and width <= 1:
+        return rgba
+    data = rgba.astype(np.uint16)
+    if height > 1 and height % 2:
+        data = np.concatenate([data, data[-1:]], axis=0)
+    if width > 1 and width % 2:
+        data = np.concatenate([data, data[:, -1:]], axis=1)
+    if height == 1:
+        data = np.concatenate([data, data], axis=0)
+    if width == 1:
+        data = np.concatenate([data, data], axis=1)
+    total = data[0::2, 0::2] + data[1::2, 0::2] + data[0::2, 1::2] + data[1::2, 1::2]
+    return ((total + 2) >> 2).astype(np.uint8)
+
+class MipPyramid(object):
+    """
+    源贴图的降采样金字塔，
+    每一级都由上一级生成，按需延伸。
+    """
+
+    def __init__(self, rgba):
+        self.levels = [rgba]
+
+    def level(self, index):
+        while len(self.levels) <= index:
+            self.levels.append(downsample(self.levels[-1]))
+        return self.levels[index]
+
+    def level_for_size(self, width, height):
+        """
+        返回不小于目标尺寸的最小一级，避免从全分辨率直接缩放
+        """
+        base = self.levels[0]
+        ratio = min(base.shape[1] / max(width, 1), base.shape[0] / max(height, 1))
+        index = int(math.floor(math.log2(ratio))) if ratio > 1 else 0
+        return self.level(max(0, index))
+
+def lod_size(width, height, lod):
+    """
+    计算某级Lod的贴图尺寸
+    """
+    return max(1, int(width) >> lod), max(1, int(height) >> lod)
+
+def base_texture_size(layout_data, texture_size=None):
+    """
+    返回Lod0的导出贴图尺寸(宽, 高)
+    优先使用texture_size参数，其次是布局中的texture_size，最后是画布尺寸
+    """
+    if texture_size is None:
+        size = layout_data.get("texture_size") or layout_data.get("canvas", {})
+        return int(size.get("width", 1024)), int(size.get("height", 1024))
+    if isinstance(texture_size, (tuple, list)):
+        return int(texture_size[0]), int(texture_size[1])
+    return int(texture_size), int(texture_size)
+
+def atlas_file_name(basename, lod, channel=BASE_MAP):
+    """
+    某级Lod某个通道的图集文件名，基础色图集不加通道标记
+    """
+    if channel == BASE_MAP:
+        return f"{basename}_Lod{lod}.png"
+    return f"{basename}_{MAP_LABELS[channel]}_Lod{lod}.png"
+
+def lod_layout(layout_data, lod, width, height, rects, atlas_name, atlases=None, sources=None):
+    """
+    生成某级Lod的导出记录，贴图位置和缩放替换为像素对齐后的值
+    atlases为{通道: 图集文件名}，布局有多个通道时写入；
+    sources为{源贴图路径: (修改时间, 大小)}，写入后供下次增量生成比较
+    """
+    data = copy.deepcopy(layout_data)
+    data["lod"] = lod
+    data["texture_size"] = {"width": width, "height": height}
+    data["atlas"] = atlas_name
+    if atlases and len(atlases) > 1:
+        data["atlases"] = atlases
+    records = visible_records(data.get("images", []))
+    for record, rect in zip(records, rects):
+        x0, y0, x1, y1 = [int(value) for value in rect]
+        record["position"] = {"x": x0 / width, "y": y0 / height}
+        record["scale"] = {"x": (x1 - x0) / width, "y": (y1 - y0) / height}
+    data["images"] = records
+    if sources is not None:
+        data["sources"] = {path: list(signature) for path, signature in sources.items() if signature is not None}
+    return data
+
+def load_previous_lod(atlas_path, record_path, width, height):
+    """
+    读取上次生成的某级图集和导出记录，用于增量生成
+    返回(图集像素, 上次的贴图记录, 上次的源贴图签名{路径: (修改时间, 大小)})，
+    文件缺失、损坏、尺寸不一致或记录中没有源贴图签名时返回None
+    """
+    if not os.path.isfile(atlas_path) or not os.path.isfile(record_path):
+        return None
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        with Image.open(atlas_path) as image:
+            atlas = np.array(image.convert("RGBA"))
+    except (OSError, ValueError):
+        return None
+    if atlas.shape[:2] != (height, width) or not isinstance(previous.get("images"), list):
+        return None
+    if not isinstance(previous.get("sources"), dict):
+        return None
+    return atlas, previous["images"], {path: tuple(signature) for path, signature in previous["sources"].items()}
+
+def generate_lod_atlases(layout_data, output_dir, basename, lods=range(1, MAX_LOD + 1),
+                         resample="bilinear", max_workers=8, sources=None, incremental=False,
+                         cache=None, texture_size=None, changed=None):
+    """
+    由Lod0布局一次生成多级Lod的图集和导出记录
+    各源贴图只读取一次，所有Lod共享同一个逐级降采样的金字塔；
+    每一级的贴图矩形按该级尺寸重新对齐到像素。
+    贴图记录带有maps（法线、ORM等其他通道）时，各通道的图集在同一轮中并行生成，
+    共用每一级的贴图矩形，没有该通道贴图的贴图槽填充该通道的背景色。
+    sources为共享的SourceCache时，多次生成之间复用已读取的源贴图。
+    incremental为True时与上次生成的图集和导出记录比较，只重绘变化的图块，
+    只读取落在这些图块中的源贴图；源贴图的(修改时间, 大小)与导出记录中保存的不一致，
+    或路径在changed中（例如监视器上报的变化）时视为已修改。
+    cache为BuildCache时，图集按内容寻址缓存，命中时直接复制，导出记录总是重新写入。
+    texture_size为Lod0的导出贴图尺寸（边长或(宽, 高)），为None时使用布局中的texture_size，
+    布局中也没有时使用画布尺寸，各级Lod由它逐级减半。
+    返回每级Lod的(图集路径, 导出记录路径, 其他通道图集路径...)列表
+    """
+    base_width, base_height = base_texture_size(layout_data, texture_size)
+    records = visible_records(layout_data.get("images", []))
+    channels = layout_channels(records)
+    lods = sorted(lods)
+    os.makedirs(output_dir, exist_ok=True)
+    changed = set(changed or ())
+
+    # 读取像素之前记录源贴图签名，生成过程中被修改的贴图下次仍会重绘
+    signatures = {path: file_signature(path)
+                  for path in sorted(set(path for record in records for path in record_maps(record).values()))}
+
+    # 各通道的贴图记录及其在全部记录中的索引
+    slots = {channel: (np.array([index for index, record in enumerate(records)
+                                 if record_maps(record).get(channel)], dtype=np.int64),
+                       channel_records(records, channel))
+             for channel in channels}
+
+    # 规划每一级的每个通道：缓存命中时直接复制，没有可用的上次结果时整图生成，否则只重绘脏图块
+    plans = []
+    lod_rects = {}
+    hashes = {}
+    for lod in lods:
+        width, height = lod_size(base_width, base_height, lod)
+        # 贴图矩形每级只计算一次，所有通道共用
+        lod_rects[lod] = slot_rects(records, width, height)
+        for channel in channels:
+            indices, channel_slots = slots[channel]
+            atlas_name = atlas_file_name(basename, lod, channel)
+            plan = {
+                "lod": lod,
+                "channel": channel,
+                "width": width,
+                "height": height,
+                "records": channel_slots,
+                "rects": lod_rects[lod][indices],
+                "background": MAP_BACKGROUNDS[channel],
+                "atlas_name": atlas_name,
+                "atlas_path": os.path.join(output_dir, atlas_name),
+                "record_path": os.path.join(output_dir, f"{basename}_Lod{lod}.json"),
+                "key": None,
+                "cached": False,
+                "atlas": None,
+                "regions": None,
+                "hit": [],
+            }
+            plans.append(plan)
+            if cache is not None:
+                settings = {"resample": resample}
+                if channel != BASE_MAP:
+                    settings["map"] = channel
+                plan["key"] = atlas_key(channel_slots, width, height, lod, settings, hashes,
+                                        (base_width, base_height))
+                if cache.fetch(plan["key"], {"atlas.png": plan["atlas_path"]}):
+                    plan["cached"] = True
+                    continue
+            previous = (load_previous_lod(plan["atlas_path"], plan["record_path"], width, height)
+                        if incremental else None)
+            if previous is None:
+                plan["hit"] = list(range(len(channel_slots)))
+                continue
+            atlas, old_records, old_signatures = previous
+            invalidated = [path for path in set(record["filepath"] for record in channel_slots)
+                           if path in changed or signatures[path] is None
+                           or old_signatures.get(path) != signatures[path]]
+            regions = dirty_regions(channel_records(old_records, channel), channel_slots,
+                                    width, height, invalidated)
+            plan["atlas"] = atlas
+            plan["regions"] = regions
+            plan["hit"] = [index for index, (x0, y0, x1, y1) in enumerate(plan["rects"])
+                           if any(x0 < rx1 and x1 > rx0 and y0 < ry1 and y1 > ry0
+                                  for rx0, ry0, rx1, ry1 in regions)]
+
+    # 并行读取需要重绘的源贴图并建立金字塔，多个通道或Lod引用的同一文件只读取一次
+    if sources is None:
+        sources = SourceCache()
+    needed = set(plan["records"][index]["filepath"] for plan in plans for index in plan["hit"])
+    sources.preload(needed, max_workers)
+    pyramids = {path: MipPyramid(sources.get(path)) for path in needed}
+
+    def build(plan):
+        rects = plan["rects"]
+        slot_records = plan["records"]
+        atlas = plan["atlas"]
+        atlas_path = plan["atlas_path"]
+        if plan["cached"]:
+            # 已从缓存复制图集
+            pass
+        elif atlas is None:
+            atlas = np.empty((plan["height"], plan["width"], 4), dtype=np.uint8)
+            atlas[...] = plan["background"]
+            for index in plan["hit"]:
+                x0, y0, x1, y1 = rects[index]
+                source = pyramids[slot_records[index]["filepath"]].level_for_size(x1 - x0, y1 - y0)
+                paste_slot(atlas, source, rects[index], resample=resample)
+            save_rgba(atlas, atlas_path)
+        elif plan["regions"]:
+            # 每个贴图只缩放一次，再分别写入各个脏区域
+            scaled = {}
+            for index in plan["hit"]:
+                x0, y0, x1, y1 = rects[index]
+                if x1 > x0 and y1 > y0:
+                    source = pyramids[slot_records[index]["filepath"]].level_for_size(x1 - x0, y1 - y0)
+                    scaled[index] = resize_rgba(source, int(x1 - x0), int(y1 - y0), resample)
+            for region in plan["regions"]:
+                rx0, ry0, rx1, ry1 = region
+                atlas[ry0:ry1, rx0:rx1] = plan["background"]
+                for index in plan["hit"]:
+                    if index in scaled:
+                        paste_slot(atlas, scaled[index], rects[index], region, resample=resample)
+            save_rgba(atlas, atlas_path)
+        else:
+            # 像素没有变化，只更新修改时间
+            os.utime(atlas_path)
+        if plan["key"] is not None and not plan["cached"]:
+            cache.store(plan["key"], {"atlas.png": atlas_path})
+        return atlas_path
+
+    # 先按顺序生成各源贴图所需的金字塔级别，之后所有Lod和通道可并行合成
+    for plan in plans:
+        for index in plan["hit"]:
+            x0, y0, x1, y1 = plan["rects"][index]
+            pyramids[plan["records"][index]["filepath"]].level_for_size(x1 - x0, y1 - y0)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        atlas_paths = list(executor.map(build, plans))
+
+    # 每级Lod写入一份导出记录，列出各通道的图集
+    outputs = []
+    for start in range(0, len(plans), len(channels)):
+        lod_plans = plans[start:start + len(channels)]
+        lod = lod_plans[0]["lod"]
+        atlases = {plan["channel"]: plan["atlas_name"] for plan in lod_plans}
+        record_path = lod_plans[0]["record_path"]
+        with open(record_path, 'w') as f:
+            json.dump(lod_layout(layout_data, lod, lod_plans[0]["width"], lod_plans[0]["height"],
+                                 lod_rects[lod], atlases[BASE_MAP], atlases, signatures), f, indent=2)
+        outputs.append((atlas_paths[start], record_path) + tuple(atlas_paths[start + 1:start + len(channels)]))
+    if cache is not None:
+        cache.evict()
+    return outputs
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# 检查结果类型
+ISSUE_MISALIGNED = "misaligned"  # 边界未对齐到该级mip的像素
+ISSUE_GUTTER = "gutter"          # 与相邻贴图的间隙不足
+
+EDGE_NAMES = ("left", "top", "right", "bottom")
+
+def record_edges(records, texture_size):
+    """
+    将贴图记录的归一化位置和缩放转换为Lod0像素坐标下的边界
+    返回N x 4的浮点数组，每行为(left, top, right, bottom)
+    """
+    if not records:
+        return np.zeros((0, 4), dtype=np.float64)
+    values = np.array([[record.get("position", {}).get("x", 0.0),
+                        record.get("position", {}).get("y", 0.0),
+                        record.get("scale", {}).get("x", 0.0),
+                        record.get("scale", {}).get("y", 0.0)] for record in records],
+                      dtype=np.float64)
+    start = values[:, :2] * texture_size
+    return np.concatenate([start, start + values[:, 2:] * texture_size], axis=1)
+
+def texel_rects(edges, max_mip):
+    """
+    计算每个贴图在各级mip下的像素矩形
+    返回(max_mip + 1) x N x 4的浮点数组
+    """
+    scales = 2.0 ** np.arange(max_mip + 1)
+    return edges[None, :, :] / scales[:, None, None]
+
+def misaligned_edges(edges, max_mip, tolerance=1e-3):
+    """
+    检查各边在各级mip下是否落在整像素上
+    返回(max_mip + 1) x N x 4的布尔数组，True表示该边在该级未对齐
+    """
+    rects = texel_rects(edges, max_mip)
+    return np.abs(rects - np.rint(rects)) > tolerance
+
+def safe_mip_levels(misaligned):
+    """
+    每个贴图所有边都对齐的最高mip级别，Lod0都未对齐时为-1
+    """
+    bad = misaligned.any(axis=2)  # 级别 x 贴图
+    first_bad = np.where(bad.any(axis=0), bad.argmax(axis=0), bad.shape[0])
+    return first_bad - 1
+
+def neighbour_gaps(edges, block=512):
+    """
+    计算相邻贴图之间的间隙（Lod0像素）
+    只考虑在另一方向上投影重叠、彼此相对的贴图对，重叠的贴图对不计入。
+    返回(i, j, gap)的数组，i < j
+    """
+    count = len(edges)
+    pairs = []
+    for start in range(0, count, block):
+        a = edges[start:start + block, None, :]
+        b = edges[None, :, :]
+        # 两个方向上的间隙，负值表示投影重叠
+        gap_x = np.maximum(b[..., 0] - a[..., 2], a[..., 0] - b[..., 2])
+        gap_y = np.maximum(b[..., 1] - a[..., 3], a[..., 1] - b[..., 3])
+        facing_x = (gap_x >= 0) & (gap_y < 0)
+        facing_y = (gap_y >= 0) & (gap_x < 0)
+        gap = np.where(facing_x, gap_x, np.where(facing_y, gap_y, np.inf))
+        rows, cols = np.nonzero(np.isfinite(gap))
+        rows_global = rows + start
+        keep = rows_global < cols
+        pairs.append(np.stack([rows_global[keep], cols[keep], gap[rows[keep], cols[keep]]], axis=1))
+    if not pairs:
+        return np.zeros((0, 3))
+    return np.concatenate(pairs, axis=0)
+
+def analyze_alignment(records, texture_size, max_mip=4, gutter=0):
+    """
+    分析布局在各级mip下的对齐和间隙问题
+    gutter为各级mip下要求的最小间隙（该级像素），0表示允许贴图紧邻；
+    无论gutter为多少，不足该级一个像素的间隙都会被标记（两张贴图会共用同一像素）。
+    返回{"safe_mip": 每个贴图可安全使用的最高mip, "issues": 问题列表}
+    """
+    edges = record_edges(records, texture_size)
+    misaligned = misaligned_edges(edges, max_mip)
+    issues = []
+
+    # 未对齐的边，只报告每个贴图首个出问题的级别
+    bad = misaligned.any(axis=2)
+    for index in np.nonzero(bad.any(axis=0))[0]:
+        mip = int(bad[:, index].argmax())
+        names = [EDGE_NAMES[edge] for edge in np.nonzero(misaligned[mip, index])[0]]
+        issues.append({
+            "kind": ISSUE_MISALIGNED,
+            "index": int(index),
+            "mip": mip,
+            "edges": names,
+        })
+
+    # 间隙不足，所有贴图对和所有级别一起计算
+    gaps = neighbour_gaps(edges)
+    if len(gaps):
+        scales = 2.0 ** np.arange(max_mip + 1)
+        gap_levels = gaps[:, 2:3] / scales[None, :]  # 贴图对 x 级别
+        too_small = (gap_levels < gutter) | ((gap_levels > 1e-6) & (gap_levels < 1.0 - 1e-6))
+        for row in np.nonzero(too_small.any(axis=1))[0]:
+            mip = int(too_small[row].argmax())
+            issues.append({
+                "kind": ISSUE_GUTTER,
+                "index": int(gaps[row, 0]),
+                "other": int(gaps[row, 1]),
+                "mip": mip,
+                "gap": float(gaps[row, 2]),
+            })
+
+    return {"safe_mip": safe_mip_levels(misaligned).tolist(), "issues": issues}
+
+def snap_edges(edges, mip_level):
+    """
+    将边界吸附到2^mip_level像素的整数倍，尺寸至少保留一个单位
+    """
+    unit = float(2 ** mip_level)
+    snapped = np.rint(edges / unit) * unit
+    snapped[:, 2] = np.maximum(snapped[:, 2], snapped[:, 0] + unit)
+    snapped[:, 3] = np.maximum(snapped[:, 3], snapped[:, 1] + unit)
+    return snapped
+
+def snap_records(records, texture_size, mip_level):
+    """
+    计算吸附到mip安全边界后的归一化位置和缩放
+    返回与records顺序一致的[(x, y, scale_x, scale_y), ...]
+    """
+    snapped = snap_edges(record_edges(records, texture_size), mip_level) / float(texture_size)
+    return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in snapped.tolist()]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+DEFAULT_BUDGET_BYTES = 1024 * 1024 * 1024
+DEMOTED_MAX_SIZE = 256  # 降级后贴图的最长边（像素）
+
+def demoted_level(width, height, max_size=DEMOTED_MAX_SIZE):
+    """
+    返回使贴图最长边不超过max_size的mip级别
+    """
+    level = 0
+    longest = max(int(width), int(height))
+    while (longest >> level) > max_size:
+        level += 1
+    return level
+
+def level_bytes(width, height, level, bytes_per_pixel=4):
+    """
+    估算某级mip的像素数据大小
+    """
+    return max(1, int(width) >> level) * max(1, int(height) >> level) * bytes_per_pixel
+
+class PixelBudget(object):
+    """
+    贴图像素内存预算，
+    记录各贴图最近一次出现在视口中的时间，
+    超出预算时按最久未查看的顺序选出需要降级的贴图。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._clock = 0
+        self._last_viewed = {}  # 键 -> 最近查看的序号
+
+    def touch(self, keys):
+        """
+        标记一批贴图刚被查看
+        """
+        self._clock += 1
+        for key in keys:
+            self._last_viewed[key] = self._clock
+
+    def retain(self, keys):
+        """
+        只保留仍然存在的贴图的查看记录
+        """
+        keys = set(keys)
+        for key in [key for key in self._last_viewed if key not in keys]:
+            del self._last_viewed[key]
+
+    def last_viewed(self, keys):
+        """
+        返回一组贴图中最近一次被查看的序号
+        """
+        return max((self._last_viewed.get(key, 0) for key in keys), default=0)
+
+    def plan(self, entries, used_bytes):
+        """
+        选出需要降级的像素
+        entries为允许降级的像素[(使用它的贴图键元组, 当前字节数, 降级后字节数)]，
+        共享同一像素的贴图作为一组，只计一次字节数，按组内最近查看的时间排序。
+        used_bytes为所有贴图的总字节数。
+        按最久未查看的顺序降级，直到总量不超过预算，返回需要降级的键元组列表
+        """
+        total = used_bytes
+        victims = []
+        for key, current, demoted in sorted(entries, key=lambda entry: self.last_viewed(entry[0])):
+            if total <= self.max_bytes:
+                break
+            if demoted < current:
+                victims.append(key)
+                total -= current - demoted
+        return victims
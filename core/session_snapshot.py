@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QStandardPaths, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from core.texture_hash import file_signature
+
+SNAPSHOT_VERSION = 1
+
+def default_snapshot_dir():
+    """
+    返回会话快照的默认目录
+    """
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation)
+    return os.path.join(base or os.path.expanduser("~"), "VisualizationTexLayout", "session")
+
+def preview_name(filepath, signature):
+    """
+    低分辨率贴图的文件名，由源路径和源文件签名决定，源文件未变化时可直接复用
+    """
+    key = f"{filepath}|{signature[0]}|{signature[1]}".encode("utf-8")
+    return hashlib.blake2b(key, digest_size=16).hexdigest() + ".png"
+
+class SessionSnapshot(object):
+    """
+    会话快照，
+    保存关闭时的布局和视口中贴图的低分辨率像素，启动时不读取源贴图即可画出上次的布局。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, "session.json")
+        self.preview_dir = os.path.join(directory, "previews")
+
+    def save(self, layout_data, current_file=None, previews=None):
+        """
+        写入快照
+        previews为{路径: (QImage, 源宽, 源高, mip级别)}，源文件不存在的贴图不记录
+        """
+        previews = previews or {}
+        os.makedirs(self.preview_dir, exist_ok=True)
+        textures = {}
+        paths = set(record.get("filepath") for record in layout_data.get("images", []))
+        for filepath in sorted(path for path in paths if path):
+            signature = file_signature(filepath)
+            if signature is None:
+                continue
+            entry = {"signature": list(signature)}
+            if filepath in previews:
+                image, width, height, level = previews[filepath]
+                name = preview_name(filepath, signature)
+                target = os.path.join(self.preview_dir, name)
+                if not os.path.isfile(target) and image.save(target + ".tmp", "PNG"):
+                    os.replace(target + ".tmp", target)
+                if os.path.isfile(target):
+                    entry.update({"width": width, "height": height, "level": level, "preview": name})
+            textures[filepath] = entry
+
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "current_file": current_file,
+            "layout": layout_data,
+            "textures": textures,
+        }
+        with open(self.path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(self.path + ".tmp", self.path)
+
+        # 删除不再引用的低分辨率贴图
+        used = set(entry.get("preview") for entry in textures.values())
+        for name in os.listdir(self.preview_dir):
+            if name not in used:
+                try:
+                    os.remove(os.path.join(self.preview_dir, name))
+                except OSError:
+                    pass
+
+    def load(self):
+        """
+        读取快照，不存在、损坏或版本不一致时返回None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            return None
+        if not isinstance(data.get("layout"), dict) or not isinstance(data.get("textures"), dict):
+            return None
+        return data
+
+    def preview(self, snapshot, filepath):
+        """
+        返回快照中贴图的(QImage, 源宽, 源高, mip级别)，没有低分辨率像素时返回None
+        """
+        entry = snapshot["textures"].get(filepath)
+        if not entry or "preview" not in entry:
+            return None
+        image = QImage(os.path.join(self.preview_dir, entry["preview"]))
+        if image.isNull():
+            return None
+        return image, entry["width"], entry["height"], entry["level"]
+
+    def clear(self):
+        """
+        删除快照
+        """
+        shutil.rmtree(self.preview_dir, ignore_errors=True)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class _ValidateTask(QRunnable):
+    """
+    校验任务，在线程池中比较源贴图的签名
+    """
+
+    def __init__(self, validator, textures):
+        super(_ValidateTask, self).__init__()
+        self.validator = validator
+        self.textures = textures
+
+    def run(self):
+        stale = []
+        missing = []
+        for filepath, entry in self.textures.items():
+            signature = file_signature(filepath)
+            if signature is None:
+                missing.append(filepath)
+            elif list(signature) != entry.get("signature"):
+                stale.append(filepath)
+        self.validator.validated.emit(stale, missing)
+
+class SnapshotValidator(QObject):
+    """
+    在后台校验快照中的源贴图是否被修改或删除
+    """
+
+    # 自定义信号
+    validated = pyqtSignal(list, list)  # 校验完成信号，参数为已修改和已删除的贴图路径
+
+    def validate(self, snapshot):
+        # 保存快照时已不存在的贴图没有签名，同样需要校验
+        textures = dict((record.get("filepath"), {}) for record in snapshot["layout"].get("images", [])
+                        if record.get("filepath"))
+        textures.update(snapshot["textures"])
+        QThreadPool.globalInstance().start(_ValidateTask(self, textures))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from contextlib import contextmanager
+
+STARTUP_TARGET_MS = 300.0  # 冷启动到首帧的目标耗时
+
+class StartupProfile(object):
+    """
+    启动耗时统计，
+    按阶段记录导入和创建界面的耗时，未启用时不做任何记录。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = None
+        self.entries = []  # (名称, 开始毫秒, 耗时毫秒, 嵌套深度)，耗时为None表示时间点
+        self._depth = 0
+
+    def start(self, origin=None):
+        """
+        开始统计，origin为计时起点（time.perf_counter的值），默认为当前时间
+        """
+        self.enabled = True
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.entries = []
+
+    def elapsed(self):
+        return (time.perf_counter() - self.origin) * 1000.0
+
+    @contextmanager
+    def phase(self, name):
+        """
+        记录一个阶段的耗时，可以嵌套
+        """
+        if not self.enabled:
+            yield
+            return
+        entry = [name, self.elapsed(), None, self._depth]
+        self.entries.append(entry)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            entry[2] = self.elapsed() - entry[1]
+
+    def mark(self, name):
+        """
+        记录一个时间点
+        """
+        if self.enabled:
+            self.entries.append([name, self.elapsed(), None, self._depth])
+
+    def report(self, milestone="首帧"):
+        """
+        返回可读的统计报告，并与目标耗时比较milestone时间点
+        """
+        lines = ["启动耗时统计（毫秒）:"]
+        reached = None
+        for name, start, duration, depth in self.entries:
+            indent = "  " * (depth + 1)
+            if duration is None:
+                lines.append(f"{indent}@ {start:8.1f}  {name}")
+                if name == milestone and reached is None:
+                    reached = start
+            else:
+                lines.append(f"{indent}{duration:8.1f}  {name}")
+        if reached is not None:
+            verdict = "达标" if reached <= STARTUP_TARGET_MS else "超出目标"
+            lines.append(f"{milestone}: {reached:.1f} ms（目标 {STARTUP_TARGET_MS:.0f} ms，{verdict}）")
+        return "\n".join(lines)
+
+# 全局共享的启动耗时统计
+startup_profile = StartupProfile()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+
+class TextureCache(object):
+    """
+    贴图派生数据缓存，
+    保存各贴图的低级别mip和缩略图，按路径失效。
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()  # (路径, 类型, 参数) -> QPixmap
+
+    def mip(self, filepath, base_pixmap, level):
+        """
+        获取第level级mip（每级宽高减半），由上一级逐级生成
+        """
+        if level <= 0 or base_pixmap.isNull():
+            return base_pixmap
+        key = (filepath, "mip", level)
+        pixmap = self._get(key)
+        if pixmap is None:
+            parent = self.mip(filepath, base_pixmap, level - 1)
+            pixmap = parent.scaled(max(1, parent.width() // 2), max(1, parent.height() // 2),
+                                   Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self._put(key, pixmap)
+        return pixmap
+
+    def thumbnail(self, filepath, base_pixmap, size):
+        """
+        获取等比缩放到size以内的缩略图
+        """
+        key = (filepath, "thumbnail", size)
+        pixmap = self._get(key)
+        if pixmap is None:
+            if base_pixmap.isNull():
+                return base_pixmap
+            pixmap = base_pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self._put(key, pixmap)
+        return pixmap
+
+    def invalidate(self, filepath):
+        """
+        删除某个贴图的所有缓存
+        """
+        for key in [key for key in self._entries if key[0] == filepath]:
+            self.used_bytes -= self._pixmap_bytes(self._entries.pop(key))
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        self._entries.clear()
+        self.used_bytes = 0
+
+    def _get(self, key):
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def _put(self, key, pixmap):
+        self._entries[key] = pixmap
+        self.used_bytes += self._pixmap_bytes(pixmap)
+        # 超出上限时淘汰最久未使用的项
+        while self.used_bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.used_bytes -= self._pixmap_bytes(old)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+# 全局共享的贴图缓存
+texture_cache = TextureCache()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from core.image_loader import load_rgba
+from core.image_metadata import SUPPORTED_EXTENSIONS, read_image_info
+from core.texture_hash import compute_file_hash
+
+CATALOG_THUMBNAIL_SIZE = 96
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_directories_parent ON directories(parent);
+CREATE TABLE IF NOT EXISTS textures (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    width INTEGER,
+    height INTEGER,
+    channels INTEGER,
+    has_alpha INTEGER,
+    format TEXT,
+    content_hash TEXT,
+    thumbnail BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_textures_directory ON textures(directory);
+CREATE INDEX IF NOT EXISTS idx_textures_name ON textures(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_textures_hash ON textures(content_hash);
+CREATE INDEX IF NOT EXISTS idx_textures_size ON textures(width, height);
+"""
+
+def normalize_path(path):
+    """
+    统一路径格式，作为数据库中的键
+    """
+    return os.path.abspath(path).replace("\\", "/")
+
+def thumbnail_png(rgba, size=CATALOG_THUMBNAIL_SIZE):
+    """
+    生成PNG格式的缩略图数据
+    """
+    image = Image.fromarray(rgba, "RGBA")
+    image.thumbnail((size, size), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def index_texture(filepath):
+    """
+    读取一个贴图的目录信息，可在工作线程中调用
+    返回字段字典，读取失败时返回None
+    """
+    try:
+        stat = os.stat(filepath)
+        info = read_image_info(filepath)
+        content_hash = compute_file_hash(filepath)
+        thumbnail = thumbnail_png(load_rgba(filepath))
+    except (OSError, ValueError):
+        return None
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "width": info.width,
+        "height": info.height,
+        "channels": info.channels,
+        "has_alpha": int(info.has_alpha),
+        "format": info.format,
+        "content_hash": content_hash,
+        "thumbnail": thumbnail,
+    }
+
+class TextureCatalog(object):
+    """
+    贴图目录，
+    把贴图根目录下所有贴图的尺寸、通道、内容哈希和缩略图保存在本地SQLite数据库中。
+    重新扫描时只列出修改时间变化了的目录，只重新处理修改时间或大小变化了的文件。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            # 后台扫描使用单独的连接写入，WAL模式下界面线程的查询不会被阻塞
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    # ---- 根目录 ----
+
+    def roots(self):
+        return [row["path"] for row in self.connection.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, path):
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO roots(path) VALUES (?)", (normalize_path(path),))
+
+    def remove_root(self, path):
+        path = normalize_path(path)
+        with self.connection:
+            self.connection.execute("DELETE FROM roots WHERE path = ?", (path,))
+            self._forget_directory(path)
+
+    # ---- 扫描 ----
+
+    def rescan(self, full=False, max_workers=8):
+        """
+        增量扫描所有根目录
+        full为True时逐个检查所有文件（用于发现原地修改而目录未变化的文件）
+        返回{"directories": 列出的目录数, "indexed": 重新处理的文件数, "removed": 删除的文件数}
+        """
+        stats = {"directories": 0, "indexed": 0, "removed": 0}
+        changed_files = []
+        scanned_dirs = []
+        for root in self.roots():
+            self._collect_changes(root, None, full, changed_files, scanned_dirs, stats)
+
+        # 并行读取变化文件的信息，写入在当前线程中进行
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(index_texture, changed_files))
+        with self.connection:
+            for path, fields in zip(changed_files, results):
+                if fields is None:
+                    self.connection.execute("DELETE FROM textures WHERE path = ?", (path,))
+                    continue
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO textures(path, directory, name, mtime_ns, size, width, height, "
+                    "channels, has_alpha, format, content_hash, thumbnail) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, os.path.dirname(path), os.path.splitext(os.path.basename(path))[0],
+                     fields["mtime_ns"], fields["size"], fields["width"], fields["height"],
+                     fields["channels"], fields["has_alpha"], fields["format"],
+                     fields["content_hash"], fields["thumbnail"]))
+                stats["indexed"] += 1
+            # 文件全部写入后才记录目录修改时间，扫描中断时下次会重新列出这些目录
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO directories(path, parent, mtime_ns) VALUES (?, ?, ?)",
+                scanned_dirs)
+        return stats
+
+    def _collect_changes(self, directory, parent, full, changed_files, scanned_dirs, stats):
+        """
+        检查一个目录，修改时间未变化时只递归已知的子目录
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            with self.connection:
+                stats["removed"] += self._forget_directory(directory)
+            return
+
+        row = self.connection.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (directory,)).fetchone()
+        if row is not None and row["mtime_ns"] == mtime_ns and not full:
+            for child in self.connection.execute(
+                    "SELECT path FROM directories WHERE parent = ?", (directory,)).fetchall():
+                self._collect_changes(child["path"], directory, full, changed_files, scanned_dirs, stats)
+            return
+
+        # 目录内容有变化：列出目录，比较文件的修改时间和大小
+        stats["directories"] += 1
+        known = {row["path"]: (row["mtime_ns"], row["size"]) for row in self.connection.execute(
+            "SELECT path, mtime_ns, size FROM textures WHERE directory = ?", (directory,))}
+        known_dirs = set(row["path"] for row in self.connection.execute(
+            "SELECT path FROM directories WHERE parent = ?", (directory,)))
+        seen = set()
+        subdirs = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            entries = []
+        for entry in entries:
+            path = normalize_path(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(path)
+            elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                seen.add(path)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                    changed_files.append(path)
+
+        with self.connection:
+            for path in set(known) - seen:
+                self.connection.execute("DELETE FROM textures WHERE path = ?", (path,))
+                stats["removed"] += 1
+            for path in known_dirs - set(subdirs):
+                stats["removed"] += self._forget_directory(path)
+        scanned_dirs.append((directory, parent, mtime_ns))
+
+        for path in sorted(subdirs):
+            self._collect_changes(path, directory, full, changed_files, scanned_dirs, stats)
+
+    def _forget_directory(self, directory):
+        """
+        删除目录及其子目录的所有记录，返回删除的贴图数
+        """
+        prefix = directory.rstrip("/") + "/"
+        pattern = prefix.replace("%", r"\%").replace("_", r"\_") + "%"
+        removed = self.connection.execute(
+            "DELETE FROM textures WHERE directory = ? OR directory LIKE ? ESCAPE '\\'",
+            (directory, pattern)).rowcount
+        self.connection.execute(
+            "DELETE FROM directories WHERE path = ? OR path LIKE ? ESCAPE '\\'", (directory, pattern))
+        return removed
+
+    # ---- 查询 ----
+
+    def has_directory(self, directory):
+        return self.connection.execute(
+            "SELECT 1 FROM directories WHERE path = ?", (normalize_path(directory),)).fetchone() is not None
+
+    def is_current(self, directory):
+        """
+        目录已被收录且修改时间与记录一致时返回True，目录有增删文件时返回False
+        """
+        directory = normalize_path(directory)
+        row = self.connection.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (directory,)).fetchone()
+        if row is None:
+            return False
+        try:
+            return os.stat(directory).st_mtime_ns == row["mtime_ns"]
+        except OSError:
+            return False
+
+    def in_roots(self, directory):
+        """
+        目录位于某个贴图根目录下时返回True
+        """
+        directory = normalize_path(directory)
+        return any(directory == root or directory.startswith(root.rstrip("/") + "/") for root in self.roots())
+
+    def query(self, directory=None, name=None, min_size=0, max_size=None, limit=None):
+        """
+        按目录、名称（包含，不区分大小写）和长边尺寸查询贴图，不返回缩略图数据
+        """
+        clauses = []
+        params = []
+        if directory is not None:
+            clauses.append("directory = ?")
+            params.append(normalize_path(directory))
+        if name:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append("%" + name.replace("%", r"\%").replace("_", r"\_") + "%")
+        if min_size:
+            clauses.append("MAX(width, height) >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("MAX(width, height) <= ?")
+            params.append(max_size)
+        sql = ("SELECT path, name, mtime_ns, size, width, height, channels, has_alpha, format, content_hash "
+               "FROM textures")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def info(self, filepath):
+        row = self.connection.execute(
+            "SELECT path, name, mtime_ns, size, width, height, channels, has_alpha, format, content_hash "
+            "FROM textures WHERE path = ?", (normalize_path(filepath),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def thumbnail(self, filepath):
+        """
+        返回缩略图的PNG数据，没有记录时返回None
+        """
+        row = self.connection.execute(
+            "SELECT thumbnail FROM textures WHERE path = ?", (normalize_path(filepath),)).fetchone()
+        return bytes(row["thumbnail"]) if row is not None and row["thumbnail"] is not None else None
+
+    def known_hashes(self):
+        """
+        返回所有贴图的(路径, (修改时间, 大小), 内容哈希)
+        """
+        return [(row["path"], (row["mtime_ns"], row["size"]), row["content_hash"])
+                for row in self.connection.execute(
+                    "SELECT path, mtime_ns, size, content_hash FROM textures WHERE content_hash IS NOT NULL")]
+
+    def paths_with_hash(self, content_hash):
+        return [row["path"] for row in self.connection.execute(
+            "SELECT path FROM textures WHERE content_hash = ? ORDER BY path", (content_hash,))]
+
+    def duplicates(self):
+        """
+        返回内容完全相同的贴图分组
+        """
+        rows = self.connection.execute(
+            "SELECT content_hash, GROUP_CONCAT(path, '\n') AS paths FROM textures "
+            "WHERE content_hash IS NOT NULL GROUP BY content_hash HAVING COUNT(*) > 1")
+        return [sorted(row["paths"].split("\n")) for row in rows]
+
+    def resolve(self, filepath):
+        """
+        解析失效的贴图路径：文件存在时原样返回，
+        否则在目录中查找同名文件，优先选择与原路径目录名最接近的一个，找不到时返回None
+        """
+        if os.path.exists(filepath):
+            return filepath
+        basename = os.path.basename(filepath.replace("\\", "/"))
+        name = os.path.splitext(basename)[0]
+        candidates = [row["path"] for row in self.connection.execute(
+            "SELECT path FROM textures WHERE name = ? COLLATE NOCASE", (name,))
+            if os.path.basename(row["path"]).lower() == basename.lower()]
+        candidates = [path for path in candidates if os.path.exists(path)]
+        if not candidates:
+            return None
+        wanted = filepath.replace("\\", "/").lower().split("/")[:-1]
+
+        def common_suffix(path):
+            parts = path.lower().split("/")[:-1]
+            count = 0
+            while count < min(len(parts), len(wanted)) and parts[-1 - count] == wanted[-1 - count]:
+                count += 1
+            return count
+
+        return max(candidates, key=common_suffix)
+
+class _RescanTask(QRunnable):
+    """
+    扫描任务，在线程池中使用单独的数据库连接扫描贴图库
+    """
+
+    def __init__(self, scanner, full):
+        super(_RescanTask, self).__init__()
+        self.scanner = scanner
+        self.full = full
+
+    def run(self):
+        try:
+            catalog = TextureCatalog(self.scanner.db_path)
+            try:
+                stats = catalog.rescan(full=self.full)
+            finally:
+                catalog.close()
+        except Exception as e:
+            self.scanner.failed.emit(str(e))
+            return
+        self.scanner.finished.emit(stats)
+
+class CatalogScanner(QObject):
+    """
+    在后台扫描贴图库，同一时间只运行一次扫描，扫描期间的请求在完成后合并执行
+    """
+
+    # 自定义信号
+    finished = pyqtSignal(dict)  # 扫描完成信号，参数为扫描统计
+    failed = pyqtSignal(str)  # 扫描失败信号，参数为错误信息
+
+    def __init__(self, db_path, parent=None):
+        super(CatalogScanner, self).__init__(parent)
+        self.db_path = db_path
+        self.running = False
+        self._pending = None  # 扫描期间再次请求时记录是否需要完整扫描
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self.finished.connect(self._on_done)
+        self.failed.connect(self._on_done)
+
+    def rescan(self, full=False):
+        if self.running:
+            self._pending = bool(self._pending) or full
+            return
+        self.running = True
+        self._pool.start(_RescanTask(self, full))
+
+    def _on_done(self, *args):
+        self.running = False
+        if self._pending is not None:
+            full, self._pending = self._pending, None
+            self.rescan(full)
+
+    def shutdown(self):
+        self._pending = None
+        self._pool.waitForDone()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from core.image_loader import load_rgba
+
+CHUNK_SIZE = 1 << 20
+PHASH_SIZE = 8  # dHash为PHASH_SIZE x PHASH_SIZE位
+COLOR_SIZE = 4  # 颜色签名为COLOR_SIZE x COLOR_SIZE的RGB
+SIMILARITY_BLOCK = 64  # 分块比较感知哈希时每块的行数，限制临时数组的大小
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+_cache = {}  # 路径 -> ((修改时间, 大小), 哈希)
+_perceptual = {}  # 内容哈希 -> 感知哈希
+_lock = threading.Lock()
+
+def file_signature(filepath):
+    """
+    返回文件的(修改时间, 大小)，文件不存在时返回None
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def compute_file_hash(filepath):
+    """
+    计算文件内容哈希（BLAKE2b，128位十六进制）
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_hash(filepath):
+    """
+    获取文件内容哈希，文件未修改时直接返回缓存结果
+    """
+    filepath = os.path.abspath(filepath)
+    signature = file_signature(filepath)
+    if signature is None:
+        raise OSError(f"文件不存在: {filepath}")
+    with _lock:
+        cached = _cache.get(filepath)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    value = compute_file_hash(filepath)
+    with _lock:
+        _cache[filepath] = (signature, value)
+    return value
+
+def cached_file_hash(filepath):
+    """
+    只查询缓存，文件未计算过哈希或已被修改时返回None
+    """
+    filepath = os.path.abspath(filepath)
+    with _lock:
+        cached = _cache.get(filepath)
+    if cached is not None and cached[0] == file_signature(filepath):
+        return cached[1]
+    return None
+
+def remember_hash(filepath, signature, value):
+    """
+    记录已知的文件内容哈希（例如贴图目录中保存的结果），签名一致时不再重新计算
+    """
+    with _lock:
+        _cache[os.path.abspath(filepath)] = (tuple(signature), value)
+
+def compute_perceptual_hash(rgba):
+    """
+    计算感知哈希
+    返回(dHash, 颜色签名)：贴图按alpha预乘后转为灰度并缩小到(N+1) x N，
+    比较水平相邻像素得到N x N位的dHash；颜色签名为缩小到4 x 4的RGB，
+    用于区分结构相同但颜色不同的贴图
+    """
+    rgb = rgba[..., :3].astype(np.float32) * (rgba[..., 3:4].astype(np.float32) / 255.0)
+    image = Image.fromarray(rgb.astype(np.uint8), "RGB")
+    small = image.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    colors = np.asarray(image.resize((COLOR_SIZE, COLOR_SIZE), Image.BOX), dtype=np.uint8)
+    return int(np.packbits(bits).view(">u8")[0]), colors.tobytes()
+
+def perceptual_hash(filepath):
+    """
+    获取贴图的感知哈希，按内容哈希缓存，内容相同的文件只解码一次
+    """
+    digest = file_hash(filepath)
+    with _lock:
+        value = _perceptual.get(digest)
+    if value is None:
+        value = compute_perceptual_hash(load_rgba(filepath))
+        with _lock:
+            _perceptual[digest] = value
+    return value
+
+def cached_perceptual_hash(filepath):
+    """
+    只查询缓存，贴图未计算过感知哈希或已被修改时返回None
+    """
+    digest = cached_file_hash(filepath)
+    if digest is None:
+        return None
+    with _lock:
+        return _perceptual.get(digest)
+
+def fingerprint(filepath, perceptual=True):
+    """
+    返回贴图的(内容哈希, 感知哈希)，perceptual为False时不解码贴图，感知哈希为None；
+    读取失败时返回None
+    """
+    try:
+        return file_hash(filepath), perceptual_hash(filepath) if perceptual else None
+    except (OSError, ValueError):
+        return None
+
+def fingerprints(filepaths, perceptual=True, max_workers=8):
+    """
+    并行计算一批贴图的指纹，返回{路径: (内容哈希, 感知哈希)}，读取失败的贴图不包含在结果中
+    """
+    filepaths = list(dict.fromkeys(filepaths))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda path: fingerprint(path, perceptual), filepaths))
+    return {path: result for path, result in zip(filepaths, results) if result is not None}
+
+def similarity_block(query, candidates, max_distance=4, max_color_diff=8):
+    """
+    计算一块感知哈希与候选感知哈希之间是否相似，返回len(query) x len(candidates)的布尔数组
+    dHash汉明距离不超过max_distance且颜色签名平均差不超过max_color_diff时视为相似
+    """
+    def split(hashes):
+        values = np.array([value[0] for value in hashes], dtype=np.uint64)
+        colors = np.array([np.frombuffer(value[1], dtype=np.uint8) for value in hashes], dtype=np.int16)
+        return values, colors
+
+    query_values, query_colors = split(query)
+    values, colors = split(candidates)
+    diff = query_values[:, None] ^ values[None, :]
+    distance = _POPCOUNT[diff.view(np.uint8).reshape(len(query), len(candidates), 8)].sum(axis=2)
+    color_diff = np.abs(query_colors[:, None, :] - colors[None, :, :]).mean(axis=2)
+    return (distance <= max_distance) & (color_diff <= max_color_diff)
+
+def find_duplicates(filepaths, perceptual=True, max_distance=4, max_color_diff=8, max_workers=8,
+                    new_paths=None):
+    """
+    查找重复贴图
+    内容哈希相同的为完全重复，感知哈希相似的为相似贴图（perceptual为False时只查找完全重复）。
+    new_paths不为None时只计算这些贴图的感知哈希（其余贴图只使用已缓存的感知哈希），
+    只把它们与其他贴图比较，并只返回涉及它们的分组。
+    感知哈希分块比较，内存占用与贴图数量成线性关系。
+    返回分组列表，每组为{"paths": [...], "exact": 是否完全重复}，
+    每组第一个路径为输入中最先出现的路径
+    """
+    paths = list(dict.fromkeys(filepaths))
+    if new_paths is None:
+        prints = fingerprints(paths, perceptual, max_workers)
+    else:
+        new_paths = set(new_paths)
+        prints = fingerprints([path for path in paths if path in new_paths], perceptual, max_workers)
+        # 已有贴图的内容哈希通常已缓存，感知哈希不为比较而解码
+        existing = fingerprints([path for path in paths if path not in new_paths], False, max_workers)
+        prints.update((path, (digest, cached_perceptual_hash(path) if perceptual else None))
+                      for path, (digest, _) in existing.items())
+    paths = [path for path in paths if path in prints]
+
+    def involved(group):
+        return new_paths is None or not new_paths.isdisjoint(group)
+
+    # 完全重复：按内容哈希分组
+    by_content = {}
+    for path in paths:
+        by_content.setdefault(prints[path][0], []).append(path)
+    groups = [{"paths": group, "exact": True} for group in by_content.values()
+              if len(group) > 1 and involved(group)]
+
+    # 相似：每种内容取一个代表，与之前最先出现的相似代表归为一组（不做传递合并）
+    representatives = [group[0] for group in by_content.values() if prints[group[0]][1] is not None]
+    if perceptual and len(representatives) > 1:
+        hashes = [prints[path][1] for path in representatives]
+        queries = [index for index, path in enumerate(representatives)
+                   if involved(by_content[prints[path][0]])]
+        owner = list(range(len(representatives)))
+        for start in range(0, len(queries), SIMILARITY_BLOCK):
+            block = queries[start:start + SIMILARITY_BLOCK]
+            similar = similarity_block([hashes[j] for j in block], hashes, max_distance, max_color_diff)
+            for row, j in enumerate(block):
+                for i in np.flatnonzero(similar[row, :j]):
+                    if owner[i] == i:
+                        owner[j] = int(i)
+                        break
+        clusters = {}
+        for index, path in enumerate(representatives):
+            clusters.setdefault(owner[index], []).extend(by_content[prints[path][0]])
+        groups.extend({"paths": cluster, "exact": False}
+                      for cluster in clusters.values()
+                      if len(set(prints[path][0] for path in cluster)) > 1 and involved(cluster))
+    return groups
+
+def clear_cache():
+    """
+    清空哈希缓存
+    """
+    with _lock:
+        _cache.clear()
+        _perceptual.clear()
+
+class _DuplicateTask(QRunnable):
+    """
+    查重任务，在线程池中计算指纹并分组
+    """
+
+    def __init__(self, checker, filepaths, new_paths, perceptual):
+        super(_DuplicateTask, self).__init__()
+        self.checker = checker
+        self.filepaths = filepaths
+        self.new_paths = new_paths
+        self.perceptual = perceptual
+
+    def run(self):
+        try:
+            groups = find_duplicates(self.filepaths, self.perceptual, new_paths=self.new_paths)
+        except Exception:
+            groups = []
+        self.checker.finished.emit(groups, self.new_paths)
+
+class DuplicateChecker(QObject):
+    """
+    在后台查找重复贴图，完成后发出信号
+    """
+
+    # 自定义信号
+    finished = pyqtSignal(list, object)  # 查重完成信号，参数为分组列表和本次检查的新贴图（None表示全部）
+
+    def check(self, filepaths, new_paths=None, perceptual=True):
+        new_paths = set(new_paths) if new_paths is not None else None
+        QThreadPool.globalInstance().start(_DuplicateTask(self, list(filepaths), new_paths, perceptual))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+from core.image_metadata import SUPPORTED_EXTENSIONS
+
+# 贴图通道，filepath保存基础色，其余通道保存在记录的maps字段中
+BASE_MAP = "basecolor"
+MAP_CHANNELS = (BASE_MAP, "normal", "orm")
+
+# 文件名后缀（不区分大小写，以_或-与主体分隔）到通道的对应关系
+MAP_SUFFIXES = {
+    BASE_MAP: ("basecolor", "base_color", "albedo", "diffuse", "color", "bc"),
+    "normal": ("normal", "nrm"),
+    "orm": ("orm", "occlusionroughnessmetallic"),
+}
+
+# 单字母后缀容易与普通文件名冲突（如Icon_N），只在同一主体有明确后缀的基础色贴图时才识别
+SHORT_MAP_SUFFIXES = {
+    BASE_MAP: ("d",),
+    "normal": ("n",),
+}
+
+# 图集文件名中的通道标记，基础色图集不加标记以兼容旧的文件名
+MAP_LABELS = {"normal": "Normal", "orm": "ORM"}
+
+# 图集背景色，没有该通道贴图的贴图槽也使用背景色：平直法线、无遮蔽全粗糙非金属
+MAP_BACKGROUNDS = {
+    BASE_MAP: (0, 0, 0, 0),
+    "normal": (128, 128, 255, 255),
+    "orm": (255, 255, 0, 255),
+}
+
+def split_map_suffix(filepath, short=False):
+    """
+    拆分贴图文件名中的通道后缀，short为True时只识别单字母后缀
+    返回(不含后缀和扩展名的路径, 通道)，没有可识别的后缀时通道为None
+    """
+    stem = os.path.splitext(filepath)[0]
+    folder, name = os.path.split(stem)
+    lowered = name.lower()
+    suffixes = SHORT_MAP_SUFFIXES if short else MAP_SUFFIXES
+    for channel in MAP_CHANNELS:
+        for suffix in suffixes.get(channel, ()):
+            for separator in ("_", "-"):
+                tail = separator + suffix
+                if lowered.endswith(tail) and len(lowered) > len(tail):
+                    return os.path.join(folder, name[:-len(tail)]), channel
+    return stem, None
+
+class _FolderIndex(object):
+    """
+    按文件夹缓存贴图的通道划分，同一文件夹只列出一次，文件夹修改后重新列出
+    """
+
+    def __init__(self):
+        self._folders = {}  # 文件夹 -> (修改时间, {(主体, 通道, 是否单字母后缀): 路径})
+        self._lock = threading.Lock()
+
+    def channels(self, folder):
+        try:
+            mtime = os.stat(folder or ".").st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            cached = self._folders.get(folder)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        index = {}
+        try:
+            names = sorted(os.listdir(folder or "."))
+        except OSError:
+            names = []
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            stem, channel = split_map_suffix(name)
+            short = channel is None
+            if short:
+                stem, channel = split_map_suffix(name, short=True)
+                if channel is None:
+                    continue
+            index.setdefault((stem.lower(), channel, short), os.path.join(folder, name))
+        with self._lock:
+            self._folders[folder] = (mtime, index)
+        return index
+
+_folder_index = _FolderIndex()
+
+def discover_maps(filepath):
+    """
+    按文件名后缀查找与贴图同一文件夹、同一主体名的其他通道贴图
+    filepath本身视为基础色，返回{通道: 路径}，不包含基础色。
+    单字母后缀的通道贴图只在filepath带有明确的基础色后缀时才会被找到
+    """
+    stem, channel = split_map_suffix(filepath)
+    explicit = channel == BASE_MAP
+    folder, name = os.path.split(stem)
+    index = _folder_index.channels(folder)
+    maps = {}
+    for channel in MAP_CHANNELS[1:]:
+        path = index.get((name.lower(), channel, False))
+        if path is None and explicit:
+            path = index.get((name.lower(), channel, True))
+        if path is not None and os.path.normcase(path) != os.path.normcase(filepath):
+            maps[channel] = path
+    return maps
+
+def group_map_files(filepaths):
+    """
+    把同一主体名的各通道贴图归为一个贴图槽
+    有基础色（或无后缀）贴图的主体只保留基础色，其余通道并入其maps；
+    没有基础色的通道贴图，以及同一主体同一通道的第二个文件，仍单独作为贴图槽。
+    单字母后缀只在同一主体有明确后缀的基础色贴图时才识别。
+    返回(贴图槽路径列表，保持原顺序, {基础色路径: {通道: 路径}})
+    """
+    parsed = []
+    explicit = set()  # 有明确后缀的基础色贴图的主体
+    for path in filepaths:
+        stem, channel = split_map_suffix(path)
+        parsed.append((path, stem.lower(), channel))
+        if channel == BASE_MAP:
+            explicit.add(stem.lower())
+
+    # 单字母后缀的文件排在后面，同一通道优先使用明确后缀的文件
+    entries = []
+    for path, key, channel in parsed:
+        if channel is None:
+            stem, short_channel = split_map_suffix(path, short=True)
+            if short_channel is not None and stem.lower() in explicit:
+                entries.append((1, path, stem.lower(), short_channel))
+                continue
+        entries.append((0, path, key, channel or BASE_MAP))
+    groups = {}  # 主体 -> {通道: 路径}，每个通道只取一个文件
+    for _, path, key, channel in sorted(entries, key=lambda entry: entry[0]):
+        groups.setdefault(key, {}).setdefault(channel, path)
+
+    maps = {}
+    merged = set()
+    for group in groups.values():
+        primary = group.pop(BASE_MAP, None)
+        if primary is None:
+            continue
+        maps[primary] = group
+        merged.update(group.values())
+    return [path for path in filepaths if path not in merged], maps
+
+def record_maps(record):
+    """
+    返回贴图记录的所有通道{通道: 路径}，包含基础色
+    """
+    maps = {BASE_MAP: record.get("filepath")}
+    maps.update((channel, path) for channel, path in (record.get("maps") or {}).items() if path)
+    return maps
+
+def layout_channels(records):
+    """
+    返回布局中出现的通道，按MAP_CHANNELS的顺序，基础色总在第一个
+    """
+    used = set(channel for record in records for channel in (record.get("maps") or {}))
+    return [BASE_MAP] + [channel for channel in MAP_CHANNELS[1:] if channel in used]
+
+def channel_records(records, channel):
+    """
+    返回某一通道的贴图记录，filepath替换为该通道的贴图，没有该通道的记录被去掉
+    """
+    if channel == BASE_MAP:
+        return list(records)
+    result = []
+    for record in records:
+        path = (record.get("maps") or {}).get(channel)
+        if path:
+            result.append(dict(record, filepath=path))
+    return result
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+class TextureWatcher(QObject):
+    """
+    贴图文件监视器，
+    基于系统文件通知（不轮询）监视被引用的贴图文件及其所在目录，
+    变化经过防抖合并后一次性发出。
+    """
+
+    # 自定义信号
+    textures_changed = pyqtSignal(list)  # 贴图内容变化信号，参数为变化的文件路径列表
+
+    def __init__(self, debounce_ms=300, parent=None):
+        super(TextureWatcher, self).__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._signatures = {}   # 路径 -> (修改时间, 大小)
+        self._dir_files = {}    # 目录 -> 该目录下被监视的文件集合
+        self._pending = set()
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self._flush)
+
+    def set_paths(self, filepaths):
+        """
+        设置需要监视的贴图路径集合，只增删有变化的部分
+        """
+        wanted = set(os.path.abspath(path) for path in filepaths if path)
+        current = set(self._signatures)
+
+        removed = current - wanted
+        if removed:
+            watched = set(self._watcher.files())
+            stale = [path for path in removed if path in watched]
+            if stale:
+                self._watcher.removePaths(stale)
+            for path in removed:
+                del self._signatures[path]
+                directory = os.path.dirname(path)
+                files = self._dir_files.get(directory)
+                if files is not None:
+                    files.discard(path)
+                    if not files:
+                        del self._dir_files[directory]
+                        self._watcher.removePath(directory)
+
+        added = [path for path in wanted - current if os.path.exists(path)]
+        new_dirs = []
+        for path in added:
+            self._signatures[path] = self._signature(path)
+            directory = os.path.dirname(path)
+            if directory not in self._dir_files:
+                self._dir_files[directory] = set()
+                new_dirs.append(directory)
+            self._dir_files[directory].add(path)
+        if added:
+            self._watcher.addPaths(added)
+        # 监视目录，用于发现“写临时文件再替换”式的保存
+        if new_dirs:
+            self._watcher.addPaths(new_dirs)
+
+    def watched_count(self):
+        """
+        返回被监视的贴图数量
+        """
+        return len(self._signatures)
+
+    def _on_file_changed(self, path):
+        self._pending.add(os.path.abspath(path))
+        self._debounce_timer.start()
+
+    def _on_directory_changed(self, directory):
+        self._pending.update(self._dir_files.get(os.path.abspath(directory), ()))
+        self._debounce_timer.start()
+
+    def _flush(self):
+        """
+        防抖结束后比较文件签名，只上报真正发生变化的贴图
+        """
+        changed = []
+        watched = set(self._watcher.files())
+        for path in self._pending:
+            if path not in self._signatures:
+                continue
+            signature = self._signature(path)
+            if signature is None:
+                # 文件被删除或正在替换，等待目录通知
+                continue
+            # 替换式保存会使文件监视失效，需要重新添加
+            if path not in watched:
+                self._watcher.addPath(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                changed.append(path)
+        self._pending.clear()
+        if changed:
+            self.textures_changed.emit(sorted(changed))
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
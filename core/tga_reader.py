@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import mmap
+import struct
+
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+TGA_HEADER_SIZE = 18
+
+# 图像类型
+TGA_COLOR_MAPPED = (1, 9)
+TGA_TRUE_COLOR = (2, 10)
+TGA_GRAYSCALE = (3, 11)
+TGA_RLE = (9, 10, 11)
+
+class TgaImage(object):
+    """
+    基于内存映射的TGA贴图，
+    未压缩数据直接以NumPy视图访问文件中的像素块，不做拷贝。
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = np.frombuffer(self._map, dtype=np.uint8)
+        if buffer.size < TGA_HEADER_SIZE:
+            raise ValueError(f"无效的TGA文件: {filepath}")
+
+        (id_length, cmap_type, self.image_type,
+         cmap_first, cmap_length, cmap_depth,
+         _, _, self.width, self.height,
+         self.depth, descriptor) = struct.unpack("<BBBHHBHHHHBB", self._map[:TGA_HEADER_SIZE])
+
+        if self.image_type not in TGA_COLOR_MAPPED + TGA_TRUE_COLOR + TGA_GRAYSCALE:
+            raise ValueError(f"不支持的TGA类型 {self.image_type}: {filepath}")
+        if self.image_type in TGA_COLOR_MAPPED and cmap_type != 1:
+            raise ValueError(f"缺少调色板: {filepath}")
+
+        self.cmap_depth = cmap_depth
+        self.alpha_bits = descriptor & 0x0F
+        self.origin_top = bool(descriptor & 0x20)
+        self.origin_right = bool(descriptor & 0x10)
+        self.bytes_per_pixel = (self.depth + 7) // 8
+
+        offset = TGA_HEADER_SIZE + id_length
+        # 调色板
+        self.colormap = None
+        if cmap_type == 1:
+            entry_size = (cmap_depth + 7) // 8
+            cmap_bytes = cmap_length * entry_size
+            raw_map = buffer[offset:offset + cmap_bytes].reshape(cmap_length, entry_size)
+            self.colormap = (cmap_first, _to_bgra(raw_map, cmap_depth, cmap_depth == 32))
+            offset += cmap_bytes
+
+        pixel_count = self.width * self.height
+        if self.image_type in TGA_RLE:
+            data = decode_rle(buffer[offset:], pixel_count, self.bytes_per_pixel)
+        else:
+            end = offset + pixel_count * self.bytes_per_pixel
+            if end > buffer.size:
+                raise ValueError(f"TGA像素数据不完整: {filepath}")
+            # 零拷贝视图
+            data = buffer[offset:end]
+        self.pixels = data.reshape(self.height, self.width, self.bytes_per_pixel)
+
+    def rows(self):
+        """
+        返回按左上角原点排列的像素视图（翻转通过步长实现，不拷贝）
+        """
+        view = self.pixels
+        if not self.origin_top:
+            view = view[::-1]
+        if self.origin_right:
+            view = view[:, ::-1]
+        return view
+
+    def has_alpha(self):
+        """
+        是否带有透明通道
+        """
+        if self.image_type in TGA_COLOR_MAPPED:
+            return self.cmap_depth == 32
+        return self.depth == 32 or (self.depth == 16 and self.alpha_bits > 0)
+
+    def to_bgra(self):
+        """
+        转换为连续的BGRA数组（高 x 宽 x 4），即小端序的ARGB32内存布局
+        """
+        view = self.rows()
+        if self.image_type in TGA_COLOR_MAPPED:
+            first, palette = self.colormap
+            index = view[..., 0].astype(np.int32)
+            if self.bytes_per_pixel == 2:
+                index |= view[..., 1].astype(np.int32) << 8
+            index = np.clip(index - first, 0, len(palette) - 1)
+            return palette[index]
+        if self.image_type in TGA_GRAYSCALE:
+            gray = view[..., 0]
+            alpha = view[..., 1] if self.bytes_per_pixel == 2 else np.full_like(gray, 255)
+            return np.ascontiguousarray(np.stack([gray, gray, gray, alpha], axis=-1))
+        return _to_bgra(view, self.depth, self.has_alpha())
+
+    def to_rgba(self):
+        """
+        转换为连续的RGBA数组（高 x 宽 x 4）
+        """
+        bgra = self.to_bgra()
+        return np.ascontiguousarray(bgra[..., [2, 1, 0, 3]])
+
+    def to_qimage(self, max_size=None):
+        """
+        在像素缓冲区上构建QImage，不经过Qt图片插件
+        返回的QImage持有自己的像素：缓冲区是只读的内存映射或临时数组，
+        Qt原地转换格式或跨线程传递时都不能引用它
+        max_size给定时直接从缓冲区缩放到不超过该尺寸，不再拷贝原尺寸的像素
+        """
+        if self.image_type in TGA_TRUE_COLOR and self.depth in (24, 32):
+            view = self.rows()
+            if not view.flags["C_CONTIGUOUS"]:
+                view = np.ascontiguousarray(view)
+            if self.depth == 24:
+                fmt = QImage.Format_BGR888
+            else:
+                fmt = QImage.Format_ARGB32 if self.has_alpha() else QImage.Format_RGB32
+        else:
+            view = self.to_bgra()
+            fmt = QImage.Format_ARGB32 if self.has_alpha() else QImage.Format_RGB32
+        # QImage不持有缓冲区，在缓冲区仍然有效时拷贝或缩放出一份
+        image = QImage(view.data, self.width, self.height, view.strides[0], fmt)
+        if max_size is not None and (self.width > max_size or self.height > max_size):
+            return image.scaled(max_size, max_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image.copy()
+
+def _to_bgra(pixels, depth, has_alpha):
+    """
+    将15/16/24/32位像素转换为BGRA数组
+    """
+    shape = pixels.shape[:-1]
+    if depth in (15, 16):
+        value = pixels[..., 0].astype(np.uint16) | (pixels[..., 1].astype(np.uint16) << 8)
+        out = np.empty(shape + (4,), dtype=np.uint8)
+        # 5位通道扩展到8位
+        out[..., 0] = ((value & 0x1F) * 255 + 15) // 31
+        out[..., 1] = (((value >> 5) & 0x1F) * 255 + 15) // 31
+        out[..., 2] = (((value >> 10) & 0x1F) * 255 + 15) // 31
+        out[..., 3] = np.where(value & 0x8000, 255, 0) if has_alpha else 255
+        return out
+    if depth == 32:
+        out = np.ascontiguousarray(pixels)
+        if not has_alpha:
+            out = out.copy()
+            out[..., 3] = 255
+        return out
+    out = np.empty(shape + (4,), dtype=np.uint8)
+    out[..., :3] = pixels[..., :3]
+    out[..., 3] = 255
+    return out
+
+def decode_rle(data, pixel_count, bytes_per_pixel):
+    """
+    解码TGA的RLE数据
+    只顺序扫描包头确定每个包的位置，像素展开通过NumPy一次完成
+    """
+    raw = data.tobytes() if isinstance(data, np.ndarray) else bytes(data)
+    src_starts = []
+    counts = []
+    strides = []
+    pos = 0
+    decoded = 0
+    size = len(raw)
+    while decoded < pixel_count:
+        if pos >= size:
+            raise ValueError("TGA的RLE数据不完整")
+        header = raw[pos]
+        count = (header & 0x7F) + 1
+        pos += 1
+        src_starts.append(pos)
+        counts.append(count)
+        if header & 0x80:
+            # 重复包：一个像素重复count次
+            strides.append(0)
+            pos += bytes_per_pixel
+        else:
+            # 原始包：count个连续像素
+            strides.append(bytes_per_pixel)
+            pos += bytes_per_pixel * count
+        decoded += count
+    if pos > size:
+        raise ValueError("TGA的RLE数据不完整")
+
+    counts = np.asarray(counts, dtype=np.int64)
+    packet_out_start = np.cumsum(counts) - counts
+    # 每个输出像素在包内的序号
+    intra = np.arange(decoded, dtype=np.int64) - np.repeat(packet_out_start, counts)
+    src = (np.repeat(np.asarray(src_starts, dtype=np.int64), counts)
+           + intra * np.repeat(np.asarray(strides, dtype=np.int64), counts))
+    src = src[:pixel_count]
+    buffer = np.frombuffer(raw, dtype=np.uint8)
+    gathered = buffer[src[:, None] + np.arange(bytes_per_pixel)]
+    return gathered.reshape(-1)
+
+def read_tga(filepath):
+    """
+    读取TGA贴图，返回TgaImage
+    """
+    return TgaImage(filepath)
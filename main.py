@@ -1,28 +1,109 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
+
+PROCESS_START = time.perf_counter()  # 启动耗时统计的起点
+
+import argparse
+import importlib
 import sys
-from PyQt5.QtWidgets import QApplication
-from ui.main_window import MainWindow
+
+from core.startup_profile import startup_profile
+
+def parse_args(argv):
+    """
+    解析命令行参数，未识别的参数留给Qt
+    """
+    parser = argparse.ArgumentParser(description="贴图可视化布局工具")
+    parser.add_argument("--daemon", metavar="LAYOUT_DIR",
+                        help="无界面运行，监视布局文件夹并增量生成图集和导出记录")
+    parser.add_argument("--output", metavar="DIR", help="生成结果的输出文件夹，默认为布局文件夹下的build")
+    parser.add_argument("--lods", type=int, default=0, help="生成Lod0到该级的图集，默认只生成Lod0")
+    parser.add_argument("--workers", type=int, default=2, help="同时生成的布局数")
+    parser.add_argument("--debounce", type=int, default=500, help="文件变化的防抖时间（毫秒）")
+    parser.add_argument("--once", action="store_true", help="生成所有过期的布局后退出，不继续监视")
+    parser.add_argument("--cache-dir", metavar="DIR", help="图集缓存目录，默认使用系统缓存目录")
+    parser.add_argument("--cache-size", type=int, default=2048, help="图集缓存大小上限（MB）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用图集缓存")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="输出启动各阶段（导入、创建界面、首帧、恢复会话）的耗时")
+    return parser.parse_known_args(argv)
+
+def run_daemon(args, qt_args):
+    """
+    无界面运行增量生成服务
+    """
+    from PyQt5.QtCore import QCoreApplication
+    from core.build_daemon import BuildDaemon
+    from core.build_cache import BuildCache, default_cache_dir
+
+    app = QCoreApplication(qt_args)
+    cache = None
+    if not args.no_cache:
+        cache = BuildCache(args.cache_dir or default_cache_dir(), args.cache_size * 1024 ** 2)
+    daemon = BuildDaemon(args.daemon, args.output, range(0, args.lods + 1),
+                         args.workers, args.debounce, cache)
+
+    def on_finished(layout_path, outputs, error):
+        if error:
+            print(f"生成失败 {layout_path}: {error}", flush=True)
+        else:
+            print(f"已生成 {layout_path} -> {len(outputs)} 个文件", flush=True)
+
+    daemon.build_started.connect(lambda path: print(f"开始生成 {path}", flush=True))
+    daemon.build_finished.connect(on_finished)
+    if args.once:
+        daemon.idle.connect(app.quit)
+    else:
+        print(f"正在监视 {daemon.layout_dir}，输出到 {daemon.output_dir}", flush=True)
+    daemon.start()
+    code = app.exec_()
+    daemon.stop()
+    return code
 
 def main():
     """
     主函数，启动应用
     """
+    args, qt_args = parse_args(sys.argv[1:])
+    qt_args = sys.argv[:1] + qt_args
+    if args.daemon:
+        sys.exit(run_daemon(args, qt_args))
+    
+    if args.startup_profile:
+        startup_profile.start(PROCESS_START)
+    
+    with startup_profile.phase("导入Qt"):
+        from PyQt5.QtWidgets import QApplication
+    
     # 创建应用
-    app = QApplication(sys.argv)
+    with startup_profile.phase("创建应用"):
+        app = QApplication(qt_args)
+        
+        # 设置应用样式
+        app.setStyle("Fusion")
     
-    # 设置应用样式
-    app.setStyle("Fusion")
+    with startup_profile.phase("导入界面模块"):
+        if startup_profile.enabled:
+            # 先单独导入较大的第三方库，分别统计耗时
+            for name in ("numpy", "PIL.Image", "sqlite3"):
+                with startup_profile.phase(f"导入{name}"):
+                    importlib.import_module(name)
+        from ui.main_window import MainWindow
     
     # 创建主窗口
-    window = MainWindow()
+    with startup_profile.phase("创建主窗口"):
+        window = MainWindow()
+    if startup_profile.enabled:
+        window.session_restored.connect(lambda: print(startup_profile.report(), flush=True))
     
     # 显示窗口
-    window.show()
+    with startup_profile.phase("显示窗口"):
+        window.show()
     
     # 运行应用
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,12 +1,41 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
-from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF, QSizeF
-from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QTransform
+from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsScene, QGraphicsItem
+import os
+import time
+from collections import deque
+
+from PyQt5.QtCore import Qt, QRectF, QPointF, QLineF, QSizeF, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush, QTransform, QImage, QPixmap
 import math
 
+import numpy as np
+
 from ui.image_item import ImageItem  # 添加ImageItem的导入
+from ui.slot_proxy import SlotProxy
+from core.atlas_utilization import UtilizationRaster, raster_size
+from core.image_loader import ImageDecoder
+from core.image_metadata import SUPPORTED_EXTENSIONS
+from core.pixel_budget import PixelBudget, demoted_level, level_bytes
+
+# 占用热力图配色：未占用、单个贴图覆盖、两个及以上贴图重叠（RGBA）
+HEATMAP_COLORS = np.array([
+    [255, 0, 0, 50],
+    [0, 200, 0, 60],
+    [255, 140, 0, 130],
+    [255, 0, 0, 170],
+], dtype=np.uint8)
+
+def frame_interval():
+    """
+    返回主屏幕一帧的时长（毫秒），取不到刷新率时按60Hz计算
+    """
+    screen = QApplication.primaryScreen()
+    rate = screen.refreshRate() if screen is not None else 0
+    if not rate or rate <= 0:
+        rate = 60.0
+    return max(1, int(1000.0 / rate))
 
 class CanvasWidget(QGraphicsView):
     """
@@ -14,6 +43,13 @@ class CanvasWidget(QGraphicsView):
     继承自QGraphicsView，管理QGraphicsScene。
     """
     
+    # 自定义信号
+    utilization_changed = pyqtSignal(dict)  # 图集占用统计变化信号
+    images_dropped = pyqtSignal(list, QPointF)  # 贴图拖放信号，参数为文件路径列表和场景坐标
+    pixel_usage_changed = pyqtSignal(int, int)  # 贴图像素内存变化信号，参数为已用字节数和预算字节数
+    first_frame_painted = pyqtSignal()  # 视口第一次绘制完成信号
+    slots_changed = pyqtSignal()  # 贴图增删或在贴图项和轻量记录之间转换的信号
+    
     def __init__(self, parent=None):
         super(CanvasWidget, self).__init__(parent)
         self.setRenderHint(QPainter.Antialiasing, True)
@@ -34,10 +70,14 @@ class CanvasWidget(QGraphicsView):
         # 启用鼠标跟踪
         self.setMouseTracking(True)
         
+        # 接受从贴图库或文件管理器拖入的贴图
+        self.setAcceptDrops(True)
+        
         # 设置视图属性
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        # 只重绘变化的区域，选中框由前景层绘制并单独标记重绘
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
         
         # 初始化缩放比例
         self.scale_factor = 1.0
@@ -57,6 +97,72 @@ class CanvasWidget(QGraphicsView):
         self._panning = False
         self._last_mouse_pos = None
         
+        # 手柄和边界设置，提升轻量记录时应用到新建的贴图项
+        self.handle_color = QColor(0, 120, 215)
+        self.handle_size = 12
+        self.item_border_width = None
+        
+        # 选中框和手柄在前景层统一绘制，记录上次绘制的场景矩形用于标记重绘
+        self._selection_rect = QRectF()
+        self._resize_item = None  # 正在通过手柄缩放的贴图项
+        
+        # 视口外或隐藏的贴图以轻量记录保存，不持有像素数据
+        self.slot_proxies = []
+        self.virtualize_margin = 256  # 视口外保留真实贴图项的边距（场景像素）
+        # 轻量记录的网格索引{网格坐标: [记录]}，滚动时只检查视口覆盖的网格，记录增删或移动后重建
+        self.proxy_cell_size = 1024
+        self._proxy_cells = None
+        self._virtualize_timer = QTimer(self)
+        self._virtualize_timer.setSingleShot(True)
+        self._virtualize_timer.setInterval(0)
+        self._virtualize_timer.timeout.connect(self.update_virtualization)
+        
+        # 贴图像素内存预算，超出时把最久未查看的视口外贴图降级为低分辨率mip
+        self.pixel_budget = PixelBudget()
+        self._budget_timer = QTimer(self)
+        self._budget_timer.setSingleShot(True)
+        self._budget_timer.setInterval(50)
+        self._budget_timer.timeout.connect(self.update_pixel_budget)
+        
+        # 恢复分辨率时在后台解码，同一源贴图只解码一次，由所有使用它的贴图项共享
+        self.image_decoder = ImageDecoder(parent=self)
+        self.image_decoder.decoded.connect(self.on_image_decoded)
+        self._restore_requests = {}  # 路径 -> {贴图槽编号: 需要的mip级别}
+        
+        # 图集占用统计，贴图变化时增量更新
+        self.show_heatmap = False
+        self.utilization = None
+        self._heatmap_image = None
+        self._heatmap_version = -1
+        self._utilization_timer = QTimer(self)
+        self._utilization_timer.setSingleShot(True)
+        self._utilization_timer.setInterval(100)
+        self._utilization_timer.timeout.connect(self.update_utilization)
+        self.scene.changed.connect(self.schedule_utilization)
+        self.scene.sceneRectChanged.connect(self.schedule_utilization)
+        self.scene.changed.connect(self.update_selection_overlay)
+        self.scene.selectionChanged.connect(self.update_selection_overlay)
+        
+        # 交互时降低画质：拖拽、缩放、平移期间关闭抗锯齿和平滑缩放，空闲后再高质量重绘
+        self.adaptive_quality = True
+        self.interacting = False
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(150)  # 停止交互多久后恢复高画质（毫秒）
+        self._idle_timer.timeout.connect(self.end_interaction)
+        # 最近的帧绘制耗时（毫秒），分别记录交互中和静止时
+        self._frame_times = {True: deque(maxlen=60), False: deque(maxlen=60)}
+        self._first_frame_done = False
+        
+        # 拖拽和缩放的鼠标事件按屏幕刷新率合并，每帧只求解并提交一次几何变化
+        self._pending_geometry = []  # 等待提交拖拽的贴图项
+        self._pending_resize_pos = None  # 等待提交的缩放鼠标位置（场景坐标）
+        self._geometry_timer = QTimer(self)
+        self._geometry_timer.setSingleShot(True)
+        self._geometry_timer.setTimerType(Qt.PreciseTimer)
+        self._geometry_timer.setInterval(frame_interval())
+        self._geometry_timer.timeout.connect(self.commit_geometry)
+        
     def get_actual_grid_size(self):
         """
         返回网格大小（像素）
@@ -106,6 +212,62 @@ class CanvasWidget(QGraphicsView):
         # 恢复之前的画笔设置
         painter.setPen(old_pen)
         
+    def drawForeground(self, painter, rect):
+        """
+        在贴图上方绘制图集占用热力图，以及选中贴图的选中框和手柄
+        """
+        super(CanvasWidget, self).drawForeground(painter, rect)
+        if self.show_heatmap and self.utilization is not None:
+            # 栅格内容变化时才重新生成热力图图像
+            if self._heatmap_version != self.utilization.version:
+                levels = np.minimum(self.utilization.coverage, len(HEATMAP_COLORS) - 1)
+                colors = np.ascontiguousarray(HEATMAP_COLORS[levels])
+                height, width = colors.shape[:2]
+                self._heatmap_image = QImage(colors.data, width, height, width * 4,
+                                             QImage.Format_RGBA8888).copy()
+                self._heatmap_version = self.utilization.version
+            painter.drawImage(self.scene.sceneRect(), self._heatmap_image)
+        
+        # 选中框和手柄
+        for item in self.selected_image_items():
+            if not item.selection_scene_rect().intersects(rect):
+                continue
+            painter.save()
+            painter.setTransform(item.sceneTransform(), True)
+            item.paint_selection(painter)
+            painter.restore()
+        
+    def selected_image_items(self):
+        """
+        返回选中的贴图项
+        """
+        return [item for item in self.scene.selectedItems() if isinstance(item, ImageItem)]
+        
+    def update_selection_overlay(self, *args):
+        """
+        选中状态或选中贴图的位置、大小变化时，只重绘旧的和新的选中框区域
+        """
+        rect = QRectF()
+        for item in self.selected_image_items():
+            rect = rect.united(item.selection_scene_rect())
+        if rect == self._selection_rect:
+            return
+        for dirty in (self._selection_rect, rect):
+            if not dirty.isNull():
+                self.viewport().update(self.mapFromScene(dirty).boundingRect().adjusted(-2, -2, 2, 2))
+        self._selection_rect = rect
+        
+    def handle_at(self, scene_pos):
+        """
+        返回场景坐标处的(贴图项, 手柄编号)，只检查选中的贴图，不在手柄上时返回(None, HANDLE_NONE)
+        """
+        items = sorted(self.selected_image_items(), key=lambda item: item.zValue(), reverse=True)
+        for item in items:
+            handle = item.handleAt(item.mapFromScene(scene_pos))
+            if handle != ImageItem.HANDLE_NONE:
+                return item, handle
+        return None, ImageItem.HANDLE_NONE
+        
     def wheelEvent(self, event):
         """
         鼠标滚轮事件处理，用于缩放视图
@@ -114,8 +276,16 @@ class CanvasWidget(QGraphicsView):
         if event.angleDelta().y() < 0:
             factor = 1.0 / factor
         
+        self.zoom_view(factor)
+        
+    def zoom_view(self, factor):
+        """
+        按比例缩放视图
+        """
+        self.begin_interaction()
         self.scale(factor, factor)
         self.scale_factor *= factor
+        self.schedule_virtualization()
         
     def resizeEvent(self, event):
         """
@@ -124,6 +294,90 @@ class CanvasWidget(QGraphicsView):
         super(CanvasWidget, self).resizeEvent(event)
         self.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
         self.scale_factor = 1.0
+        self.schedule_virtualization()
+        
+    def scrollContentsBy(self, dx, dy):
+        """
+        视图滚动时，重新计算需要提升或降级的贴图
+        """
+        super(CanvasWidget, self).scrollContentsBy(dx, dy)
+        self.begin_interaction()
+        self.schedule_virtualization()
+        
+    def paintEvent(self, event):
+        """
+        绘制视口，并记录每帧耗时
+        """
+        start = time.perf_counter()
+        super(CanvasWidget, self).paintEvent(event)
+        self._frame_times[self.interacting].append((time.perf_counter() - start) * 1000.0)
+        if not self._first_frame_done:
+            self._first_frame_done = True
+            self.first_frame_painted.emit()
+        
+    def schedule_geometry_commit(self, item=None):
+        """
+        请求在下一帧提交贴图项的拖拽，同一帧内的多次请求只提交一次
+        """
+        if item is not None and item not in self._pending_geometry:
+            self._pending_geometry.append(item)
+        if not self._geometry_timer.isActive():
+            self._geometry_timer.start()
+        
+    def commit_geometry(self):
+        """
+        提交本帧累积的拖拽和缩放
+        """
+        self._geometry_timer.stop()
+        items, self._pending_geometry = self._pending_geometry, []
+        for item in items:
+            item.commit_drag()
+        if self._resize_item is not None and self._pending_resize_pos is not None:
+            self._resize_item.update_resize(self._pending_resize_pos)
+        self._pending_resize_pos = None
+        
+    def begin_interaction(self):
+        """
+        进入交互状态，使用低画质快速绘制
+        """
+        if not self.adaptive_quality:
+            return
+        if not self.interacting:
+            self.interacting = True
+            self.setRenderHint(QPainter.Antialiasing, False)
+            self.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        self._idle_timer.start()
+        
+    def end_interaction(self):
+        """
+        交互结束，恢复高画质并重绘
+        """
+        if not self.interacting:
+            return
+        self.interacting = False
+        self.setRenderHint(QPainter.Antialiasing, True)
+        self.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        self.viewport().update()
+        
+    def set_adaptive_quality(self, enabled):
+        """
+        设置交互时是否降低画质
+        """
+        self.adaptive_quality = enabled
+        if not enabled:
+            self._idle_timer.stop()
+            self.end_interaction()
+        
+    def render_stats(self):
+        """
+        返回最近帧的平均绘制耗时（毫秒），键为"interactive"和"idle"，没有数据时为None
+        """
+        def average(values):
+            return sum(values) / len(values) if values else None
+        return {
+            "interactive": average(self._frame_times[True]),
+            "idle": average(self._frame_times[False]),
+        }
         
     def reset_view(self):
         """
@@ -131,27 +385,342 @@ class CanvasWidget(QGraphicsView):
         """
         self.resetTransform()
         self.scale_factor = 1.0
+        self.schedule_virtualization()
         
     def fit_in_view(self):
         """
         适应场景内容到视图
         """
         self.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+        self.schedule_virtualization()
         
-    def add_image(self, image_item):
+    def setup_image_item(self, image_item):
         """
-        添加贴图项到场景
+        应用网格吸附、手柄和边界设置并把贴图项加入场景
         """
         # 设置网格吸附属性
         actual_grid_size = self.get_actual_grid_size()
         image_item.set_snap_to_grid(self.snap_to_grid, actual_grid_size)
+        image_item.handle_color = self.handle_color
+        image_item.handle_size = self.handle_size
+        if self.item_border_width is not None:
+            image_item.border_width = self.item_border_width
         self.scene.addItem(image_item)
         
+    def add_image(self, image_item):
+        """
+        添加贴图项到场景
+        """
+        self.setup_image_item(image_item)
+        self.schedule_pixel_budget()
+        self.slots_changed.emit()
+        
+    def add_slot_proxy(self, proxy):
+        """
+        以轻量记录的形式添加贴图，进入视口后才创建贴图项
+        """
+        self.slot_proxies.append(proxy)
+        self._proxy_cells = None
+        self.schedule_virtualization()
+        self.slots_changed.emit()
+        
+    def image_items(self):
+        """
+        返回场景中所有真实的贴图项
+        """
+        return [item for item in self.scene.items() if isinstance(item, ImageItem)]
+        
+    def slot_count(self):
+        """
+        返回贴图总数（包含轻量记录）
+        """
+        return len(self.image_items()) + len(self.slot_proxies)
+        
+    def slot_objects(self):
+        """
+        返回所有贴图（贴图项和轻量记录），顺序与collect_slot_data一致
+        """
+        return self.image_items() + list(self.slot_proxies)
+        
+    def collect_slot_data(self, slots=None):
+        """
+        收集所有贴图（贴图项和轻量记录）的字典数据
+        """
+        scene_width = self.scene.width()
+        scene_height = self.scene.height()
+        if slots is None:
+            slots = self.slot_objects()
+        return [slot.to_dict() if isinstance(slot, ImageItem)
+                else slot.to_dict(scene_width, scene_height) for slot in slots]
+        
+    def set_slot_geometry(self, slot, x, y, width, height):
+        """
+        设置贴图（贴图项或轻量记录）在场景中的位置和显示尺寸
+        """
+        if isinstance(slot, ImageItem):
+            slot.resize(width, height)
+            slot.setPos(x, y)
+        else:
+            slot.x, slot.y = x, y
+            slot.width, slot.height = width, height
+            self._proxy_cells = None
+        self.schedule_virtualization()
+
+    def slot_geometry(self, slot):
+        """
+        返回贴图（贴图项或轻量记录）在场景中的位置和显示尺寸(x, y, 宽, 高)
+        """
+        if isinstance(slot, ImageItem):
+            pos = slot.pos()
+            return pos.x(), pos.y(), slot.width * slot.scale_x, slot.height * slot.scale_y
+        return slot.x, slot.y, slot.width, slot.height
+
+    def set_slot_properties(self, slot, rotation=None, z_value=None, visible=None):
+        """
+        设置贴图（贴图项或轻量记录）的旋转、层级和可见性，参数为None时保持不变
+        """
+        if isinstance(slot, ImageItem):
+            if rotation is not None:
+                slot.rotation_angle = rotation
+                slot.setRotation(rotation)
+            if z_value is not None:
+                slot.setZValue(z_value)
+            if visible is not None:
+                slot.visible = visible
+                slot.setVisible(visible)
+        else:
+            if rotation is not None:
+                slot.rotation = rotation
+            if z_value is not None:
+                slot.z_value = z_value
+            if visible is not None:
+                slot.visible = visible
+        self.schedule_virtualization()
+
+    def slot_map(self):
+        """
+        返回{贴图槽编号: 贴图项或轻量记录}
+        """
+        return {slot.slot_id: slot for slot in self.slot_objects()}
+
+    def schedule_virtualization(self):
+        """
+        合并同一轮事件中的多次视图变化，只计算一次
+        """
+        self._virtualize_timer.start()
+        
+    def visible_scene_rect(self):
+        """
+        返回当前视口在场景中的矩形（含边距）
+        """
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        margin = self.virtualize_margin
+        return rect.adjusted(-margin, -margin, margin, margin)
+        
+    def proxy_cells(self, rect):
+        """
+        返回矩形覆盖的网格坐标
+        """
+        size = self.proxy_cell_size
+        left, right = int(math.floor(rect.left() / size)), int(math.floor(rect.right() / size))
+        top, bottom = int(math.floor(rect.top() / size)), int(math.floor(rect.bottom() / size))
+        return [(column, row) for column in range(left, right + 1) for row in range(top, bottom + 1)]
+        
+    def index_proxy(self, proxy):
+        """
+        把轻量记录加入网格索引
+        """
+        for cell in self.proxy_cells(proxy.rect()):
+            self._proxy_cells.setdefault(cell, []).append(proxy)
+        
+    def proxies_in_rect(self, rect):
+        """
+        通过网格索引查找与矩形相交的轻量记录
+        """
+        if self._proxy_cells is None:
+            self._proxy_cells = {}
+            for proxy in self.slot_proxies:
+                self.index_proxy(proxy)
+        found = {}
+        for cell in self.proxy_cells(rect):
+            for proxy in self._proxy_cells.get(cell, ()):
+                if proxy.rect().intersects(rect):
+                    found[id(proxy)] = proxy
+        return list(found.values())
+        
+    def update_virtualization(self):
+        """
+        将视口外或隐藏的贴图项降级为轻量记录，
+        将进入视口的可见记录提升为贴图项
+        隐藏的记录仍保留在索引中，由set_slot_properties取消隐藏后在下一次计算时提升
+        """
+        visible_rect = self.visible_scene_rect()
+        
+        # 降级：通过场景索引取得视口中的贴图项，选中或正在交互的贴图项保持不变
+        in_view = set(self.scene.items(visible_rect, Qt.IntersectsItemBoundingRect))
+        demoted = []
+        for item in self.image_items():
+            if item.isSelected() or item.dragging or item.resizing:
+                continue
+            if item not in in_view or not (item.visible and item.isVisible()):
+                demoted.append(item)
+        
+        # 提升：只检查视口覆盖网格中可见的记录
+        promoted = [proxy for proxy in self.proxies_in_rect(visible_rect) if proxy.visible]
+        
+        if promoted:
+            promoted_ids = set(id(proxy) for proxy in promoted)
+            self.slot_proxies = [proxy for proxy in self.slot_proxies if id(proxy) not in promoted_ids]
+            for cell in set(cell for proxy in promoted for cell in self.proxy_cells(proxy.rect())):
+                self._proxy_cells[cell] = [proxy for proxy in self._proxy_cells[cell]
+                                           if id(proxy) not in promoted_ids]
+        for item in demoted:
+            proxy = SlotProxy.from_item(item)
+            self.slot_proxies.append(proxy)
+            if self._proxy_cells is not None:
+                self.index_proxy(proxy)
+            self.scene.removeItem(item)
+        for proxy in promoted:
+            self.setup_image_item(proxy.create_item())
+        self.schedule_pixel_budget()
+        if demoted or promoted:
+            self.slots_changed.emit()
+        
+    def schedule_pixel_budget(self):
+        """
+        合并短时间内的多次请求，只检查一次内存预算
+        """
+        if not self._budget_timer.isActive():
+            self._budget_timer.start()
+        
+    def set_pixel_budget(self, max_bytes):
+        """
+        设置贴图像素内存预算（字节）
+        """
+        self.pixel_budget.max_bytes = max_bytes
+        self.schedule_pixel_budget()
+        
+    @staticmethod
+    def pixel_usage(items):
+        """
+        统计贴图项持有的像素字节数，多个贴图项共享的像素只计一次
+        """
+        pixmaps = {}
+        for item in items:
+            pixmaps.setdefault(item.pixmap.cacheKey(), item.pixel_bytes())
+        return sum(pixmaps.values())
+        
+    def update_pixel_budget(self):
+        """
+        恢复视口中分辨率不足的贴图，超出预算时先把最久未查看的视口外贴图降级为缩略图级别，
+        仍然超出时把视口中的贴图降到屏幕显示所需的级别
+        """
+        view_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        view_scale = self.transform().m11()
+        items = self.image_items()
+        on_screen = []
+        off_screen = []
+        for item in items:
+            if item.visible and item.isVisible() and item.sceneBoundingRect().intersects(view_rect):
+                on_screen.append(item)
+            elif not (item.isSelected() or item.dragging or item.resizing):
+                off_screen.append(item)
+        self.pixel_budget.touch(item.slot_id for item in on_screen)
+        self.pixel_budget.retain(slot.slot_id for slot in self.slot_objects())
+        
+        # 屏幕显示所需的级别；交互时不解码，交互结束重绘时会再次请求恢复
+        needed = {item.slot_id: ImageItem.level_for_scale(view_scale * max(item.scale_x, item.scale_y))
+                  for item in on_screen}
+        if not self.interacting:
+            for item in on_screen:
+                if item.source_validated and needed[item.slot_id] < item.resident_level:
+                    self.request_restore(item, needed[item.slot_id])
+        
+        # 降级：共享同一像素的贴图项作为一组，只有全部可以降级时才释放内存，一起降到组内需要的最高分辨率
+        off_screen_level = lambda item: demoted_level(item.width, item.height)
+        for candidates, target in ((off_screen, off_screen_level),
+                                   (on_screen + off_screen,
+                                    lambda item: needed.get(item.slot_id, off_screen_level(item)))):
+            allowed = set(item.slot_id for item in candidates)
+            groups = {}
+            for item in items:
+                groups.setdefault(item.pixmap.cacheKey(), []).append(item)
+            plans = {}
+            for users in groups.values():
+                if any(user.slot_id not in allowed for user in users):
+                    continue
+                first = users[0]
+                level = max(min(target(user) for user in users), first.resident_level)
+                plans[tuple(user.slot_id for user in users)] = (users, level)
+            entries = [(key, users[0].pixel_bytes(), level_bytes(users[0].width, users[0].height, level))
+                       for key, (users, level) in plans.items()]
+            for key in self.pixel_budget.plan(entries, self.pixel_usage(items)):
+                users, level = plans[key]
+                demoted = users[0].level_pixmap(level)
+                for user in users:
+                    user.demote(level, demoted)
+        
+        self.pixel_budget.used_bytes = self.pixel_usage(items)
+        self.pixel_usage_changed.emit(self.pixel_budget.used_bytes, self.pixel_budget.max_bytes)
+        
+    def request_restore(self, item, level):
+        """
+        请求在后台解码源贴图，完成后把贴图项恢复到第level级mip
+        """
+        self._restore_requests.setdefault(item.filepath, {})[item.slot_id] = level
+        self.image_decoder.request(item.filepath)
+        
+    def on_image_decoded(self, filepath, image):
+        """
+        源贴图解码完成，转换为一个共享的像素后恢复所有请求它的贴图项
+        """
+        requests = self._restore_requests.pop(filepath, {})
+        if image.isNull() or not requests:
+            return
+        pixmap = QPixmap.fromImage(image)
+        for item in self.image_items():
+            level = requests.get(item.slot_id)
+            if level is not None and item.filepath == filepath and item.source_validated:
+                item.restore(level, pixmap)
+        self.schedule_pixel_budget()
+        
+    def schedule_utilization(self, *args):
+        """
+        合并短时间内的多次变化，拖拽过程中按固定间隔更新占用统计
+        """
+        if not self._utilization_timer.isActive():
+            self._utilization_timer.start()
+        
+    def update_utilization(self):
+        """
+        按当前布局增量更新占用栅格，并发出统计结果
+        """
+        scene_rect = self.scene.sceneRect()
+        width, height = raster_size(scene_rect.width(), scene_rect.height())
+        if self.utilization is None or (self.utilization.width, self.utilization.height) != (width, height):
+            self.utilization = UtilizationRaster(width, height)
+        if self.utilization.update(self.collect_slot_data()) and self.show_heatmap:
+            self.viewport().update()
+        self.utilization_changed.emit(self.utilization.stats())
+        
+    def set_heatmap_visible(self, visible):
+        """
+        设置是否显示占用热力图
+        """
+        self.show_heatmap = visible
+        self.update_utilization()
+        self.viewport().update()
+        
     def clear_scene(self):
         """
         清空场景
         """
         self.scene.clear()
+        self.slot_proxies = []
+        self._proxy_cells = None
+        self.slots_changed.emit()
+        self.pixel_budget.retain([])
+        self.schedule_pixel_budget()
         self.scene.setSceneRect(QRectF(0, 0, 800, 600))
         
     def set_grid_visible(self, visible):
@@ -281,6 +850,7 @@ class CanvasWidget(QGraphicsView):
         """
         设置所有贴图项的边界线宽度
         """
+        self.item_border_width = width
         for item in self.scene.items():
             if isinstance(item, ImageItem):
                 item.set_border_width(width)
@@ -289,18 +859,54 @@ class CanvasWidget(QGraphicsView):
         """
         设置所有贴图项的缩放手柄颜色
         """
+        self.handle_color = color
         for item in self.scene.items():
             if isinstance(item, ImageItem):
                 item.set_handle_color(color)
+        self.viewport().update()
                 
     def set_handle_size(self, size):
         """
         设置所有贴图项的缩放手柄大小
         """
+        self.handle_size = size
         for item in self.scene.items():
             if isinstance(item, ImageItem):
                 item.set_handle_size(size)
+        self.viewport().update()
 
+    def dropped_image_paths(self, mime_data):
+        """
+        返回拖放数据中支持的贴图文件路径
+        """
+        if not mime_data.hasUrls():
+            return []
+        return [url.toLocalFile() for url in mime_data.urls()
+                if url.isLocalFile() and os.path.splitext(url.toLocalFile())[1].lower() in SUPPORTED_EXTENSIONS]
+        
+    def dragEnterEvent(self, event):
+        if self.dropped_image_paths(event.mimeData()):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+            
+    def dragMoveEvent(self, event):
+        if self.dropped_image_paths(event.mimeData()):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+            
+    def dropEvent(self, event):
+        """
+        贴图拖放到画布时，在放下的位置创建贴图项
+        """
+        paths = self.dropped_image_paths(event.mimeData())
+        if not paths:
+            event.ignore()
+            return
+        event.acceptProposedAction()
+        self.images_dropped.emit(paths, self.mapToScene(event.pos()))
+        
     def mousePressEvent(self, event):
         """
         处理鼠标按下事件
@@ -311,6 +917,15 @@ class CanvasWidget(QGraphicsView):
             self.setCursor(Qt.ClosedHandCursor)
             event.accept()  # 接受事件，防止事件继续传播
             return
+        if event.button() == Qt.LeftButton:
+            # 手柄由画布绘制，也由画布做命中检测
+            scene_pos = self.mapToScene(event.pos())
+            item, handle = self.handle_at(scene_pos)
+            if item is not None:
+                self._resize_item = item
+                item.begin_resize(handle, scene_pos)
+                event.accept()
+                return
         super(CanvasWidget, self).mousePressEvent(event)
 
     def mouseReleaseEvent(self, event):
@@ -322,12 +937,28 @@ class CanvasWidget(QGraphicsView):
             self.setCursor(Qt.ArrowCursor)
             event.accept()  # 接受事件，防止事件继续传播
             return
+        if event.button() == Qt.LeftButton and self._resize_item is not None:
+            # 提交最后一次缩放
+            self.commit_geometry()
+            self._resize_item.end_resize()
+            self._resize_item = None
+            event.accept()
+            return
         super(CanvasWidget, self).mouseReleaseEvent(event)
 
     def mouseMoveEvent(self, event):
         """
         处理鼠标移动事件
         """
+        # 拖拽或缩放贴图项时进入交互状态
+        if event.buttons() & Qt.LeftButton and self.scene.mouseGrabberItem() is not None:
+            self.begin_interaction()
+        if self._resize_item is not None:
+            self.begin_interaction()
+            self._pending_resize_pos = self.mapToScene(event.pos())
+            self.schedule_geometry_commit()
+            event.accept()
+            return
         if self._panning and self._last_mouse_pos is not None:
             # 计算鼠标移动的距离
             delta = event.pos() - self._last_mouse_pos
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage, QPixmap
+
+from core.atlas_compositor import AtlasCompositor
+
+class PreviewRenderWorker(QObject):
+    """
+    导出预览渲染工作对象，运行在后台线程中，
+    持有当前图集像素，只重绘变化的图块。
+    """
+
+    # 自定义信号
+    rendered = pyqtSignal(QImage, float, int, list)  # 渲染完成信号，参数为图集图像、耗时(毫秒)、重绘图块数(-1表示整图)、无法读取的源贴图
+    failed = pyqtSignal(str)  # 渲染失败信号，参数为错误信息
+
+    def __init__(self):
+        super(PreviewRenderWorker, self).__init__()
+        self.compositor = None
+        self.atlas = None
+
+    @pyqtSlot(object)
+    def render(self, job):
+        """
+        执行一次渲染任务
+        """
+        start = time.perf_counter()
+        size = job["texture_size"]
+        try:
+            if self.compositor is None or self.compositor.width != size:
+                self.compositor = AtlasCompositor(size, size)
+                self.atlas = None
+            self.atlas, tiles = self.compositor.update(job["records"], self.atlas, job["invalidated"])
+        except Exception as e:
+            # 槽函数中的异常会终止程序，丢弃当前图集，下次整图重绘
+            self.compositor = None
+            self.atlas = None
+            self.failed.emit(str(e))
+            return
+        tile_count = -1 if tiles is None else len(tiles)
+
+        image = QImage(self.atlas.data, size, size, size * 4, QImage.Format_RGBA8888).copy()
+        self.rendered.emit(image, (time.perf_counter() - start) * 1000.0, tile_count,
+                           sorted(self.compositor.failed))
+
+class ExportPreviewWidget(QWidget):
+    """
+    导出预览组件，
+    在后台线程中按导出贴图尺寸渲染合并结果，并随贴图移动增量更新。
+    """
+
+    # 内部信号，用于把任务投递到工作线程
+    render_requested = pyqtSignal(object)
+
+    def __init__(self, records_provider, parent=None):
+        super(ExportPreviewWidget, self).__init__(parent)
+        self.records_provider = records_provider  # 返回当前布局贴图记录的可调用对象
+        self.texture_size = 2048
+        self._busy = False
+        self._pending = False
+        self._last_records = None
+        self._last_size = None
+        self._invalidated = set()
+        self._pixmap = QPixmap()
+
+        self.init_ui()
+
+        # 后台渲染线程
+        self._thread = QThread(self)
+        self._worker = PreviewRenderWorker()
+        self._worker.moveToThread(self._thread)
+        self.render_requested.connect(self._worker.render)
+        self._worker.rendered.connect(self.on_rendered)
+        self._worker.failed.connect(self.on_failed)
+        self._thread.start()
+
+        # 合并短时间内的多次变化
+        self._schedule_timer = QTimer(self)
+        self._schedule_timer.setSingleShot(True)
+        self._schedule_timer.setInterval(100)
+        self._schedule_timer.timeout.connect(self.request_render)
+
+    def init_ui(self):
+        """
+        初始化界面
+        """
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.title_label = QLabel("导出预览")
+        layout.addWidget(self.title_label)
+
+        self.image_label = QLabel("等待渲染")
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setMinimumSize(200, 200)
+        # 忽略图片自身尺寸，避免设置缩放后的图片时组件不断变大
+        self.image_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        layout.addWidget(self.image_label)
+
+        self.info_label = QLabel("")
+        layout.addWidget(self.info_label)
+
+    def set_texture_size(self, size):
+        """
+        设置导出贴图尺寸，尺寸变化时整图重绘
+        """
+        if size != self.texture_size:
+            self.texture_size = size
+            self.schedule()
+
+    def invalidate_sources(self, filepaths):
+        """
+        源贴图文件变化时，丢弃缓存并重绘引用这些贴图的图块
+        """
+        self._invalidated.update(filepaths)
+        self.schedule()
+
+    def schedule(self):
+        """
+        请求在短暂延迟后刷新预览，拖拽过程中按固定间隔节流而不是一直推迟
+        """
+        if self.isVisible() and not self._schedule_timer.isActive():
+            self._schedule_timer.start()
+
+    def request_render(self):
+        """
+        布局或源贴图有变化时把当前布局交给工作线程，由合成器计算需要重绘的图块
+        """
+        if self._busy:
+            self._pending = True
+            return
+
+        records = self.records_provider()
+        size = self.texture_size
+        if records == self._last_records and size == self._last_size and not self._invalidated:
+            return
+
+        self._last_records = records
+        self._last_size = size
+        job = {
+            "records": records,
+            "texture_size": size,
+            "invalidated": list(self._invalidated),
+        }
+        self._invalidated.clear()
+        self._busy = True
+        self.info_label.setText("渲染中...")
+        self.render_requested.emit(job)
+
+    def on_rendered(self, image, elapsed_ms, tile_count, failed):
+        """
+        渲染完成，显示结果；期间有新的变化则继续渲染
+        """
+        self._busy = False
+        self._pixmap = QPixmap.fromImage(image)
+        self.update_preview_pixmap()
+        scope = "整图" if tile_count < 0 else f"{tile_count} 个图块"
+        text = f"{self.texture_size} x {self.texture_size}  重绘{scope}  {elapsed_ms:.0f} ms"
+        if failed:
+            text += f"  {len(failed)} 个贴图无法读取"
+            self.info_label.setToolTip("\n".join(failed))
+        else:
+            self.info_label.setToolTip("")
+        self.info_label.setText(text)
+        self.finish_render()
+
+    def on_failed(self, message):
+        """
+        渲染失败，显示错误信息，下次变化时整图重绘
+        """
+        self._busy = False
+        self._last_records = None
+        self.info_label.setText(f"渲染失败: {message}")
+        self.info_label.setToolTip(message)
+        self.finish_render()
+
+    def finish_render(self):
+        """
+        期间有新的变化则继续渲染
+        """
+        if self._pending:
+            self._pending = False
+            self.request_render()
+
+    def update_preview_pixmap(self):
+        """
+        按组件大小等比缩放显示预览
+        """
+        if self._pixmap.isNull():
+            return
+        self.image_label.setPixmap(self._pixmap.scaled(
+            self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def resizeEvent(self, event):
+        super(ExportPreviewWidget, self).resizeEvent(event)
+        self.update_preview_pixmap()
+
+    def showEvent(self, event):
+        super(ExportPreviewWidget, self).showEvent(event)
+        self.schedule()
+
+    def shutdown(self):
+        """
+        停止后台渲染线程
+        """
+        self._thread.quit()
+        self._thread.wait()
@@ -6,6 +6,33 @@ from PyQt5.QtCore import Qt, QRectF, QPointF
 from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QBrush
 import os
 
+import math
+import itertools
+
+from core.image_loader import load_pixmap
+from core.texture_cache import texture_cache
+from core.alpha_trim import trim_cache, trim_record, is_trimmed
+
+_slot_ids = itertools.count(1)
+
+def missing_preview(width, height):
+    """
+    源文件不存在的贴图槽使用的占位像素(QPixmap, 宽, 高, mip级别)，按显示尺寸生成，不读取源文件
+    """
+    width = max(1, int(round(width)))
+    height = max(1, int(round(height)))
+    pixmap = QPixmap(16, 16)
+    pixmap.fill(QColor(70, 40, 40))
+    # 占位像素不是源贴图的mip，级别至少为1，避免按路径生成和缓存mip
+    level = max(1, int(math.log2(max(width, height, 16) / 16.0)))
+    return pixmap, width, height, level
+
+def next_slot_id():
+    """
+    分配贴图槽编号，贴图项和轻量记录相互转换时保持不变，供脚本接口引用贴图
+    """
+    return next(_slot_ids)
+
 class ImageItem(QGraphicsItem):
     """
     贴图项类，继承自QGraphicsItem，
@@ -19,20 +46,31 @@ class ImageItem(QGraphicsItem):
     HANDLE_TOP_RIGHT = 1
     HANDLE_BOTTOM_LEFT = 2
     HANDLE_BOTTOM_RIGHT = 3
+    INTERACTIVE_MIP_BIAS = 0.5  # 交互时的缩放系数，0.5表示使用低一级的mip
     
-    def __init__(self, filepath, name="", parent=None):
+    def __init__(self, filepath, name="", parent=None, preview=None):
+        """
+        preview为会话快照中的低分辨率像素(QPixmap, 源宽, 源高, mip级别)，
+        给定时不读取源文件，源文件校验通过前也不会恢复分辨率
+        """
         super(ImageItem, self).__init__(parent)
         # 贴图基本属性
         self.id = id(self)  # 使用对象id作为唯一标识符
+        self.slot_id = next_slot_id()  # 贴图槽编号，转换为轻量记录后保持不变
         self.name = name or filepath.split("/")[-1]
         self.filepath = filepath
-        self.pixmap = QPixmap(filepath)
+        if preview is not None:
+            self.pixmap, self.width, self.height, self.resident_level = preview
+        else:
+            self.pixmap = load_pixmap(filepath)
+            self.width = self.pixmap.width()
+            self.height = self.pixmap.height()
+            self.resident_level = 0  # 当前持有的像素的mip级别，超出内存预算时由画布降级
+        self.source_validated = preview is None  # 源文件是否已确认与快照一致
+        self.source_missing = False  # 源文件是否已不存在，不存在时显示为占位并且不参与合成
         self.material_name = name or os.path.splitext(os.path.basename(filepath))[0]  # 使用不带扩展名的文件名作为默认值
         self.mesh_index = 0  # 添加mesh_index属性，默认为0
-        
-        # 位置和大小
-        self.width = self.pixmap.width()
-        self.height = self.pixmap.height()
+        self.maps = {}  # 其他通道的贴图{通道: 路径}，filepath为基础色，与其共用同一个贴图槽
         
         # 用户设置的初始尺寸（默认为原始尺寸）
         self.initial_width = self.width
@@ -56,9 +94,11 @@ class ImageItem(QGraphicsItem):
         # 设置接受悬停事件
         self.setAcceptHoverEvents(True)
         
-        # 拖拽状态
+        # 拖拽状态：鼠标事件只记录目标位置，由画布每帧统一提交一次
         self.dragging = False
         self.drag_start = QPointF()
+        self.drag_origins = []  # [(贴图项, 按下时的位置)]，包含一起拖动的所有选中项
+        self.pending_drag_pos = None
         
         # 网格吸附设置
         self.snap_to_grid = True
@@ -72,38 +112,178 @@ class ImageItem(QGraphicsItem):
         self.handle_color = QColor(0, 120, 215)  # 新增：手柄颜色
         self.handle_size = 12                   # 新增：手柄大小
         
+        # 不透明区域（源贴图像素），分析过透明边界后才有值
+        self.trim_bounds = trim_cache.lookup(filepath)
+        
     def boundingRect(self):
         """
-        返回贴图项的边界矩形
+        返回贴图项的边界矩形，即贴图本身的矩形
+        选中框和手柄由画布在前景层统一绘制，不计入边界
         """
-        margin = self.handle_size + self.HANDLE_MARGIN
-        return QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y).adjusted(-margin, -margin, margin, margin)
+        return QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y)
     
     def paint(self, painter, option, widget):
         """
         绘制贴图项
         """
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        # 画质由视图决定：交互时视图关闭平滑缩放，此时改用低一级的mip加快绘制
+        fast = not painter.testRenderHint(QPainter.SmoothPixmapTransform)
         
-        # 绘制贴图
+        # 绘制贴图，缩小显示时使用缓存的低级别mip
         if self.visible:
             target_rect = QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y)
-            source_rect = QRectF(0, 0, self.width, self.height)
-            painter.drawPixmap(target_rect, self.pixmap, source_rect)
-        
-        # 如果被选中，绘制边框和手柄
-        if self.isSelected():
-            pen = QPen(self.handle_color, 2, Qt.DashLine)
-            painter.setPen(pen)
-            painter.setBrush(QBrush(Qt.transparent))
-            painter.drawRect(QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y))
-            # 绘制四角手柄
-            for rect in self.handleRects():
-                painter.setBrush(QBrush(self.handle_color))
-                painter.setPen(Qt.NoPen)
-                painter.drawRect(rect)
+            scale = option.levelOfDetailFromTransform(painter.worldTransform()) * max(self.scale_x, self.scale_y)
+            if fast:
+                scale *= self.INTERACTIVE_MIP_BIAS
+            pixmap = self.pixmap_for_scale(scale)
+            painter.drawPixmap(target_rect, pixmap, QRectF(pixmap.rect()))
+            
+            # 源文件不存在时绘制占位标记
+            if self.source_missing:
+                painter.setPen(QPen(QColor(220, 60, 60), 2))
+                painter.setBrush(QBrush(QColor(220, 60, 60, 120), Qt.BDiagPattern))
+                painter.drawRect(target_rect)
+                return
+            
+            # 绘制裁剪透明边界后的矩形
+            trim_rect = self.trim_rect()
+            if trim_rect is not None:
+                painter.setPen(QPen(QColor(255, 200, 0), 1, Qt.DashDotLine))
+                painter.setBrush(QBrush(Qt.transparent))
+                painter.drawRect(trim_rect)
+            
+    def paint_selection(self, painter):
+        """
+        绘制选中框和四角手柄，painter使用贴图项坐标，由画布的前景层调用
+        """
+        pen = QPen(self.handle_color, 2, Qt.DashLine)
+        painter.setPen(pen)
+        painter.setBrush(QBrush(Qt.transparent))
+        painter.drawRect(self.boundingRect())
+        # 绘制四角手柄
+        painter.setBrush(QBrush(self.handle_color))
+        painter.setPen(Qt.NoPen)
+        for rect in self.handleRects():
+            painter.drawRect(rect)
+            
+    def selection_scene_rect(self):
+        """
+        返回选中框和手柄在场景中占据的矩形
+        """
+        margin = self.handle_size + self.HANDLE_MARGIN
+        return self.mapRectToScene(self.boundingRect().adjusted(-margin, -margin, margin, margin))
             
+    def trim_rect(self):
+        """
+        返回不透明区域在贴图项坐标下的矩形，未分析或无需裁剪时返回None
+        """
+        bounds = self.trim_bounds
+        if bounds is None or not is_trimmed(bounds) or not bounds.width or not bounds.height:
+            return None
+        unit_x = self.width * self.scale_x / bounds.width
+        unit_y = self.height * self.scale_y / bounds.height
+        return QRectF(bounds.x0 * unit_x, bounds.y0 * unit_y,
+                      (bounds.x1 - bounds.x0) * unit_x, (bounds.y1 - bounds.y0) * unit_y)
+    
+    @staticmethod
+    def level_for_scale(scale):
+        """
+        返回屏幕上的缩放比例所需的mip级别
+        """
+        if scale <= 0 or scale >= 0.5:
+            return 0
+        return int(math.floor(math.log2(1.0 / scale)))
+    
+    def pixmap_for_scale(self, scale):
+        """
+        根据屏幕上的缩放比例选择合适的mip级别
+        已降级的贴图分辨率不足时先用低分辨率绘制，并请求画布恢复
+        """
+        level = self.level_for_scale(scale)
+        if self.resident_level > 0:
+            if level < self.resident_level and self.source_validated:
+                self.request_restore()
+            return self.pixmap
+        if level == 0:
+            return self.pixmap
+        return texture_cache.mip(self.filepath, self.pixmap, level)
+    
+    def pixel_bytes(self):
+        """
+        返回当前持有的像素数据大小
+        """
+        return self.pixmap.width() * self.pixmap.height() * max(1, self.pixmap.depth() // 8)
+    
+    def level_pixmap(self, level):
+        """
+        返回分辨率不高于第level级mip的像素及其级别，不读取源文件
+        """
+        if level <= self.resident_level:
+            return self.pixmap, self.resident_level
+        if self.resident_level == 0:
+            return texture_cache.mip(self.filepath, self.pixmap, level), level
+        pixmap = self.pixmap.scaled(max(1, self.width >> level), max(1, self.height >> level),
+                                    Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return pixmap, level
+    
+    def demote(self, level, demoted=None):
+        """
+        丢弃全分辨率像素，只保留第level级mip，显示尺寸不变
+        demoted为共享同一像素的贴图项已生成的(像素, 级别)，给定时直接使用
+        """
+        if level <= self.resident_level or self.pixmap.isNull():
+            return
+        self.pixmap, self.resident_level = demoted or self.level_pixmap(level)
+        self.update()
+    
+    def restore(self, level=0, pixmap=None):
+        """
+        恢复到第level级mip，pixmap为已解码的源贴图，为None时重新读取源贴图
+        """
+        if level >= self.resident_level:
+            return
+        if pixmap is None:
+            pixmap = load_pixmap(self.filepath)
+        if pixmap.isNull():
+            return
+        if (pixmap.width(), pixmap.height()) != (self.width, self.height):
+            # 源贴图尺寸已变化，按重新加载处理
+            self.reload_pixmap(pixmap)
+            return
+        self.pixmap = texture_cache.mip(self.filepath, pixmap, level)
+        self.resident_level = level
+        self.update()
+    
+    def request_restore(self):
+        """
+        请求画布在下一轮事件中按内存预算恢复贴图分辨率
+        """
+        scene = self.scene()
+        if scene is None:
+            return
+        for view in scene.views():
+            if hasattr(view, "schedule_pixel_budget"):
+                view.schedule_pixel_budget()
+                return
+    
+    def reload_pixmap(self, pixmap=None):
+        """
+        重新加载贴图像素，保持当前显示尺寸不变
+        """
+        display_width = self.width * self.scale_x
+        display_height = self.height * self.scale_y
+        self.prepareGeometryChange()
+        self.pixmap = pixmap if pixmap is not None else load_pixmap(self.filepath)
+        self.resident_level = 0
+        self.source_validated = True
+        self.source_missing = False
+        self.width = self.pixmap.width()
+        self.height = self.pixmap.height()
+        self.scale_x = display_width / self.width if self.width else 1.0
+        self.scale_y = display_height / self.height if self.height else 1.0
+        self.trim_bounds = trim_cache.lookup(self.filepath)
+        self.update()
+    
     def handleRects(self):
         # 返回四个手柄的QRectF列表
         w = self.width * self.scale_x
@@ -124,31 +304,22 @@ class ImageItem(QGraphicsItem):
                 return i
         return self.HANDLE_NONE
 
-    def mousePressEvent(self, event):
+    def begin_resize(self, handle, scene_pos):
         """
-        鼠标按下事件处理
+        开始通过手柄缩放，由画布在手柄上按下鼠标时调用
         """
-        if event.button() == Qt.LeftButton:
-            handle = self.handleAt(event.pos())
-            if handle != self.HANDLE_NONE:
-                self.resizing = True
-                self.resize_handle = handle
-                self.resize_start_pos = event.scenePos()
-                self.resize_start_rect = QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y)
-                event.accept()
-                return
-            else:
-                self.dragging = True
-                self.drag_start = event.pos()
-        super(ImageItem, self).mousePressEvent(event)
+        self.resizing = True
+        self.resize_handle = handle
+        self.resize_start_pos = scene_pos
+        self.resize_start_rect = QRectF(0, 0, self.width * self.scale_x, self.height * self.scale_y)
         
-    def mouseMoveEvent(self, event):
+    def update_resize(self, scene_pos):
         """
-        鼠标移动事件处理
+        根据鼠标的场景坐标更新缩放，由画布每帧调用一次
         """
         if self.resizing:
             # 计算缩放
-            delta = event.scenePos() - self.resize_start_pos
+            delta = scene_pos - self.resize_start_pos
             rect = QRectF(self.resize_start_rect)
             if self.resize_handle == self.HANDLE_TOP_LEFT:
                 new_left = rect.left() + delta.x()
@@ -184,20 +355,38 @@ class ImageItem(QGraphicsItem):
             scale_y = rect.height() / self.height if self.height else 1.0
             self.set_scale(scale_x, scale_y)
             self.update()
-            event.accept()
-            return
-        elif self.dragging:
-            # 让基类处理移动
-            super(ImageItem, self).mouseMoveEvent(event)
             
-            # 如果启用了网格吸附，将位置吸附到网格
-            if self.snap_to_grid:
-                # 获取当前位置
-                current_pos = self.pos()
-                # 计算吸附位置
-                snapped_pos = self.snap_position(current_pos)
-                # 设置吸附后的位置
-                self.setPos(snapped_pos)
+    def end_resize(self):
+        """
+        结束缩放
+        """
+        self.resizing = False
+        self.resize_handle = self.HANDLE_NONE
+        
+    def mousePressEvent(self, event):
+        """
+        鼠标按下事件处理，手柄上的按下由画布处理
+        """
+        # 基类处理选中状态
+        super(ImageItem, self).mousePressEvent(event)
+        if event.button() == Qt.LeftButton:
+            self.dragging = True
+            self.drag_start = event.scenePos()
+            self.pending_drag_pos = None
+            items = self.scene().selectedItems() if self.scene() else []
+            if self not in items:
+                items = [self]
+            self.drag_origins = [(item, item.pos()) for item in items
+                                 if item.flags() & QGraphicsItem.ItemIsMovable]
+        
+    def mouseMoveEvent(self, event):
+        """
+        鼠标移动事件处理，只记录目标位置，由画布在下一帧提交
+        """
+        if self.dragging:
+            self.pending_drag_pos = event.scenePos()
+            self.request_commit()
+            event.accept()
         else:
             super(ImageItem, self).mouseMoveEvent(event)
         
@@ -205,22 +394,43 @@ class ImageItem(QGraphicsItem):
         """
         鼠标释放事件处理
         """
-        if event.button() == Qt.LeftButton:
-            if self.resizing:
-                self.resizing = False
-                self.resize_handle = self.HANDLE_NONE
-                event.accept()
-                return
+        if event.button() == Qt.LeftButton and self.dragging:
+            # 提交最后一次移动
+            self.commit_drag()
             self.dragging = False
-            
-            # 如果启用了网格吸附，确保最终位置吸附到网格
-            if self.snap_to_grid:
-                current_pos = self.pos()
-                snapped_pos = self.snap_position(current_pos)
-                self.setPos(snapped_pos)
+            self.drag_origins = []
                 
         super(ImageItem, self).mouseReleaseEvent(event)
         
+    def request_commit(self):
+        """
+        请求画布在下一帧提交本贴图项待处理的几何变化
+        """
+        scene = self.scene()
+        if scene is None:
+            self.commit_drag()
+            return
+        for view in scene.views():
+            if hasattr(view, "schedule_geometry_commit"):
+                view.schedule_geometry_commit(self)
+                return
+        self.commit_drag()
+        
+    def commit_drag(self):
+        """
+        根据最新的鼠标位置求解拖拽目标：被拖动的贴图项吸附到网格，
+        其他选中项保持相对位置，每个贴图项只设置一次位置
+        """
+        if self.pending_drag_pos is None:
+            return
+        delta = self.pending_drag_pos - self.drag_start
+        self.pending_drag_pos = None
+        origins = dict(self.drag_origins)
+        origin = origins.get(self, self.pos())
+        offset = self.snap_position(origin + delta) - origin
+        for item, start in self.drag_origins:
+            item.setPos(start + offset)
+        
     def resize(self, width, height):
         """
         调整贴图大小
@@ -293,7 +503,7 @@ class ImageItem(QGraphicsItem):
         x_percent = pos.x() / scene_width
         y_percent = pos.y() / scene_height
         
-        return {
+        data = {
             "filepath": self.filepath,
             "material_name": self.material_name,
             "mesh_index": self.mesh_index,
@@ -309,6 +519,16 @@ class ImageItem(QGraphicsItem):
             "zIndex": self.zValue(),
             "visible": self.visible
         }
+        if self.maps:
+            data["maps"] = dict(self.maps)
+        if self.source_missing:
+            data["missing"] = True
+        
+        # 导出裁剪透明边界的偏移
+        trim = trim_record(self.trim_bounds)
+        if trim is not None:
+            data["trim"] = trim
+        return data
 
     def set_handle_color(self, color):
         """
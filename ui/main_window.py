@@ -6,13 +6,30 @@ import sys
 import json
 from PyQt5.QtWidgets import (QMainWindow, QAction, QFileDialog, QSplitter, 
                              QStatusBar, QMessageBox, QToolBar, QWidget,
-                             QVBoxLayout)
-from PyQt5.QtCore import Qt, QSettings
-from PyQt5.QtGui import QIcon, QColor
+                             QVBoxLayout, QApplication, QLabel)
+from PyQt5.QtCore import Qt, QSettings, QPointF, QStandardPaths, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QColor, QPixmap, QPalette
 
 from ui.canvas_widget import CanvasWidget
 from ui.tool_panel import ToolPanel
 from ui.image_item import ImageItem
+from ui.slot_proxy import SlotProxy
+from ui.export_preview import ExportPreviewWidget
+from ui.mip_check_dialog import MipCheckDialog
+from core.image_metadata import probe_images
+from core.image_loader import load_pixmap
+from core.texture_cache import texture_cache
+from core.texture_watcher import TextureWatcher
+from core.lod_generator import generate_lod_atlases
+from core.alpha_trim import trim_cache, is_trimmed
+from core.texture_hash import DuplicateChecker, remember_hash
+from core.texture_catalog import TextureCatalog, CatalogScanner
+from core.layout_server import LayoutServer, RpcError, INVALID_PARAMS
+from core.build_cache import BuildCache, default_cache_dir
+from core.startup_profile import startup_profile
+from core.session_snapshot import SessionSnapshot, SnapshotValidator, default_snapshot_dir
+from core.pixel_budget import demoted_level
+from core.texture_maps import discover_maps, group_map_files
 
 class MainWindow(QMainWindow):
     """
@@ -20,13 +37,22 @@ class MainWindow(QMainWindow):
     并添加菜单栏、工具栏和状态栏。
     """
     
+    # 自定义信号
+    session_restored = pyqtSignal()  # 首帧显示后上次的会话设置恢复完成信号
+    
     def __init__(self):
         super(MainWindow, self).__init__()
         # 直接设置窗口置顶标志
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
-        self.init_ui()
+        self.session_ready = False
+        with startup_profile.phase("创建界面"):
+            self.init_ui()
         self.current_file = None
-        self.init_settings()
+        with startup_profile.phase("读取窗口设置"):
+            self.init_settings()
+        if self.restore_snapshot_action.isChecked():
+            with startup_profile.phase("恢复场景快照"):
+                self.restore_snapshot()
         self.always_on_top = True
         
     def init_ui(self):
@@ -52,6 +78,9 @@ class MainWindow(QMainWindow):
         # 创建工具面板
         self.tool_panel = ToolPanel()
         
+        # 导出预览在首次打开时才创建，放在画布和工具面板之间
+        self.export_preview = None
+        
         # 添加组件到分割器
         self.splitter.addWidget(self.canvas)
         self.splitter.addWidget(self.tool_panel)
@@ -70,6 +99,51 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
         
+        # 图集占用统计
+        self.utilization_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.utilization_label)
+        
+        # 贴图像素内存占用
+        self.pixel_usage_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.pixel_usage_label)
+        
+        # 画布绘制耗时，打开后定时刷新
+        self.render_stats_label = QLabel("")
+        self.render_stats_label.setVisible(False)
+        self.status_bar.addPermanentWidget(self.render_stats_label)
+        self.render_stats_timer = QTimer(self)
+        self.render_stats_timer.setInterval(500)
+        self.render_stats_timer.timeout.connect(self.update_render_stats)
+        
+        # 贴图文件监视器，源贴图被重新导出时自动刷新
+        self.texture_watcher = TextureWatcher(parent=self)
+        
+        # 脚本接口：本地JSON-RPC服务，默认关闭
+        self.layout_server = LayoutServer(parent=self)
+        self.register_rpc_methods()
+        self._rpc_slot_map = None
+        self._published_slots = {}
+        self._published_canvas = None
+        self._layout_notify_timer = QTimer(self)
+        self._layout_notify_timer.setSingleShot(True)
+        self._layout_notify_timer.setInterval(50)
+        self._layout_notify_timer.timeout.connect(self.publish_layout_changes)
+        
+        # 会话快照，启动时先用低分辨率贴图画出上次的布局，再在后台校验源文件
+        self.session_snapshot = SessionSnapshot(default_snapshot_dir())
+        self.snapshot_validator = SnapshotValidator(self)
+        self._snapshot = None
+        
+        # 后台查重，只比较新加入的贴图
+        self.duplicate_checker = DuplicateChecker(self)
+        
+        # 图集缓存，内容相同的布局再次生成时直接复制，首次生成Lod图集时创建
+        self.build_cache = None
+        
+        # 贴图目录数据库和后台扫描器，首次使用时由ensure_catalog打开
+        self.texture_catalog = None
+        self.catalog_scanner = None
+        
         # 连接信号和槽
         self.connect_signals()
         
@@ -107,6 +181,16 @@ class MainWindow(QMainWindow):
         export_action.triggered.connect(self.export_layout)
         file_menu.addAction(export_action)
         
+        self.layout_server_action = QAction("启用脚本连接", self)
+        self.layout_server_action.setCheckable(True)
+        self.layout_server_action.toggled.connect(self.set_layout_server_enabled)
+        file_menu.addAction(self.layout_server_action)
+        
+        self.restore_snapshot_action = QAction("启动时恢复上次的布局", self)
+        self.restore_snapshot_action.setCheckable(True)
+        self.restore_snapshot_action.setChecked(True)
+        file_menu.addAction(self.restore_snapshot_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("退出", self)
@@ -129,12 +213,12 @@ class MainWindow(QMainWindow):
         
         zoom_in_action = QAction("放大选中图片", self)
         zoom_in_action.setShortcut("Ctrl++")
-        zoom_in_action.triggered.connect(lambda: self.canvas.scale(1.2, 1.2))
+        zoom_in_action.triggered.connect(lambda: self.canvas.zoom_view(1.2))
         view_menu.addAction(zoom_in_action)
         
         zoom_out_action = QAction("缩小选中图片", self)
         zoom_out_action.setShortcut("Ctrl+-")
-        zoom_out_action.triggered.connect(lambda: self.canvas.scale(1/1.2, 1/1.2))
+        zoom_out_action.triggered.connect(lambda: self.canvas.zoom_view(1/1.2))
         view_menu.addAction(zoom_out_action)
         
         reset_view_action = QAction("重置视图", self)
@@ -161,6 +245,24 @@ class MainWindow(QMainWindow):
         snap_to_grid_action.triggered.connect(lambda checked: self.canvas.set_snap_to_grid(checked))
         view_menu.addAction(snap_to_grid_action)
         
+        heatmap_action = QAction("显示占用热力图", self)
+        heatmap_action.setCheckable(True)
+        heatmap_action.setChecked(False)
+        heatmap_action.triggered.connect(lambda checked: self.canvas.set_heatmap_visible(checked))
+        view_menu.addAction(heatmap_action)
+        
+        self.adaptive_quality_action = QAction("交互时降低画质", self)
+        self.adaptive_quality_action.setCheckable(True)
+        self.adaptive_quality_action.setChecked(True)
+        self.adaptive_quality_action.triggered.connect(lambda checked: self.canvas.set_adaptive_quality(checked))
+        view_menu.addAction(self.adaptive_quality_action)
+        
+        render_stats_action = QAction("显示绘制耗时", self)
+        render_stats_action.setCheckable(True)
+        render_stats_action.setChecked(False)
+        render_stats_action.triggered.connect(self.set_render_stats_visible)
+        view_menu.addAction(render_stats_action)
+        
         # 贴图菜单
         image_menu = self.menuBar().addMenu("贴图")
         
@@ -168,11 +270,50 @@ class MainWindow(QMainWindow):
         add_image_action.triggered.connect(self.tool_panel.on_add_image_clicked)
         image_menu.addAction(add_image_action)
         
+        bulk_import_action = QAction("批量添加贴图", self)
+        bulk_import_action.triggered.connect(self.tool_panel.on_bulk_import_clicked)
+        image_menu.addAction(bulk_import_action)
+        
+        import_folder_action = QAction("导入文件夹", self)
+        import_folder_action.triggered.connect(self.tool_panel.on_import_folder_clicked)
+        image_menu.addAction(import_folder_action)
+        
+        mip_check_action = QAction("Mip对齐检查", self)
+        mip_check_action.triggered.connect(self.show_mip_check_dialog)
+        image_menu.addAction(mip_check_action)
+        
+        trim_action = QAction("分析透明边界", self)
+        trim_action.triggered.connect(self.analyze_alpha_trim)
+        image_menu.addAction(trim_action)
+        
+        trim_folder_action = QAction("分析文件夹透明边界", self)
+        trim_folder_action.triggered.connect(self.analyze_folder_alpha_trim)
+        image_menu.addAction(trim_folder_action)
+        
+        duplicates_action = QAction("查找重复贴图", self)
+        duplicates_action.triggered.connect(lambda: self.check_duplicates())
+        image_menu.addAction(duplicates_action)
+        
         delete_image_action = QAction("删除选中贴图", self)
         delete_image_action.setShortcut("Delete")
         delete_image_action.triggered.connect(self.delete_selected_images)
         image_menu.addAction(delete_image_action)
         
+        # 贴图库菜单
+        library_menu = self.menuBar().addMenu("贴图库")
+        
+        add_root_action = QAction("添加贴图根目录", self)
+        add_root_action.triggered.connect(self.add_catalog_root)
+        library_menu.addAction(add_root_action)
+        
+        rescan_action = QAction("重新扫描贴图库", self)
+        rescan_action.triggered.connect(lambda: self.rescan_catalog(full=False))
+        library_menu.addAction(rescan_action)
+        
+        full_rescan_action = QAction("完整扫描贴图库", self)
+        full_rescan_action.triggered.connect(lambda: self.rescan_catalog(full=True))
+        library_menu.addAction(full_rescan_action)
+        
         # 帮助菜单
         help_menu = self.menuBar().addMenu("帮助")
         
@@ -196,10 +337,29 @@ class MainWindow(QMainWindow):
         self.tool_panel.border_width_changed.connect(self.canvas.set_border_width)
         self.tool_panel.handle_color_changed.connect(self.canvas.set_handle_color)
         self.tool_panel.handle_size_changed.connect(self.canvas.set_handle_size)
+        self.tool_panel.pixel_budget_changed.connect(self.set_pixel_budget)
         self.tool_panel.export_signal.connect(self.export_layout_with_lod)
+        self.tool_panel.bulk_import_signal.connect(self.on_bulk_import)
+        self.tool_panel.generate_lods_signal.connect(self.generate_lod_atlases)
+        self.tool_panel.texture_browser_created.connect(self.on_texture_browser_created)
+        self.tool_panel.export_preview_toggled.connect(self.set_export_preview_visible)
         
         # 画布信号
         self.canvas.scene.selectionChanged.connect(self.on_selection_changed)
+        self.canvas.utilization_changed.connect(self.on_utilization_changed)
+        self.canvas.pixel_usage_changed.connect(self.on_pixel_usage_changed)
+        self.canvas.first_frame_painted.connect(self.on_first_frame)
+        # 贴图增删或重新虚拟化后，脚本接口的编号表失效
+        self.canvas.slots_changed.connect(self.clear_rpc_slot_map)
+        self.snapshot_validator.validated.connect(self.on_snapshot_validated)
+        self.duplicate_checker.finished.connect(self.on_duplicates_found)
+        self.canvas.images_dropped.connect(self.on_images_dropped)
+        self.canvas.scene.changed.connect(lambda regions: self.schedule_layout_notify())
+        self.canvas.scene.sceneRectChanged.connect(lambda rect: self.schedule_layout_notify())
+        self.layout_server.client_count_changed.connect(self.on_server_clients_changed)
+        
+        # 贴图文件变化信号
+        self.texture_watcher.textures_changed.connect(self.on_textures_changed)
         
         # 右侧主操作按钮
         self.tool_panel.new_btn.clicked.connect(self.new_file)
@@ -256,6 +416,7 @@ class MainWindow(QMainWindow):
     def init_settings(self):
         """
         初始化应用设置
+        首帧之前只恢复窗口位置和主题，其余设置在首帧显示后由restore_session恢复
         """
         self.settings = QSettings("VisualizationTexLayout", "TextureLayoutTool")
         
@@ -265,11 +426,51 @@ class MainWindow(QMainWindow):
         if self.settings.contains("window/state"):
             self.restoreState(self.settings.value("window/state"))
         
+        # 启动时是否恢复上次的布局
+        self.restore_snapshot_action.setChecked(self.settings.value("session/restore_on_launch", True, type=bool))
+        
+        # 读取上次的主题设置，默认使用深色主题
+        # 首帧之前只设置深色调色板，完整样式表在restore_session中应用
+        self.theme = self.settings.value("theme/current", "dark", type=str)
+        palette = self.palette()
+        for role in (QPalette.Window, QPalette.Base, QPalette.Button):
+            palette.setColor(role, QColor(45, 45, 45))
+        for role in (QPalette.WindowText, QPalette.Text, QPalette.ButtonText):
+            palette.setColor(role, QColor(255, 255, 255))
+        self.setPalette(palette)
+        self.canvas.setBackgroundBrush(QColor(45, 45, 45))
+            
+    def on_first_frame(self):
+        """
+        画布绘制出第一帧后，在下一轮事件中恢复会话设置
+        """
+        startup_profile.mark("首帧")
+        QTimer.singleShot(0, self.restore_session)
+        
+    def restore_session(self):
+        """
+        恢复上次的网格、画布大小、画质、内存上限、脚本连接和贴图库设置
+        """
+        if self.session_ready:
+            return
+        with startup_profile.phase("恢复会话"):
+            self.switch_theme(self.theme)
+            self.restore_session_settings()
+            self.seed_catalog_hashes()
+            if self._snapshot is not None:
+                self.snapshot_validator.validate(self._snapshot)
+        self.session_ready = True
+        self.session_restored.emit()
+        
+    def restore_session_settings(self):
+        """
+        读取首帧之后才需要的设置
+        """
         # 读取上次的网格设置
         if self.settings.contains("grid/visible"):
             visible = self.settings.value("grid/visible", type=bool)
             self.canvas.set_grid_visible(visible)
-            self.tool_panel.grid_visible_check.setChecked(visible)
+            self.tool_panel.set_grid_settings({"visible": visible})
         
         if self.settings.contains("grid/size"):
             size = self.settings.value("grid/size", type=float)
@@ -279,7 +480,7 @@ class MainWindow(QMainWindow):
         if self.settings.contains("grid/snap_enabled"):
             enabled = self.settings.value("grid/snap_enabled", type=bool)
             self.canvas.set_snap_to_grid(enabled)
-            self.tool_panel.snap_to_grid_check.setChecked(enabled)
+            self.tool_panel.set_grid_settings({"snap_enabled": enabled})
         
         # 读取上次的画布大小
         if self.settings.contains("canvas/width") and self.settings.contains("canvas/height"):
@@ -288,13 +489,20 @@ class MainWindow(QMainWindow):
             self.canvas.set_canvas_size(width, height)
             self.tool_panel.set_canvas_size(width, height)
             
-        # 读取上次的主题设置
-        if self.settings.contains("theme/current"):
-            theme = self.settings.value("theme/current", type=str)
-            self.switch_theme(theme)
-        else:
-            # 默认使用深色主题
-            self.switch_theme("dark")
+        # 读取上次的画质设置
+        if self.settings.contains("view/adaptive_quality"):
+            adaptive = self.settings.value("view/adaptive_quality", type=bool)
+            self.canvas.set_adaptive_quality(adaptive)
+            self.adaptive_quality_action.setChecked(adaptive)
+            
+        # 读取上次的贴图内存上限
+        if self.settings.contains("memory/budget_mb"):
+            self.tool_panel.set_pixel_budget(self.settings.value("memory/budget_mb", type=int))
+            
+        # 读取上次的脚本连接设置
+        if self.settings.value("server/enabled", False, type=bool):
+            self.layout_server_action.setChecked(True)
+
 
     def switch_theme(self, theme):
         """
@@ -357,17 +565,53 @@ class MainWindow(QMainWindow):
         # 保存窗口位置和大小
         self.settings.setValue("window/geometry", self.saveGeometry())
         self.settings.setValue("window/state", self.saveState())
+        self.settings.setValue("session/restore_on_launch", self.restore_snapshot_action.isChecked())
         
-        # 保存网格设置
-        grid_settings = self.canvas.get_grid_settings()
-        self.settings.setValue("grid/visible", grid_settings["visible"])
-        self.settings.setValue("grid/size", grid_settings["size"])
-        self.settings.setValue("grid/snap_enabled", grid_settings["snap_enabled"])
+        # 保存场景快照，下次启动时直接画出；不恢复布局时删除旧快照
+        try:
+            if self.restore_snapshot_action.isChecked():
+                self.save_snapshot()
+            else:
+                self.session_snapshot.clear()
+        except OSError as e:
+            QMessageBox.warning(self, "警告", f"保存会话快照失败：{str(e)}")
         
-        # 保存画布大小
-        canvas_rect = self.canvas.scene.sceneRect()
-        self.settings.setValue("canvas/width", int(canvas_rect.width()))
-        self.settings.setValue("canvas/height", int(canvas_rect.height()))
+        # 会话设置尚未恢复时（首帧之前关闭）保留上次保存的值
+        if self.session_ready:
+            # 保存网格设置
+            grid_settings = self.canvas.get_grid_settings()
+            self.settings.setValue("grid/visible", grid_settings["visible"])
+            self.settings.setValue("grid/size", grid_settings["size"])
+            self.settings.setValue("grid/snap_enabled", grid_settings["snap_enabled"])
+        
+            # 保存画布大小
+            canvas_rect = self.canvas.scene.sceneRect()
+            self.settings.setValue("canvas/width", int(canvas_rect.width()))
+            self.settings.setValue("canvas/height", int(canvas_rect.height()))
+        
+            # 保存画质设置
+            self.settings.setValue("view/adaptive_quality", self.canvas.adaptive_quality)
+        
+            # 保存贴图内存上限
+            self.settings.setValue("memory/budget_mb", self.canvas.pixel_budget.max_bytes // (1024 * 1024))
+        
+            # 保存脚本连接设置
+            self.settings.setValue("server/enabled", self.layout_server.is_running())
+        
+            # 保存贴图库文件夹，贴图库未打开过时保留上次的值
+            if self.tool_panel.texture_browser is not None:
+                self.settings.setValue("library/folder", self.tool_panel.texture_browser.folder)
+        
+        # 停止后台线程
+        self.layout_server.stop()
+        if self.export_preview is not None:
+            self.export_preview.shutdown()
+        if self.tool_panel.texture_browser is not None:
+            self.tool_panel.texture_browser.shutdown()
+        self.canvas.image_decoder.shutdown()
+        if self.texture_catalog is not None:
+            self.catalog_scanner.shutdown()
+            self.texture_catalog.close()
         
         event.accept()
     
@@ -384,6 +628,7 @@ class MainWindow(QMainWindow):
             # 创建图片项
             image_item = ImageItem(filepath, material_name)
             image_item.mesh_index = mesh_index  # 设置mesh_index
+            image_item.maps = discover_maps(filepath)  # 按文件名后缀查找法线、ORM等通道
             
             # 如果指定了大小，则调整图片大小
             if width is not None and height is not None:
@@ -407,11 +652,169 @@ class MainWindow(QMainWindow):
         """
         image_item = ImageItem(filepath, material_name)
         image_item.mesh_index = mesh_index  # 设置mesh_index
+        image_item.maps = discover_maps(filepath)
         if width > 0 and height > 0:
             image_item.resize(width, height)
         self.canvas.add_image(image_item)
         # 更新材质球列表
         self.update_material_list()
+        self.check_duplicates([filepath])
+    
+    def on_images_dropped(self, filepaths, scene_pos):
+        """
+        在指定场景位置创建贴图项，多个贴图依次错开排列
+        """
+        added = []
+        offset = QPointF(0, 0)
+        # 同一贴图的各通道一起拖入时只创建一个贴图槽
+        filepaths, _ = group_map_files(filepaths)
+        for filepath in filepaths:
+            material_name = os.path.splitext(os.path.basename(filepath))[0]
+            image_item = self.add_image(filepath, material_name)
+            if image_item is None:
+                continue
+            pos = scene_pos + offset
+            image_item.setPos(image_item.snap_position(pos))
+            offset += QPointF(32, 32)
+            added.append(filepath)
+        if added:
+            self.canvas.scene.clearSelection()
+            self.status_bar.showMessage(f"已添加 {len(added)} 个贴图")
+            self.check_duplicates(added)
+    
+    def on_bulk_import(self, filepaths):
+        """
+        批量导入贴图
+        只并行读取文件头获取尺寸，以轻量记录一次性加入画布，
+        贴图进入视口后才解码像素
+        """
+        proxies, failed = self.import_slots(filepaths)
+        self.status_bar.showMessage(f"已批量导入 {len(proxies)} 个贴图")
+        
+        if failed:
+            QMessageBox.warning(self, "警告", "以下文件无法识别：\n" + "\n".join(failed))
+        # 批量导入时不解码贴图，只比较文件内容
+        self.check_duplicates([path for path in filepaths if path not in failed], perceptual=False)
+    
+    def import_slots(self, filepaths):
+        """
+        以轻量记录按行依次排布导入贴图，超出画布宽度时换行
+        同一主体名的各通道贴图（如_BaseColor、_Normal、_ORM）合并为一个贴图槽
+        返回(新建的轻量记录列表, 无法识别的文件列表)
+        """
+        filepaths, grouped = group_map_files(filepaths)
+        infos = probe_images(filepaths)
+        canvas_width = self.canvas.scene.width()
+        
+        x = y = row_height = 0
+        failed = []
+        proxies = []
+        for filepath, info in zip(filepaths, infos):
+            if info is None:
+                failed.append(filepath)
+                continue
+            if x > 0 and x + info.width > canvas_width:
+                x = 0
+                y += row_height
+                row_height = 0
+            material_name = os.path.splitext(os.path.basename(filepath))[0]
+            # 只有基础色贴图槽查找其他通道，单独成槽的通道贴图和同名重复文件不带maps
+            maps = dict(discover_maps(filepath), **grouped[filepath]) if filepath in grouped else {}
+            proxy = SlotProxy(filepath, material_name, 0, x, y, info.width, info.height, maps=maps)
+            self.canvas.add_slot_proxy(proxy)
+            proxies.append(proxy)
+            x += info.width
+            row_height = max(row_height, info.height)
+            
+        self.canvas.update_virtualization()
+        self.clear_rpc_slot_map()
+        self.update_material_list()
+        self.schedule_layout_notify()
+        return proxies, failed
+    
+    def check_duplicates(self, new_paths=None, perceptual=True):
+        """
+        在后台检查画布中的重复贴图，new_paths不为None时只计算新贴图的指纹，
+        只把新贴图与已有贴图比较，结果由on_duplicates_found处理
+        """
+        paths = [slot.filepath for slot in self.canvas.slot_objects()]
+        if new_paths is not None:
+            new_paths = set(new_paths)
+            if not new_paths:
+                return
+            # 已有的贴图排在前面，合并时保留原来的源文件
+            paths.sort(key=lambda path: path in new_paths)
+        else:
+            self.status_bar.showMessage("正在检查重复贴图...")
+        self.duplicate_checker.check(paths, new_paths, perceptual)
+    
+    def on_duplicates_found(self, groups, new_paths):
+        """
+        后台查重完成，列出重复贴图；完全重复的贴图可合并为同一源文件，相似贴图只列出供检查
+        """
+        # 检查期间可能有贴图被删除或合并，只保留仍在画布中的路径
+        current = set(slot.filepath for slot in self.canvas.slot_objects())
+        groups = [dict(group, paths=[path for path in group["paths"] if path in current])
+                  for group in groups]
+        groups = [group for group in groups if len(group["paths"]) > 1]
+        if not groups:
+            if new_paths is None:
+                self.status_bar.showMessage("未发现重复贴图")
+            return
+        
+        exact = [group for group in groups if group["exact"]]
+        lines = []
+        for group in groups:
+            kind = "完全相同" if group["exact"] else "相似"
+            lines.append(f"[{kind}] " + "、".join(os.path.basename(path) for path in group["paths"]))
+        message = "发现重复贴图：\n" + "\n".join(lines)
+        
+        if not exact:
+            QMessageBox.information(self, "重复贴图", message)
+            return
+        reply = QMessageBox.question(
+            self, "重复贴图", message + "\n\n是否将完全相同的贴图合并为同一个源文件？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply == QMessageBox.Yes:
+            self.collapse_duplicates(exact)
+    
+    def collapse_duplicates(self, groups):
+        """
+        让重复的贴图槽引用每组第一个源文件，相同文件只解码一次
+        """
+        canonical = {}
+        for group in groups:
+            for path in group["paths"][1:]:
+                canonical[path] = group["paths"][0]
+        
+        # 其他通道贴图跟随保留的源文件：优先沿用已引用它的贴图槽，否则重新查找
+        slots = self.canvas.slot_objects()
+        target_maps = {}
+        for slot in slots:
+            if slot.filepath in canonical.values() and slot.filepath not in target_maps:
+                target_maps[slot.filepath] = slot.maps
+        
+        pixmaps = {}
+        collapsed = 0
+        for slot in slots:
+            target = canonical.get(slot.filepath)
+            if target is None:
+                continue
+            if target not in target_maps:
+                target_maps[target] = discover_maps(target)
+            slot.filepath = target
+            slot.maps = dict(target_maps[target])
+            if isinstance(slot, ImageItem):
+                if target not in pixmaps:
+                    pixmaps[target] = load_pixmap(target)
+                slot.reload_pixmap(pixmaps[target])
+            else:
+                slot.trim_bounds = trim_cache.lookup(target)
+            collapsed += 1
+        
+        self.refresh_texture_watch()
+        self.schedule_export_preview()
+        self.status_bar.showMessage(f"已将 {collapsed} 个贴图槽合并到共享源文件")
     
     def new_file(self):
         """
@@ -424,6 +827,7 @@ class MainWindow(QMainWindow):
         self.tool_panel.set_canvas_size(1024, 1024)
         # 清除预览图
         self.tool_panel.clear_preview()
+        self.refresh_texture_watch()
         self.status_bar.showMessage("已创建新文件")
     
     def open_file(self):
@@ -453,54 +857,23 @@ class MainWindow(QMainWindow):
             if "images" in layout_data:
                 for img_data in layout_data["images"]:
                     filepath = img_data.get("filepath", "")
-                    material_name = img_data.get("material_name", "")
-                    mesh_index = img_data.get("mesh_index", 0)
+                    
+                    # 文件已移动时在贴图库中查找同名文件
+                    if not os.path.exists(filepath):
+                        resolved = self.ensure_catalog().resolve(filepath)
+                        if resolved:
+                            self.status_bar.showMessage(f"已将 {filepath} 解析为 {resolved}")
+                            filepath = resolved
                     
                     if os.path.exists(filepath):
-                        # 创建贴图项
-                        image_item = self.add_image(filepath, material_name, None, None, mesh_index)
-                        
-                        if image_item:
-                            # 获取画布尺寸
-                            canvas_width = self.canvas.scene.width()
-                            canvas_height = self.canvas.scene.height()
-                            
-                            # 获取缩放比例
-                            scale = img_data.get("scale", {})
-                            scale_x = scale.get("x", 1.0)
-                            scale_y = scale.get("y", 1.0)
-                            
-                            # 计算实际尺寸
-                            target_width = int(canvas_width * scale_x)
-                            target_height = int(canvas_height * scale_y)
-                            
-                            # 调整图片大小
-                            image_item.resize(target_width, target_height)
-                            
-                            # 设置位置
-                            pos = img_data.get("position", {})
-                            x_percent = pos.get("x", 0)
-                            y_percent = pos.get("y", 0)
-                            
-                            # 将百分比转换为像素坐标
-                            x = x_percent * canvas_width
-                            y = y_percent * canvas_height
-                            image_item.setPos(x, y)
-                            
-                            # 设置旋转
-                            rotation = img_data.get("rotation", 0)
-                            image_item.setRotation(rotation)
-                            
-                            # 设置层级
-                            z_index = img_data.get("zIndex", 0)
-                            image_item.setZValue(z_index)
-                            
-                            # 设置可见性
-                            visible = img_data.get("visible", True)
-                            image_item.setVisible(visible)
+                        # 先以轻量记录加入画布，进入视口后再解码贴图
+                        self.canvas.add_slot_proxy(self.proxy_from_record(img_data, filepath))
                     else:
                         QMessageBox.warning(self, "警告", f"文件不存在：{filepath}")
                         
+            self.canvas.update_virtualization()
+            self.update_material_list()
+            
             # 更新当前文件路径
             self.current_file = file_path
             self.status_bar.showMessage(f"已打开文件：{file_path}")
@@ -508,6 +881,111 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"打开文件失败：{str(e)}")
     
+    def proxy_from_record(self, img_data, filepath, discover=True):
+        """
+        由布局记录（归一化的位置和缩放）生成轻量记录
+        discover为True时，没有maps字段的记录按文件名后缀查找其他通道
+        """
+        # 获取画布尺寸
+        canvas_width = self.canvas.scene.width()
+        canvas_height = self.canvas.scene.height()
+        
+        # 获取缩放比例，计算实际尺寸
+        scale = img_data.get("scale", {})
+        target_width = int(canvas_width * scale.get("x", 1.0))
+        target_height = int(canvas_height * scale.get("y", 1.0))
+        
+        # 将百分比位置转换为像素坐标
+        pos = img_data.get("position", {})
+        x = pos.get("x", 0) * canvas_width
+        y = pos.get("y", 0) * canvas_height
+        
+        # 旧布局没有maps字段时按文件名后缀查找其他通道
+        maps = img_data.get("maps") or (discover_maps(filepath) if discover else {})
+        
+        return SlotProxy(filepath, img_data.get("material_name", ""), img_data.get("mesh_index", 0),
+                         x, y, target_width, target_height,
+                         img_data.get("rotation", 0),
+                         img_data.get("zIndex", 0),
+                         img_data.get("visible", True),
+                         maps=maps)
+    
+    def save_snapshot(self):
+        """
+        写入会话快照：当前布局和画布中贴图项的低分辨率像素
+        """
+        previews = {}
+        for item in self.canvas.image_items():
+            if item.filepath in previews or item.pixmap.isNull():
+                continue
+            pixmap, level = item.level_pixmap(demoted_level(item.width, item.height))
+            previews[item.filepath] = (pixmap.toImage(), item.width, item.height, level)
+        self.session_snapshot.save(self.build_layout_data(), self.current_file, previews)
+    
+    def restore_snapshot(self):
+        """
+        由会话快照恢复上次的布局，有低分辨率像素的贴图直接创建贴图项，不读取源文件
+        """
+        snapshot = self.session_snapshot.load()
+        if snapshot is None or not snapshot["layout"].get("images"):
+            return
+        layout_data = snapshot["layout"]
+        canvas = layout_data.get("canvas", {})
+        self.canvas.set_canvas_size(int(canvas.get("width", 1024)), int(canvas.get("height", 1024)))
+        
+        previews = {}
+        for img_data in layout_data["images"]:
+            filepath = img_data.get("filepath", "")
+            if not filepath:
+                continue
+            # 快照由当前版本写入，没有maps字段说明没有其他通道，首帧前不查找文件夹
+            proxy = self.proxy_from_record(img_data, filepath, discover=False)
+            if filepath not in previews:
+                preview = self.session_snapshot.preview(snapshot, filepath)
+                if preview is not None:
+                    image, width, height, level = preview
+                    preview = (QPixmap.fromImage(image), width, height, level)
+                previews[filepath] = preview
+            if previews[filepath] is not None:
+                self.canvas.add_image(proxy.create_item(previews[filepath]))
+            else:
+                self.canvas.add_slot_proxy(proxy)
+        
+        self.current_file = snapshot.get("current_file")
+        self._snapshot = snapshot
+        self.status_bar.showMessage(f"已恢复上次的布局，共 {self.canvas.slot_count()} 个贴图，正在校验源文件")
+    
+    def on_snapshot_validated(self, stale, missing):
+        """
+        源文件校验完成：被修改的贴图重新解码，其余贴图交给内存预算按需恢复分辨率
+        """
+        self._snapshot = None
+        stale = set(stale)
+        missing = set(missing)
+        for filepath in stale:
+            texture_cache.invalidate(filepath)
+        # 源文件已不存在的贴图显示为占位，不参与导出预览和LOD合成
+        for proxy in self.canvas.slot_proxies:
+            proxy.source_missing = proxy.filepath in missing
+        for item in self.canvas.image_items():
+            if item.filepath in missing:
+                item.source_missing = True
+                item.update()
+                continue
+            if item.source_validated:
+                continue
+            if item.filepath in stale:
+                item.reload_pixmap()
+            item.source_validated = True
+        self.canvas.schedule_pixel_budget()
+        self.update_material_list()
+        self.schedule_export_preview()
+        
+        if missing:
+            self.status_bar.showMessage(f"上次布局中有 {len(missing)} 个贴图的源文件已不存在")
+        elif stale:
+            self.status_bar.showMessage(f"已重新加载 {len(stale)} 个在外部修改过的贴图")
+    
     def save_file(self):
         """
         保存文件
@@ -533,25 +1011,29 @@ class MainWindow(QMainWindow):
             self.save_layout_to_file(file_path)
             self.current_file = file_path
     
+    def build_layout_data(self, lod=None):
+        """
+        生成当前布局的字典数据
+        """
+        layout_data = {
+            "version": "1.0",
+            "canvas": {
+                "width": self.canvas.scene.width(),
+                "height": self.canvas.scene.height()
+            },
+            "grid": self.canvas.get_grid_settings(),
+            "images": self.canvas.collect_slot_data()
+        }
+        if lod is not None:
+            layout_data["lod"] = lod
+        return layout_data
+    
     def save_layout_to_file(self, filepath):
         """
         将当前布局保存到文件
         """
         try:
-            layout_data = {
-                "version": "1.0",
-                "canvas": {
-                    "width": self.canvas.scene.width(),
-                    "height": self.canvas.scene.height()
-                },
-                "grid": self.canvas.get_grid_settings(),
-                "images": []
-            }
-            
-            # 收集所有贴图项
-            for item in self.canvas.scene.items():
-                if isinstance(item, ImageItem):
-                    layout_data["images"].append(item.to_dict())
+            layout_data = self.build_layout_data()
             
             with open(filepath, 'w') as f:
                 json.dump(layout_data, f, indent=2)
@@ -616,6 +1098,8 @@ class MainWindow(QMainWindow):
         # 删除选中的贴图
         for item in selected_items:
             self.canvas.scene.removeItem(item)
+        self.clear_rpc_slot_map()
+        self.refresh_texture_watch()
             
         self.status_bar.showMessage(f"已删除 {len(selected_items)} 个贴图")
 
@@ -633,26 +1117,14 @@ class MainWindow(QMainWindow):
         else:
             self.tool_panel.update_detail_property(None)
             
-    def export_layout_with_lod(self, lod, export_path):
+    def export_layout_with_lod(self, lod, export_path, texture_size=None):
         """
         使用Lod导出布局数据
         """
         try:
-            layout_data = {
-                "version": "1.0",
-                "lod": int(lod),
-                "canvas": {
-                    "width": self.canvas.scene.width(),
-                    "height": self.canvas.scene.height()
-                },
-                "grid": self.canvas.get_grid_settings(),
-                "images": []
-            }
-            
-            # 收集所有贴图项
-            for item in self.canvas.scene.items():
-                if isinstance(item, ImageItem):
-                    layout_data["images"].append(item.to_dict())
+            layout_data = self.build_layout_data(lod=int(lod))
+            if texture_size:
+                layout_data["texture_size"] = {"width": texture_size, "height": texture_size}
             
             with open(export_path, 'w') as f:
                 json.dump(layout_data, f, indent=2)
@@ -663,22 +1135,421 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出布局数据失败: {str(e)}")
 
+    def generate_lod_atlases(self, export_path):
+        """
+        以当前布局为Lod0，按导出贴图尺寸生成Lod1-5的图集和导出记录
+        输出到导出路径所在目录，文件名以导出文件名为前缀
+        """
+        output_dir = os.path.dirname(export_path) or "."
+        basename = os.path.splitext(os.path.basename(export_path))[0] or "layout"
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            outputs = generate_lod_atlases(self.build_layout_data(lod=0), output_dir, basename,
+                                           cache=self.ensure_build_cache(),
+                                           texture_size=self.tool_panel.get_texture_size())
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "错误", f"生成Lod图集失败: {str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+        
+        self.status_bar.showMessage(f"已生成 {len(outputs)} 级Lod图集到: {output_dir}")
+        QMessageBox.information(self, "生成成功",
+                                "已生成以下文件：\n" + "\n".join(path for pair in outputs for path in pair))
+    
+    def show_mip_check_dialog(self):
+        """
+        按当前导出贴图尺寸检查mip对齐和间隙
+        """
+        dialog = MipCheckDialog(self.canvas, self.tool_panel.get_texture_size(), self)
+        dialog.exec_()
+        self.update_material_list()
+    
+    def analyze_alpha_trim(self):
+        """
+        并行分析画布中引用的所有贴图的透明边界
+        """
+        paths = [slot.filepath for slot in self.canvas.slot_objects()]
+        if paths:
+            self.run_alpha_trim(lambda: trim_cache.analyze_paths(paths))
+    
+    def analyze_folder_alpha_trim(self):
+        """
+        并行分析一个文件夹中所有贴图的透明边界，结果缓存后添加到画布的贴图直接使用
+        """
+        folder = QFileDialog.getExistingDirectory(self, "选择贴图文件夹", "")
+        if folder:
+            self.run_alpha_trim(lambda: trim_cache.analyze_folder(folder))
+    
+    def run_alpha_trim(self, analyze):
+        """
+        执行透明边界分析，并在画布中显示裁剪后的矩形
+        """
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            results = analyze()
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        for slot in self.canvas.slot_objects():
+            slot.trim_bounds = trim_cache.lookup(slot.filepath)
+            if isinstance(slot, ImageItem):
+                slot.update()
+        
+        trimmed = [bounds for bounds in results.values() if is_trimmed(bounds)]
+        saved = sum(1.0 - (bounds.x1 - bounds.x0) * (bounds.y1 - bounds.y0) /
+                    float(bounds.width * bounds.height) for bounds in trimmed if bounds.width and bounds.height)
+        average = saved / len(trimmed) if trimmed else 0.0
+        self.status_bar.showMessage(
+            f"已分析 {len(results)} 个贴图，其中 {len(trimmed)} 个有透明边界，平均可节省 {average:.1%} 面积")
+    
+    def add_catalog_root(self):
+        """
+        添加贴图根目录并扫描
+        """
+        folder = QFileDialog.getExistingDirectory(self, "选择贴图根目录", "")
+        if folder:
+            self.ensure_catalog().add_root(folder)
+            self.rescan_catalog()
+    
+    def rescan_catalog(self, full=False):
+        """
+        在后台增量扫描贴图库，只处理有变化的目录和文件，完成后由on_catalog_rescanned刷新
+        """
+        if not self.ensure_catalog().roots():
+            self.status_bar.showMessage("贴图库中没有根目录")
+            return
+        self.status_bar.showMessage("正在扫描贴图库...")
+        self.catalog_scanner.rescan(full=full)
+    
+    def on_catalog_rescanned(self, stats):
+        """
+        贴图库扫描完成，更新哈希缓存并刷新贴图库浏览
+        """
+        self.seed_catalog_hashes()
+        if self.tool_panel.texture_browser is not None:
+            self.tool_panel.texture_browser.refresh()
+        self.status_bar.showMessage(
+            f"贴图库扫描完成：检查 {stats['directories']} 个目录，更新 {stats['indexed']} 个贴图，"
+            f"移除 {stats['removed']} 个贴图")
+    
+    def seed_catalog_hashes(self):
+        """
+        把贴图库中的内容哈希提供给重复检查，未修改的文件无需重新读取
+        """
+        for path, signature, value in self.ensure_catalog().known_hashes():
+            remember_hash(path, signature, value)
+    
+    def ensure_catalog(self):
+        """
+        返回贴图目录数据库，首次使用时打开数据库并创建后台扫描器
+        """
+        if self.texture_catalog is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation)
+            self.texture_catalog = TextureCatalog(os.path.join(
+                data_dir or os.path.expanduser("~"), "VisualizationTexLayout", "catalog.sqlite3"))
+            # 贴图库扫描在后台线程中使用单独的数据库连接
+            self.catalog_scanner = CatalogScanner(self.texture_catalog.db_path, self)
+            self.catalog_scanner.finished.connect(self.on_catalog_rescanned)
+            self.catalog_scanner.failed.connect(
+                lambda message: self.status_bar.showMessage(f"贴图库扫描失败: {message}"))
+            if self.tool_panel.texture_browser is not None:
+                self.tool_panel.texture_browser.set_catalog(self.texture_catalog)
+        return self.texture_catalog
+    
+    def ensure_build_cache(self):
+        """
+        返回图集缓存，首次生成Lod图集时创建缓存目录
+        """
+        if self.build_cache is None:
+            self.build_cache = BuildCache(default_cache_dir())
+        return self.build_cache
+    
+    def on_texture_browser_created(self, browser):
+        """
+        贴图库选项卡首次打开，连接信号并恢复上次浏览的文件夹
+        """
+        browser.set_catalog(self.ensure_catalog())
+        browser.catalog_outdated.connect(lambda folder: self.rescan_catalog())
+        browser.texture_activated.connect(
+            lambda filepath: self.on_images_dropped([filepath], self.canvas.mapToScene(
+                self.canvas.viewport().rect().center())))
+        library_folder = self.settings.value("library/folder", "", type=str)
+        if library_folder and os.path.isdir(library_folder):
+            browser.set_folder(library_folder)
+    
+    def ensure_export_preview(self):
+        """
+        返回导出预览组件，首次打开时创建并插入到画布和工具面板之间
+        """
+        if self.export_preview is None:
+            self.export_preview = ExportPreviewWidget(self.canvas.collect_slot_data)
+            self.export_preview.setVisible(False)
+            self.splitter.insertWidget(1, self.export_preview)
+            self.tool_panel.texture_size_changed.connect(self.export_preview.set_texture_size)
+            self.canvas.scene.changed.connect(lambda regions: self.export_preview.schedule())
+            self.texture_watcher.textures_changed.connect(self.export_preview.invalidate_sources)
+        return self.export_preview
+    
+    def schedule_export_preview(self):
+        """
+        导出预览已打开时请求刷新
+        """
+        if self.export_preview is not None:
+            self.export_preview.schedule()
+    
+    def set_export_preview_visible(self, visible):
+        """
+        显示或隐藏画布旁的导出预览
+        """
+        if not visible and self.export_preview is None:
+            return
+        self.ensure_export_preview().set_texture_size(self.tool_panel.get_texture_size())
+        self.export_preview.setVisible(visible)
+        if visible:
+            sizes = self.splitter.sizes()
+            if sizes[1] == 0:
+                self.splitter.setSizes([sizes[0] - 300, 300, sizes[2]])
+    
     def update_material_list(self):
         """
         更新材质球列表
         """
         # 获取所有贴图项
-        image_items = [item for item in self.canvas.scene.items() 
-                      if isinstance(item, ImageItem)]
+        image_items = self.canvas.image_items()
+        slot_count = self.canvas.slot_count()
         
         # 更新工具面板的细节属性
-        if len(image_items) == 1:
+        if slot_count == 1 and len(image_items) == 1:
             self.tool_panel.update_detail_property(image_items[0])
         else:
             self.tool_panel.update_detail_property(None)
             
+        # 更新被监视的贴图文件
+        self.refresh_texture_watch()
+            
         # 更新状态栏
-        self.status_bar.showMessage(f"当前共有 {len(image_items)} 个贴图")
+        self.status_bar.showMessage(f"当前共有 {slot_count} 个贴图")
+        
+    def on_utilization_changed(self, stats):
+        """
+        在状态栏显示图集占用统计
+        """
+        self.utilization_label.setText(
+            f"占用 {stats['occupied']:.1%}  浪费 {stats['wasted']:.1%}  重叠 {stats['overlap']:.1%}")
+        
+    def set_pixel_budget(self, megabytes):
+        """
+        设置贴图像素内存上限
+        """
+        self.canvas.set_pixel_budget(megabytes * 1024 * 1024)
+        
+    def on_pixel_usage_changed(self, used, budget):
+        """
+        在状态栏显示贴图像素内存占用
+        """
+        self.pixel_usage_label.setText(f"贴图内存 {used / 1024 ** 2:.0f} / {budget / 1024 ** 2:.0f} MB")
+        
+    def set_render_stats_visible(self, visible):
+        """
+        显示或隐藏画布绘制耗时
+        """
+        self.render_stats_label.setVisible(visible)
+        if visible:
+            self.update_render_stats()
+            self.render_stats_timer.start()
+        else:
+            self.render_stats_timer.stop()
+        
+    def update_render_stats(self):
+        """
+        在状态栏显示交互中和静止时的平均每帧绘制耗时
+        """
+        stats = self.canvas.render_stats()
+        parts = []
+        for key, label in (("interactive", "交互"), ("idle", "静止")):
+            value = stats[key]
+            parts.append(f"{label} {value:.1f} ms" if value is not None else f"{label} -")
+        self.render_stats_label.setText("绘制 " + "  ".join(parts))
+        
+    def refresh_texture_watch(self):
+        """
+        使文件监视器与画布中引用的贴图路径保持一致
+        """
+        paths = [item.filepath for item in self.canvas.image_items()]
+        paths.extend(proxy.filepath for proxy in self.canvas.slot_proxies)
+        self.texture_watcher.set_paths(paths)
+        
+    def on_textures_changed(self, filepaths):
+        """
+        源贴图文件变化时，只重新解码引用了这些文件的贴图项
+        """
+        changed = set(filepaths)
+        for filepath in filepaths:
+            texture_cache.invalidate(filepath)
+        
+        # 同一文件只解码一次，由引用它的贴图项共享
+        pixmaps = {}
+        refreshed = 0
+        for item in self.canvas.image_items():
+            path = os.path.abspath(item.filepath)
+            if path not in changed:
+                continue
+            texture_cache.invalidate(item.filepath)
+            if path not in pixmaps:
+                pixmaps[path] = load_pixmap(item.filepath)
+            item.reload_pixmap(pixmaps[path])
+            refreshed += 1
+        # 轻量记录不持有像素，只重新查询不透明区域
+        for proxy in self.canvas.slot_proxies:
+            if os.path.abspath(proxy.filepath) in changed:
+                proxy.trim_bounds = trim_cache.lookup(proxy.filepath)
+            
+        if refreshed:
+            self.status_bar.showMessage(f"已重新加载 {refreshed} 个贴图")
+
+    def set_layout_server_enabled(self, enabled):
+        """
+        启动或停止脚本连接服务
+        """
+        if not enabled:
+            self.layout_server.stop()
+            self.status_bar.showMessage("已关闭脚本连接")
+            return
+        if not self.layout_server.start():
+            self.layout_server_action.setChecked(False)
+            QMessageBox.warning(self, "警告", "启动脚本连接服务失败：" + self.layout_server.server.errorString())
+            return
+        self.status_bar.showMessage(f"脚本连接已启用：{self.layout_server.full_server_name()}")
+
+    def on_server_clients_changed(self, count):
+        """
+        有客户端连接时以当前布局为基准，之后只推送变化
+        """
+        if count:
+            self._published_slots = {record["id"]: record for record in self.slot_records()}
+            self._published_canvas = self.canvas_record()
+        self.status_bar.showMessage(f"脚本连接：{count} 个客户端")
+
+    def register_rpc_methods(self):
+        """
+        注册脚本接口方法
+        """
+        self.layout_server.register("layout.get", self.rpc_get_layout)
+        self.layout_server.register("slot.set_transform", self.rpc_set_slot_transform)
+        self.layout_server.register("slots.import", self.rpc_import_slots)
+        self.layout_server.register("layout.export", self.rpc_export_layout)
+
+    def canvas_record(self):
+        return {"width": self.canvas.scene.width(), "height": self.canvas.scene.height()}
+
+    def slot_records(self, slots=None):
+        """
+        返回贴图的字典数据，附带贴图槽编号"id"
+        """
+        if slots is None:
+            slots = self.canvas.slot_objects()
+        records = self.canvas.collect_slot_data(slots)
+        for slot, record in zip(slots, records):
+            record["id"] = slot.slot_id
+        return records
+
+    def rpc_slot(self, slot_id):
+        """
+        按编号查找贴图，编号表在同一轮事件中复用，一次批量请求只建立一次；
+        贴图增删或重新虚拟化时编号表立即失效
+        """
+        if self._rpc_slot_map is None:
+            self._rpc_slot_map = self.canvas.slot_map()
+            QTimer.singleShot(0, self.clear_rpc_slot_map)
+        slot = self._rpc_slot_map.get(slot_id)
+        if slot is None:
+            raise RpcError(INVALID_PARAMS, "Unknown slot id", slot_id)
+        return slot
+
+    def clear_rpc_slot_map(self):
+        self._rpc_slot_map = None
+
+    def rpc_get_layout(self):
+        """
+        layout.get：返回当前布局，格式与导出数据一致，每个贴图附带编号
+        """
+        layout_data = self.build_layout_data()
+        layout_data["images"] = self.slot_records()
+        return layout_data
+
+    def rpc_set_slot_transform(self, id, position=None, scale=None, rotation=None,
+                               zIndex=None, visible=None, **fields):
+        """
+        slot.set_transform：设置贴图的位置和大小（相对画布的比例，与导出数据一致）、旋转、层级和可见性，
+        未给出的字段保持不变，其他字段忽略，可直接发回layout.get得到的记录
+        """
+        slot = self.rpc_slot(id)
+        canvas_width = self.canvas.scene.width()
+        canvas_height = self.canvas.scene.height()
+        if position is not None or scale is not None:
+            x, y, width, height = self.canvas.slot_geometry(slot)
+            if position is not None:
+                x = position.get("x", x / canvas_width) * canvas_width
+                y = position.get("y", y / canvas_height) * canvas_height
+            if scale is not None:
+                width = scale.get("x", width / canvas_width) * canvas_width
+                height = scale.get("y", height / canvas_height) * canvas_height
+            self.canvas.set_slot_geometry(slot, x, y, width, height)
+        self.canvas.set_slot_properties(slot, rotation, zIndex, visible)
+        self.schedule_layout_notify()
+        return True
+
+    def rpc_import_slots(self, paths):
+        """
+        slots.import：批量导入贴图，返回新建贴图的记录和无法识别的文件
+        """
+        if not isinstance(paths, list):
+            raise RpcError(INVALID_PARAMS, "paths must be a list")
+        proxies, failed = self.import_slots(paths)
+        self.status_bar.showMessage(f"脚本导入 {len(proxies)} 个贴图")
+        return {"slots": self.slot_records(proxies), "failed": failed}
+
+    def rpc_export_layout(self, path=None, lod=0, texture_size=None):
+        """
+        layout.export：生成导出数据，给出path时写入文件并返回路径，否则直接返回导出数据
+        """
+        layout_data = self.build_layout_data(lod=int(lod))
+        if texture_size:
+            layout_data["texture_size"] = {"width": texture_size, "height": texture_size}
+        if path is None:
+            return layout_data
+        with open(path, 'w') as f:
+            json.dump(layout_data, f, indent=2)
+        return {"path": path}
+
+    def schedule_layout_notify(self):
+        """
+        有脚本连接时，合并短时间内的多次布局变化后推送
+        """
+        if self.layout_server.clients and not self._layout_notify_timer.isActive():
+            self._layout_notify_timer.start()
+
+    def publish_layout_changes(self):
+        """
+        与上次推送的布局比较，向客户端推送layout.changed通知，只包含变化和删除的贴图
+        """
+        if not self.layout_server.clients:
+            return
+        records = {record["id"]: record for record in self.slot_records()}
+        changed = [record for slot_id, record in records.items()
+                   if self._published_slots.get(slot_id) != record]
+        removed = [slot_id for slot_id in self._published_slots if slot_id not in records]
+        canvas = self.canvas_record()
+        if not changed and not removed and canvas == self._published_canvas:
+            return
+        params = {"slots": changed, "removed": removed}
+        if canvas != self._published_canvas:
+            params["canvas"] = canvas
+        self._published_slots = records
+        self._published_canvas = canvas
+        self.layout_server.notify("layout.changed", params)
 
     def toggle_always_on_top(self):
         """
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel,
+                             QPushButton, QSpinBox, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView, QMessageBox)
+from PyQt5.QtCore import Qt
+
+from ui.image_item import ImageItem
+from core.mip_alignment import analyze_alignment, snap_records, ISSUE_MISALIGNED
+
+EDGE_LABELS = {"left": "左", "top": "上", "right": "右", "bottom": "下"}
+
+class MipCheckDialog(QDialog):
+    """
+    Mip对齐检查对话框，
+    按导出贴图尺寸检查各贴图在各级mip下的边界对齐和间隙，并可一键吸附到安全边界。
+    """
+
+    def __init__(self, canvas, texture_size, parent=None):
+        super(MipCheckDialog, self).__init__(parent)
+        self.canvas = canvas
+        self.texture_size = texture_size
+        self.slots = []
+        self.init_ui()
+        self.run_check()
+
+    def init_ui(self):
+        """
+        初始化界面
+        """
+        self.setWindowTitle("Mip对齐检查")
+        self.setMinimumSize(560, 420)
+
+        layout = QVBoxLayout(self)
+
+        settings_layout = QGridLayout()
+        settings_layout.addWidget(QLabel("贴图尺寸:"), 0, 0)
+        settings_layout.addWidget(QLabel(f"{self.texture_size} x {self.texture_size}"), 0, 1)
+
+        settings_layout.addWidget(QLabel("检查到Mip级别:"), 1, 0)
+        self.max_mip_spin = QSpinBox()
+        self.max_mip_spin.setRange(0, 8)
+        self.max_mip_spin.setValue(4)
+        settings_layout.addWidget(self.max_mip_spin, 1, 1)
+
+        settings_layout.addWidget(QLabel("最小间隙(各级像素):"), 2, 0)
+        self.gutter_spin = QSpinBox()
+        self.gutter_spin.setRange(0, 16)
+        self.gutter_spin.setValue(0)
+        self.gutter_spin.setToolTip("0表示允许贴图紧邻")
+        settings_layout.addWidget(self.gutter_spin, 2, 1)
+        layout.addLayout(settings_layout)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["材质名", "问题", "Mip", "详情"])
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.cellDoubleClicked.connect(self.on_row_double_clicked)
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel("")
+        layout.addWidget(self.summary_label)
+
+        button_layout = QHBoxLayout()
+        check_btn = QPushButton("重新检查")
+        check_btn.clicked.connect(self.run_check)
+        button_layout.addWidget(check_btn)
+
+        self.snap_btn = QPushButton("一键对齐到Mip安全边界")
+        self.snap_btn.clicked.connect(self.snap_to_mip_safe)
+        button_layout.addWidget(self.snap_btn)
+
+        button_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+    def visible_slots(self):
+        """
+        返回参与导出的贴图及其记录
+        """
+        slots = self.canvas.slot_objects()
+        records = self.canvas.collect_slot_data(slots)
+        pairs = [(slot, record) for slot, record in zip(slots, records)
+                 if record and record.get("visible", True)]
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def slot_name(self, index):
+        slot = self.slots[index]
+        return slot.material_name or os.path.basename(slot.filepath)
+
+    def run_check(self):
+        """
+        执行检查并刷新结果列表
+        """
+        self.slots, records = self.visible_slots()
+        max_mip = self.max_mip_spin.value()
+        result = analyze_alignment(records, self.texture_size, max_mip, self.gutter_spin.value())
+        issues = result["issues"]
+
+        self.table.setRowCount(len(issues))
+        for row, issue in enumerate(issues):
+            if issue["kind"] == ISSUE_MISALIGNED:
+                kind = "边界未对齐"
+                detail = "未对齐的边: " + "、".join(EDGE_LABELS[edge] for edge in issue["edges"])
+            else:
+                kind = "间隙不足"
+                detail = f"与 {self.slot_name(issue['other'])} 间隙 {issue['gap']:.2f} 像素"
+            values = [self.slot_name(issue["index"]), kind, str(issue["mip"]), detail]
+            for column, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                cell.setData(Qt.UserRole, issue["index"])
+                self.table.setItem(row, column, cell)
+
+        safe_count = sum(1 for level in result["safe_mip"] if level >= max_mip)
+        self.summary_label.setText(
+            f"共 {len(records)} 个贴图，{safe_count} 个在Mip0-{max_mip}均对齐，发现 {len(issues)} 个问题")
+        self.snap_btn.setEnabled(bool(records))
+
+    def snap_to_mip_safe(self):
+        """
+        把所有贴图的边界吸附到所检查最高mip级别的整像素上
+        """
+        slots, records = self.visible_slots()
+        if not slots:
+            return
+        scene_width = self.canvas.scene.width()
+        scene_height = self.canvas.scene.height()
+        for slot, (x, y, width, height) in zip(
+                slots, snap_records(records, self.texture_size, self.max_mip_spin.value())):
+            self.canvas.set_slot_geometry(slot, x * scene_width, y * scene_height,
+                                          width * scene_width, height * scene_height)
+        self.run_check()
+        if self.table.rowCount():
+            QMessageBox.information(self, "提示", "对齐后仍存在间隙问题，请调整贴图间距")
+
+    def on_row_double_clicked(self, row, column):
+        """
+        双击问题行时在画布中定位对应贴图
+        """
+        index = self.table.item(row, 0).data(Qt.UserRole)
+        slot = self.slots[index]
+        if isinstance(slot, ImageItem) and slot.scene() is not None:
+            self.canvas.scene.clearSelection()
+            slot.setSelected(True)
+            self.canvas.centerOn(slot)
+        else:
+            self.canvas.centerOn(slot.rect().center())
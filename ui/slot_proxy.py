@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from PyQt5.QtCore import QRectF
+
+from ui.image_item import ImageItem, next_slot_id, missing_preview
+from core.alpha_trim import trim_cache, trim_record
+
+class SlotProxy(object):
+    """
+    轻量贴图槽记录，
+    用于表示视口外或隐藏的贴图，不持有像素数据，也不加入场景。
+    进入视口后由画布提升为真正的ImageItem。
+    """
+
+    __slots__ = ("filepath", "material_name", "mesh_index",
+                 "x", "y", "width", "height", "initial_width", "initial_height",
+                 "rotation", "z_value", "visible", "slot_id", "maps", "source_missing", "trim_bounds")
+
+    def __init__(self, filepath, material_name="", mesh_index=0,
+                 x=0.0, y=0.0, width=0.0, height=0.0,
+                 rotation=0, z_value=0, visible=True, slot_id=None, maps=None, trim_bounds=None):
+        self.filepath = filepath
+        self.material_name = material_name
+        self.mesh_index = mesh_index
+        self.maps = dict(maps or {})  # 其他通道的贴图{通道: 路径}
+        # 场景坐标下的位置和显示尺寸（已包含缩放）
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        # 用户设置的初始尺寸，提升为贴图项时恢复
+        self.initial_width = width
+        self.initial_height = height
+        self.rotation = rotation
+        self.z_value = z_value
+        self.visible = visible
+        self.slot_id = slot_id if slot_id is not None else next_slot_id()
+        self.source_missing = False  # 源文件是否已不存在
+        # 不透明区域在创建时查询一次，导出时不再访问文件
+        self.trim_bounds = trim_bounds if trim_bounds is not None else trim_cache.lookup(filepath)
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        由贴图项生成轻量记录
+        """
+        pos = item.pos()
+        proxy = cls(item.filepath, item.material_name, item.mesh_index,
+                    pos.x(), pos.y(),
+                    item.width * item.scale_x, item.height * item.scale_y,
+                    item.rotation_angle, item.zValue(),
+                    item.visible and item.isVisible(), item.slot_id, item.maps, item.trim_bounds)
+        proxy.source_missing = item.source_missing
+        proxy.initial_width = item.initial_width
+        proxy.initial_height = item.initial_height
+        return proxy
+
+    def rect(self):
+        """
+        返回记录在场景中的矩形
+        """
+        return QRectF(self.x, self.y, self.width, self.height)
+
+    def create_item(self, preview=None):
+        """
+        创建对应的贴图项（此时才解码像素）
+        preview为会话快照中的低分辨率像素，给定时不解码源贴图；源文件不存在时使用占位像素
+        """
+        if preview is None and self.source_missing:
+            preview = missing_preview(self.width, self.height)
+        item = ImageItem(self.filepath, self.material_name, preview=preview)
+        item.source_missing = self.source_missing
+        item.trim_bounds = self.trim_bounds
+        item.mesh_index = self.mesh_index
+        item.maps = dict(self.maps)
+        item.slot_id = self.slot_id
+        if self.width > 0 and self.height > 0:
+            item.resize(self.width, self.height)
+        # resize会把初始尺寸设为当前显示尺寸，恢复为记录中保存的值
+        if self.initial_width > 0 and self.initial_height > 0:
+            item.initial_width = self.initial_width
+            item.initial_height = self.initial_height
+        item.setPos(self.x, self.y)
+        item.rotation_angle = self.rotation
+        item.setRotation(self.rotation)
+        item.setZValue(self.z_value)
+        item.setVisible(self.visible)
+        return item
+
+    def to_dict(self, scene_width, scene_height):
+        """
+        将记录转换为字典数据，格式与ImageItem.to_dict一致
+        """
+        if not scene_width or not scene_height:
+            return {}
+
+        data = {
+            "filepath": self.filepath,
+            "material_name": self.material_name,
+            "mesh_index": self.mesh_index,
+            "position": {
+                "x": self.x / scene_width,
+                "y": self.y / scene_height
+            },
+            "scale": {
+                "x": self.width / scene_width,
+                "y": self.height / scene_height
+            },
+            "rotation": self.rotation,
+            "zIndex": self.z_value,
+            "visible": self.visible
+        }
+        if self.maps:
+            data["maps"] = dict(self.maps)
+        if self.source_missing:
+            data["missing"] = True
+        trim = trim_record(self.trim_bounds)
+        if trim is not None:
+            data["trim"] = trim
+        return data
@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListView, QLineEdit,
+                             QComboBox, QPushButton, QLabel, QFileDialog, QAbstractItemView)
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThreadPool, QSize, QUrl, QMimeData,
+                          QAbstractListModel, QSortFilterProxyModel, QModelIndex,
+                          QStandardPaths, pyqtSignal)
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QColor
+
+from core.image_loader import load_qimage
+from core.image_metadata import SUPPORTED_EXTENSIONS, probe_images
+
+THUMBNAIL_SIZE = 96
+
+# 尺寸筛选，按贴图长边分档：(显示名称, 最小值, 最大值)
+SIZE_FILTERS = [
+    ("全部尺寸", 0, None),
+    ("256及以下", 0, 256),
+    ("512", 257, 512),
+    ("1024", 513, 1024),
+    ("2048", 1025, 2048),
+    ("4096及以上", 2049, None),
+]
+
+def thumbnail_cache_dir():
+    """
+    返回缩略图磁盘缓存目录
+    """
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    return os.path.join(base or os.path.expanduser("~/.cache"), "VisualizationTexLayout", "thumbnails")
+
+def thumbnail_cache_path(filepath, size):
+    """
+    缩略图在磁盘缓存中的路径，源文件修改后路径随之变化
+    """
+    stat = os.stat(filepath)
+    key = f"{os.path.abspath(filepath)}|{stat.st_mtime_ns}|{stat.st_size}|{size}"
+    return os.path.join(thumbnail_cache_dir(), hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".png")
+
+def render_thumbnail(filepath, size=THUMBNAIL_SIZE):
+    """
+    生成贴图的缩略图，可在工作线程中调用
+    优先读取磁盘缓存，非TGA格式由解码器直接按缩略图尺寸解码
+    """
+    cache_path = thumbnail_cache_path(filepath, size)
+    if os.path.exists(cache_path):
+        image = QImage(cache_path)
+        if not image.isNull():
+            return image
+
+    if os.path.splitext(filepath)[1].lower() == ".tga":
+        # 直接从内存映射缩放出持有像素的缩略图，不拷贝原尺寸的像素
+        image = load_qimage(filepath, size)
+    else:
+        reader = QImageReader(filepath)
+        source_size = reader.size()
+        if source_size.isValid():
+            reader.setScaledSize(source_size.scaled(size, size, Qt.KeepAspectRatio))
+        image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    image.save(cache_path, "PNG")
+    return image
+
+class _ThumbnailTask(QRunnable):
+    """
+    缩略图任务，执行时取最近请求的贴图，滚动时优先处理当前可见的单元格
+    """
+
+    def __init__(self, loader):
+        super(_ThumbnailTask, self).__init__()
+        self.loader = loader
+
+    def run(self):
+        filepath, generation = self.loader.take_request()
+        if filepath is None:
+            return
+        try:
+            image = render_thumbnail(filepath, self.loader.size)
+        except OSError:
+            image = QImage()
+        self.loader.thumbnail_ready.emit(filepath, image, generation)
+
+class ThumbnailLoader(QObject):
+    """
+    后台缩略图加载器，
+    使用线程池生成缩略图，同一贴图只请求一次，后请求的先处理。
+    """
+
+    # 自定义信号
+    thumbnail_ready = pyqtSignal(str, QImage, int)  # 缩略图完成信号，参数为文件路径、缩略图、请求批次
+
+    def __init__(self, size=THUMBNAIL_SIZE, parent=None):
+        super(ThumbnailLoader, self).__init__(parent)
+        self.size = size
+        self.generation = 0
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount())))
+
+    def request(self, filepath):
+        with self._lock:
+            if filepath in self._pending:
+                self._pending.move_to_end(filepath)
+                return
+            self._pending[filepath] = self.generation
+        self._pool.start(_ThumbnailTask(self))
+
+    def take_request(self):
+        with self._lock:
+            if not self._pending:
+                return None, None
+            return self._pending.popitem(last=True)
+
+    def cancel_all(self):
+        """
+        丢弃尚未开始的请求，已在生成中的结果按批次号忽略
+        """
+        with self._lock:
+            self._pending.clear()
+            self.generation += 1
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.waitForDone()
+
+class TextureLibraryModel(QAbstractListModel):
+    """
+    贴图库数据模型，
+    只保存路径和文件头中的尺寸，缩略图在单元格被绘制时才请求。
+    """
+
+    WidthRole = Qt.UserRole + 1
+    HeightRole = Qt.UserRole + 2
+    PathRole = Qt.UserRole + 3
+
+    def __init__(self, parent=None, max_cached=600):
+        super(TextureLibraryModel, self).__init__(parent)
+        self.entries = []   # [(路径, 名称, 宽, 高)]
+        self._rows = {}     # 路径 -> 行号
+        self._pixmaps = OrderedDict()  # 内存中的缩略图，超过上限时淘汰最久未显示的
+        self.max_cached = max_cached
+        self.catalog = None  # 贴图目录数据库，文件夹已被收录时直接查询
+        self.loader = ThumbnailLoader(parent=self)
+        self.loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self._placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self._placeholder.fill(QColor(60, 60, 60))
+
+    def set_folder(self, folder):
+        """
+        加载文件夹中的贴图
+        文件夹已被贴图目录收录且之后没有变化时直接查询数据库，否则只读取文件头。
+        返回False表示贴图目录中的记录已过期
+        """
+        if self.catalog is not None and self.catalog.has_directory(folder):
+            if self.catalog.is_current(folder):
+                self.set_entries([(row["path"], row["name"], row["width"], row["height"])
+                                  for row in self.catalog.query(directory=folder)])
+                return True
+            stale = True
+        else:
+            stale = self.catalog is not None and self.catalog.in_roots(folder)
+        paths = [os.path.join(folder, name).replace("\\", "/")
+                 for name in sorted(os.listdir(folder))
+                 if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS]
+        infos = probe_images(paths)
+        self.set_entries([(path, os.path.splitext(os.path.basename(path))[0], info.width, info.height)
+                          for path, info in zip(paths, infos) if info is not None])
+        return not stale
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.loader.cancel_all()
+        self.entries = list(entries)
+        self._rows = {entry[0]: row for row, entry in enumerate(self.entries)}
+        self._pixmaps.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, name, width, height = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.DecorationRole:
+            pixmap = self._pixmaps.get(path)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(path)
+                return pixmap
+            pixmap = self.catalog_thumbnail(path)
+            if pixmap is not None:
+                return pixmap
+            self.loader.request(path)
+            return self._placeholder
+        if role == Qt.ToolTipRole:
+            return f"{os.path.basename(path)}\n{width} x {height}"
+        if role == self.WidthRole:
+            return width
+        if role == self.HeightRole:
+            return height
+        if role == self.PathRole:
+            return path
+        return None
+
+    def flags(self, index):
+        flags = super(TextureLibraryModel, self).flags(index)
+        if index.isValid():
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        mime.setUrls([QUrl.fromLocalFile(self.entries[index.row()][0])
+                      for index in indexes if index.isValid()])
+        return mime
+
+    def catalog_thumbnail(self, filepath):
+        """
+        从贴图目录中读取缩略图
+        """
+        if self.catalog is None:
+            return None
+        data = self.catalog.thumbnail(filepath)
+        if data is None:
+            return None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data, "PNG"):
+            return None
+        self.cache_pixmap(filepath, pixmap)
+        return pixmap
+
+    def cache_pixmap(self, filepath, pixmap):
+        self._pixmaps[filepath] = pixmap
+        while len(self._pixmaps) > self.max_cached:
+            self._pixmaps.popitem(last=False)
+
+    def on_thumbnail_ready(self, filepath, image, generation):
+        if generation != self.loader.generation or filepath not in self._rows:
+            return
+        if image.isNull():
+            return
+        self.cache_pixmap(filepath, QPixmap.fromImage(image))
+        index = self.index(self._rows[filepath])
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class TextureFilterProxyModel(QSortFilterProxyModel):
+    """
+    按名称和尺寸筛选贴图，只使用模型中已有的数据，不访问文件
+    """
+
+    def __init__(self, parent=None):
+        super(TextureFilterProxyModel, self).__init__(parent)
+        self.name_filter = ""
+        self.min_size = 0
+        self.max_size = None
+
+    def set_name_filter(self, text):
+        self.name_filter = text.strip().lower()
+        self.invalidateFilter()
+
+    def set_size_filter(self, min_size, max_size):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        path, name, width, height = self.sourceModel().entries[source_row]
+        if self.name_filter and self.name_filter not in name.lower():
+            return False
+        longest = max(width, height)
+        if longest < self.min_size:
+            return False
+        if self.max_size is not None and longest > self.max_size:
+            return False
+        return True
+
+class TextureBrowserWidget(QWidget):
+    """
+    贴图库浏览组件，
+    以缩略图网格显示文件夹中的贴图，可双击或拖拽到画布添加。
+    """
+
+    # 自定义信号
+    texture_activated = pyqtSignal(str)  # 双击贴图信号，参数为文件路径
+    catalog_outdated = pyqtSignal(str)  # 贴图目录中的文件夹记录已过期信号，参数为文件夹路径
+
+    def __init__(self, parent=None):
+        super(TextureBrowserWidget, self).__init__(parent)
+        self.folder = ""
+        self.init_ui()
+
+    def init_ui(self):
+        """
+        初始化界面
+        """
+        layout = QVBoxLayout(self)
+
+        folder_layout = QHBoxLayout()
+        self.folder_btn = QPushButton("选择文件夹")
+        self.folder_btn.clicked.connect(self.on_choose_folder_clicked)
+        folder_layout.addWidget(self.folder_btn)
+        self.folder_label = QLabel("未选择文件夹")
+        self.folder_label.setWordWrap(True)
+        folder_layout.addWidget(self.folder_label, 1)
+        layout.addLayout(folder_layout)
+
+        filter_layout = QHBoxLayout()
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("按名称筛选")
+        filter_layout.addWidget(self.name_edit, 1)
+        self.size_combo = QComboBox()
+        for label, min_size, max_size in SIZE_FILTERS:
+            self.size_combo.addItem(label, (min_size, max_size))
+        filter_layout.addWidget(self.size_combo)
+        layout.addLayout(filter_layout)
+
+        self.model = TextureLibraryModel(self)
+        self.proxy_model = TextureFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy_model)
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.list_view.setGridSize(QSize(THUMBNAIL_SIZE + 24, THUMBNAIL_SIZE + 32))
+        # 所有单元格尺寸相同，视图只需为可见单元格取数据
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setLayoutMode(QListView.Batched)
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_view.setDragEnabled(True)
+        self.list_view.setDragDropMode(QAbstractItemView.DragOnly)
+        self.list_view.doubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.list_view)
+
+        self.count_label = QLabel("")
+        layout.addWidget(self.count_label)
+
+        self.name_edit.textChanged.connect(self.on_filter_changed)
+        self.size_combo.currentIndexChanged.connect(self.on_filter_changed)
+
+    def on_choose_folder_clicked(self):
+        folder = QFileDialog.getExistingDirectory(self, "选择贴图文件夹", self.folder)
+        if folder:
+            self.set_folder(folder)
+
+    def set_catalog(self, catalog):
+        """
+        设置贴图目录数据库
+        """
+        self.model.catalog = catalog
+
+    def refresh(self):
+        """
+        重新加载当前文件夹
+        """
+        if self.folder and os.path.isdir(self.folder):
+            self.set_folder(self.folder)
+
+    def set_folder(self, folder):
+        """
+        浏览指定文件夹
+        """
+        self.folder = folder
+        self.folder_label.setText(folder)
+        if not self.model.set_folder(folder):
+            # 先显示文件头中的信息，由贴图目录在后台增量扫描后刷新
+            self.catalog_outdated.emit(folder)
+        self.update_count()
+
+    def on_filter_changed(self, *args):
+        self.proxy_model.set_name_filter(self.name_edit.text())
+        self.proxy_model.set_size_filter(*self.size_combo.currentData())
+        self.update_count()
+
+    def update_count(self):
+        self.count_label.setText(f"显示 {self.proxy_model.rowCount()} / {self.model.rowCount()} 个贴图")
+
+    def on_item_double_clicked(self, index):
+        self.texture_activated.emit(index.data(TextureLibraryModel.PathRole))
+
+    def shutdown(self):
+        """
+        停止缩略图线程
+        """
+        self.model.loader.shutdown()
@@ -12,6 +12,9 @@ import os
 import sys
 
 from ui.image_item import ImageItem
+from ui.texture_browser import TextureBrowserWidget
+from core.image_metadata import SUPPORTED_EXTENSIONS, get_image_info
+from core.texture_maps import MAP_LABELS
 
 class ToolPanel(QWidget):
     """
@@ -30,7 +33,13 @@ class ToolPanel(QWidget):
     border_width_changed = pyqtSignal(int)    # 边界线宽度变更信号
     handle_color_changed = pyqtSignal(QColor)  # 新增：缩放手柄颜色变更信号
     handle_size_changed = pyqtSignal(int)      # 新增：缩放手柄大小变更信号
-    export_signal = pyqtSignal(str, str)  # 导出信号，参数为Lod和导出路径
+    pixel_budget_changed = pyqtSignal(int)  # 贴图内存上限变更信号，参数为MB
+    export_signal = pyqtSignal(str, str, int)  # 导出信号，参数为Lod、导出路径和贴图尺寸
+    texture_size_changed = pyqtSignal(int)  # 导出贴图尺寸变更信号
+    export_preview_toggled = pyqtSignal(bool)  # 导出预览开关信号
+    bulk_import_signal = pyqtSignal(list)  # 批量导入信号，参数为文件路径列表
+    generate_lods_signal = pyqtSignal(str)  # 生成全部Lod图集信号，参数为导出路径
+    texture_browser_created = pyqtSignal(object)  # 贴图库控件创建完成信号，参数为贴图库控件
     
     def __init__(self, parent=None):
         super(ToolPanel, self).__init__(parent)
@@ -135,32 +144,54 @@ class ToolPanel(QWidget):
         layout = QVBoxLayout(self)
         self.set_theme('dark')
         
-        # 创建选项卡
+        # 创建选项卡，除第一页外的选项卡在首次显示或被访问时才创建控件
         self.tab_widget = QTabWidget()
+        self._tab_builders = {}  # 选项卡页 -> 创建控件的函数
         
         # 添加贴图面板
         self.add_image_tab = QWidget()
         self.init_add_image_tab()
         self.tab_widget.addTab(self.add_image_tab, "工具")
         
+        # 贴图库面板，首次打开或恢复上次的文件夹时才创建
+        self.texture_browser = None
+        self.texture_browser_tab = QWidget()
+        self.add_lazy_tab(self.texture_browser_tab, self.init_texture_browser_tab, "贴图库")
+        
         # 视图设置面板
         self.view_settings_tab = QWidget()
-        self.init_view_settings_tab()
-        self.tab_widget.addTab(self.view_settings_tab, "视图设置")
+        self.add_lazy_tab(self.view_settings_tab, self.init_view_settings_tab, "视图设置")
         
         # 细节属性面板
         self.detail_property_tab = QWidget()
-        self.init_detail_property_tab()
-        self.tab_widget.addTab(self.detail_property_tab, "细节属性")
+        self.add_lazy_tab(self.detail_property_tab, self.init_detail_property_tab, "细节属性")
         
         # 导出面板
         self.export_tab = QWidget()
-        self.init_export_tab()
-        self.tab_widget.addTab(self.export_tab, "导出")
+        self.add_lazy_tab(self.export_tab, self.init_export_tab, "导出")
         
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         layout.addWidget(self.tab_widget)
         self.setLayout(layout)
         
+    def add_lazy_tab(self, page, builder, title):
+        """
+        添加延迟创建的选项卡，builder在首次需要时向page中创建控件
+        """
+        self._tab_builders[page] = builder
+        self.tab_widget.addTab(page, title)
+        
+    def ensure_tab(self, page):
+        """
+        创建尚未构建的选项卡控件
+        """
+        builder = self._tab_builders.pop(page, None)
+        if builder is not None:
+            builder()
+            
+    def on_tab_changed(self, index):
+        self.ensure_tab(self.tab_widget.widget(index))
+        
     def init_add_image_tab(self):
         """
         初始化添加贴图面板
@@ -177,6 +208,8 @@ class ToolPanel(QWidget):
         self.fit_view_btn = QPushButton("适应视图")
         self.delete_btn = QPushButton("删除选中贴图")
         self.add_image_btn = QPushButton("添加贴图")
+        self.bulk_import_btn = QPushButton("批量添加贴图")
+        self.import_folder_btn = QPushButton("导入文件夹")
         # 两行布局
         op_layout.addWidget(self.new_btn, 0, 0)
         op_layout.addWidget(self.open_btn, 0, 1)
@@ -185,12 +218,16 @@ class ToolPanel(QWidget):
         op_layout.addWidget(self.zoom_out_btn, 1, 1)
         op_layout.addWidget(self.add_image_btn, 1, 2)
         op_layout.addWidget(self.delete_btn, 1, 3)
+        op_layout.addWidget(self.bulk_import_btn, 2, 0)
+        op_layout.addWidget(self.import_folder_btn, 2, 1)
         
         op_group.setLayout(op_layout)
         layout.addWidget(op_group)
 
         # 连接信号（槽函数待主窗口绑定）
         self.add_image_btn.clicked.connect(self.on_add_image_clicked)
+        self.bulk_import_btn.clicked.connect(self.on_bulk_import_clicked)
+        self.import_folder_btn.clicked.connect(self.on_import_folder_clicked)
 
         # 最近添加的贴图预览
         self.preview_group = QGroupBox("贴图预览")
@@ -207,6 +244,23 @@ class ToolPanel(QWidget):
         
     
         
+    def init_texture_browser_tab(self):
+        """
+        初始化贴图库面板
+        """
+        layout = QVBoxLayout(self.texture_browser_tab)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.texture_browser = TextureBrowserWidget()
+        layout.addWidget(self.texture_browser)
+        self.texture_browser_created.emit(self.texture_browser)
+        
+    def get_texture_browser(self):
+        """
+        返回贴图库控件，尚未创建时先创建
+        """
+        self.ensure_tab(self.texture_browser_tab)
+        return self.texture_browser
+        
     def init_view_settings_tab(self):
         """
         初始化视图设置面板
@@ -350,6 +404,21 @@ class ToolPanel(QWidget):
         grid_group.setLayout(grid_layout)
         layout.addWidget(grid_group)
         
+        memory_group = QGroupBox("内存设置")
+        memory_layout = QGridLayout()
+        
+        # 超出上限时视口外的贴图降级为低分辨率
+        memory_layout.addWidget(QLabel("贴图内存上限(MB):"), 0, 0)
+        self.pixel_budget_spin = QSpinBox()
+        self.pixel_budget_spin.setRange(128, 65536)
+        self.pixel_budget_spin.setSingleStep(256)
+        self.pixel_budget_spin.setValue(1024)
+        self.pixel_budget_spin.valueChanged.connect(self.pixel_budget_changed.emit)
+        memory_layout.addWidget(self.pixel_budget_spin, 0, 1)
+        
+        memory_group.setLayout(memory_layout)
+        layout.addWidget(memory_group)
+        
         # 添加一个分隔线
         line2 = QFrame()
         line2.setFrameShape(QFrame.HLine)
@@ -407,6 +476,11 @@ class ToolPanel(QWidget):
         self.mesh_index_spin.valueChanged.connect(self.on_mesh_index_changed)
         property_layout.addWidget(self.mesh_index_spin, 3, 1)
         
+        # 贴图通道（按文件名后缀自动识别）
+        property_layout.addWidget(QLabel("贴图通道:"), 4, 0)
+        self.maps_label = QLabel("未选择贴图")
+        property_layout.addWidget(self.maps_label, 4, 1)
+        
         property_group.setLayout(property_layout)
         layout.addWidget(property_group)
         
@@ -430,6 +504,22 @@ class ToolPanel(QWidget):
         self.lod_edit.setValue(-1)  # 默认值为-1
         lod_layout.addWidget(self.lod_edit, 0, 1)
         
+        # 导出贴图尺寸
+        lod_layout.addWidget(QLabel("贴图尺寸:"), 1, 0)
+        self.texture_size_combo = QComboBox()
+        for size in (512, 1024, 2048, 4096):
+            self.texture_size_combo.addItem(f"{size} x {size}", size)
+        self.texture_size_combo.setCurrentIndex(2)  # 默认2048
+        self.texture_size_combo.currentIndexChanged.connect(self.on_texture_size_changed)
+        lod_layout.addWidget(self.texture_size_combo, 1, 1)
+        
+        # 导出预览
+        lod_layout.addWidget(QLabel("导出预览:"), 2, 0)
+        self.export_preview_check = QCheckBox("在画布旁实时显示合并结果")
+        self.export_preview_check.setChecked(False)
+        self.export_preview_check.toggled.connect(self.export_preview_toggled.emit)
+        lod_layout.addWidget(self.export_preview_check, 2, 1)
+        
         lod_group.setLayout(lod_layout)
         layout.addWidget(lod_group)
         
@@ -456,6 +546,12 @@ class ToolPanel(QWidget):
         self.export_btn.clicked.connect(self.on_export_clicked)
         layout.addWidget(self.export_btn)
         
+        # 由Lod0布局生成Lod1-5的图集和导出记录
+        self.generate_lods_btn = QPushButton("生成Lod1-5图集")
+        self.generate_lods_btn.setToolTip("以当前布局为Lod0，生成Lod1-5的图集和导出记录到导出路径所在目录")
+        self.generate_lods_btn.clicked.connect(self.on_generate_lods_clicked)
+        layout.addWidget(self.generate_lods_btn)
+        
         # 添加占位空间
         layout.addStretch()
         
@@ -507,6 +603,7 @@ class ToolPanel(QWidget):
         )
         
         if filepath:
+            self.show_preview_info(filepath)
             dialog = MaterialNameDialog(self, filepath)
             if dialog.exec_() == QDialog.Accepted:
                 # 使用文件名作为默认材质球名称
@@ -516,6 +613,38 @@ class ToolPanel(QWidget):
                 # 使用默认的mesh_index=0
                 self.add_image_signal.emit(filepath, name_without_ext, width, height, 0)
     
+    def on_bulk_import_clicked(self):
+        """
+        批量添加贴图按钮点击事件处理，可多选文件
+        """
+        filepaths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择图片",
+            "",
+            "图片文件 (*.png *.jpg *.jpeg *.bmp *.gif *.tga)"
+        )
+        
+        if filepaths:
+            self.bulk_import_signal.emit(filepaths)
+            
+    def on_import_folder_clicked(self):
+        """
+        导入文件夹按钮点击事件处理，导入文件夹下所有支持的贴图
+        """
+        folder = QFileDialog.getExistingDirectory(self, "选择贴图文件夹", "")
+        if not folder:
+            return
+            
+        filepaths = [os.path.join(folder, name).replace("\\", "/")
+                     for name in sorted(os.listdir(folder))
+                     if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS]
+        
+        if not filepaths:
+            QMessageBox.warning(self, "警告", "文件夹中没有支持的贴图")
+            return
+            
+        self.bulk_import_signal.emit(filepaths)
+    
     def on_grid_visible_changed(self, state):
         """
         网格可见性改变事件处理
@@ -576,6 +705,27 @@ class ToolPanel(QWidget):
 
     def on_handle_size_changed(self, value):
         self.handle_size_changed.emit(value)
+        
+    def set_pixel_budget(self, megabytes):
+        """
+        设置贴图内存上限控件
+        """
+        self.ensure_tab(self.view_settings_tab)
+        self.pixel_budget_spin.setValue(megabytes)
+    
+    def show_preview_info(self, filepath):
+        """
+        在预览区显示贴图的文件名、尺寸和通道信息（只读取文件头）
+        """
+        filename = os.path.basename(filepath)
+        try:
+            info = get_image_info(filepath)
+        except (OSError, ValueError):
+            self.preview_label.setText(f"{filename}\n无法读取贴图信息")
+            return
+        alpha_text = "带透明通道" if info.has_alpha else "无透明通道"
+        self.preview_label.setText(
+            f"{filename}\n{info.width} x {info.height}  {info.channels}通道  {alpha_text}")
     
     def clear_preview(self):
         """
@@ -610,6 +760,7 @@ class ToolPanel(QWidget):
         """
         设置网格属性控件
         """
+        self.ensure_tab(self.view_settings_tab)
         if "visible" in settings:
             self.grid_visible_check.setChecked(settings["visible"])
         if "size" in settings:
@@ -635,6 +786,7 @@ class ToolPanel(QWidget):
         """
         设置画布大小控件
         """
+        self.ensure_tab(self.view_settings_tab)
         self.canvas_width_spin.setValue(width)
         self.canvas_height_spin.setValue(height)
         
@@ -679,7 +831,7 @@ class ToolPanel(QWidget):
             return
             
         # 发出导出信号
-        self.export_signal.emit(str(lod), export_path)
+        self.export_signal.emit(str(lod), export_path, self.get_texture_size())
         
         # 复制导出路径到剪贴板
         clipboard = QApplication.clipboard()
@@ -690,10 +842,36 @@ class ToolPanel(QWidget):
         if main_window:
             main_window.statusBar().showMessage(f"导出成功！导出路径已复制到剪贴板：{export_path}")
         
+    def get_texture_size(self):
+        """
+        获取当前选择的导出贴图尺寸
+        """
+        self.ensure_tab(self.export_tab)
+        return self.texture_size_combo.currentData()
+        
+    def on_texture_size_changed(self, index):
+        """
+        导出贴图尺寸改变事件处理
+        """
+        self.texture_size_changed.emit(self.get_texture_size())
+        
+    def on_generate_lods_clicked(self):
+        """
+        处理生成Lod图集按钮点击事件
+        """
+        export_path = self.export_path_edit.text().strip()
+        
+        if not export_path:
+            QMessageBox.warning(self, "警告", "请选择导出路径")
+            return
+            
+        self.generate_lods_signal.emit(export_path)
+        
     def update_detail_property(self, image_item):
         """
         更新细节属性面板的值
         """
+        self.ensure_tab(self.detail_property_tab)
         if image_item:
             self.name_label.setText(image_item.name)
             
@@ -725,6 +903,11 @@ class ToolPanel(QWidget):
             self.mesh_index_spin.setEnabled(True)  # 启用编辑
             self.mesh_index_spin.setToolTip("请输入Mesh索引(0-999)")  # 添加提示文本
             
+            # 显示各通道贴图，完整路径放在工具提示中
+            maps = getattr(image_item, "maps", {})
+            self.maps_label.setText(", ".join(["BaseColor"] + [MAP_LABELS.get(channel, channel) for channel in maps]))
+            self.maps_label.setToolTip("\n".join(f"{MAP_LABELS.get(channel, channel)}: {path}" for channel, path in maps.items()))
+            
         else:
             self.name_label.setText("未选择贴图")
             self.path_label.setText("未选择贴图")
@@ -735,6 +918,8 @@ class ToolPanel(QWidget):
             self.material_edit.setEnabled(False)  # 禁用编辑
             self.mesh_index_spin.setValue(0)
             self.mesh_index_spin.setEnabled(False)  # 禁用编辑
+            self.maps_label.setText("未选择贴图")
+            self.maps_label.setToolTip("")
             
     def on_material_name_changed(self, text):
         """
@@ -845,12 +1030,15 @@ class MaterialNameDialog(QDialog):
         size_group = QGroupBox("图片大小设置")
         size_layout = QVBoxLayout()
         
-        # 原始大小显示
+        # 原始大小显示（只读取文件头，不解码贴图）
         if self.filepath:
-            pixmap = QPixmap(self.filepath)
-            if not pixmap.isNull():
-                self.original_width = pixmap.width()
-                self.original_height = pixmap.height()
+            try:
+                info = get_image_info(self.filepath)
+            except (OSError, ValueError):
+                info = None
+            if info is not None:
+                self.original_width = info.width
+                self.original_height = info.height
                 original_size_label = QLabel(f"原始大小: {self.original_width} x {self.original_height}")
                 size_layout.addWidget(original_size_label)
         